@@ -0,0 +1,268 @@
+import concurrent.futures
+import functools
+import os
+from collections.abc import Sequence
+
+import dpcisr
+import framerate
+import framestore
+import metric_cache
+import numpy as np
+import numpy.typing as npt
+import resultsdb
+import sketch
+
+# column heading of each metric in the results table
+HEADINGS = {
+    "maximum": "Max",
+    "average": "Avg",
+    "minimum": "Min",
+    "stdev": "STDEV",
+    **{f"percentile{value}": f"{value} %ile" for value in framerate.METRIC_VALUES},
+    **{f"lows{value}": f"{value}% Low" for value in framerate.METRIC_VALUES},
+    "dpc_maximum": "DPC Max us",
+    f"dpc_percentile{dpcisr.LATENCY_PERCENTILE}": f"DPC {dpcisr.LATENCY_PERCENTILE}% us",
+    "isr_maximum": "ISR Max us",
+    f"isr_percentile{dpcisr.LATENCY_PERCENTILE}": f"ISR {dpcisr.LATENCY_PERCENTILE}% us",
+}
+
+
+def print_table(formatted_results: dict[str, dict[str, str]], metrics: Sequence[str] = framerate.METRICS):
+    # multi-core affinity masks are labeled with all of their cpus
+    cpu_width = max([5, *(len(_cpu) + 2 for _cpu in formatted_results)])
+
+    # print table headings
+    print(f"{'CPU':<{cpu_width}}", end="")
+
+    for metric in metrics:
+        print(f"{HEADINGS[metric]:<12}", end="")
+
+    print()  # new line
+
+    # print values for each heading
+    for _cpu, _results in formatted_results.items():
+        print(f"{_cpu:<{cpu_width}}", end="")
+        for metric in metrics:
+            metric_value = _results[metric]
+            # padding needs to be larger to compensate for color chars
+            right_padding = 21 if "[" in metric_value else 12
+            print(f"{metric_value:<{right_padding}}", end="")
+
+        print()  # new line
+
+    print()  # new line
+
+
+def analyze_capture(capture_path: str, bootstrap_resamples: int = 0) -> dict[str, float]:
+    return analyze_frametimes(*framestore.load_capture(capture_path), bootstrap_resamples)
+
+
+def analyze_frametimes(
+    frametimes: npt.NDArray[np.floating],
+    warmup_frames: int,
+    bootstrap_resamples: int = 0,
+) -> dict[str, float]:
+    fps = framerate.Fps(frametimes[warmup_frames:])
+
+    results = {
+        "maximum": round(fps.maximum(), 2),
+        "average": round(fps.average(), 2),
+        "minimum": round(fps.minimum(), 2),
+        # negate positive value so that highest negative value will be the lowest absolute value
+        "stdev": round(-fps.stdev(), 2),
+        # all thresholds of a metric are resolved in a single batched pass
+        **{
+            f"{metric}{value}": round(result, 2)
+            for metric, batch in (("percentile", fps.percentiles), ("lows", fps.lows_many))
+            for value, result in zip(framerate.METRIC_VALUES, batch(framerate.METRIC_VALUES))
+        },
+    }
+
+    if bootstrap_resamples > 0:
+        intervals = fps.bootstrap(bootstrap_resamples)
+        # negate and swap the bounds of stdev like its value
+        lower, upper = intervals["stdev"]
+        intervals["stdev"] = (-upper, -lower)
+    else:
+        intervals = {metric: (value, value) for metric, value in results.items()}
+
+    # confidence interval of each metric, used to only rank cpus that are statistically separated
+    for metric, (lower, upper) in intervals.items():
+        results[f"{metric}_lower"] = round(lower, 2)
+        results[f"{metric}_upper"] = round(upper, 2)
+
+    # not a metric, the duration of the frames excluded from the results is only reported
+    results["warmup_seconds"] = round(float(frametimes[:warmup_frames].sum(dtype="f8")) / 1000, 2)
+
+    return results
+
+
+def analyze_capture_uncached(
+    capture_path: str,
+    bootstrap_resamples: int = 0,
+) -> tuple[metric_cache.Fingerprint, dict[str, float]]:
+    frametimes, warmup_frames = framestore.load_capture(capture_path)
+
+    # the sketch of the capture is merged with the captures of other sessions by --query --aggregate
+    sketch.save_capture_sketch(capture_path, frametimes[warmup_frames:])
+
+    # fingerprint in the worker so hashing is parallelized along with the analysis
+    return metric_cache.fingerprint(capture_path), analyze_frametimes(frametimes, warmup_frames, bootstrap_resamples)
+
+
+def open_cache(csv_directory: str, bootstrap_resamples: int) -> metric_cache.MetricCache:
+    # cached intervals are only valid for the same number of resamples
+    return metric_cache.MetricCache(csv_directory, {"bootstrap_resamples": bootstrap_resamples})
+
+
+def analyze_latency(report_path: str) -> dict[str, float]:
+    # negate latencies like stdev so that the highest value is the best, there is no interval to separate cpus on
+    results = {metric: -value for metric, value in dpcisr.summarize(dpcisr.read_report(report_path)).items()}
+
+    return results | {f"{metric}_{bound}": value for metric, value in results.items() for bound in ("lower", "upper")}
+
+
+def rank_tiers(results: dict[str, dict[str, float]], metric: str) -> list[list[str]]:
+    """
+    Group cpus into tiers ordered from best to worst, a cpu starts a new tier only if its confidence interval is
+    entirely below the intervals of the cpus in the tier above it.
+    """
+    tiers: list[list[str]] = []
+    tier_lower = 0.0
+
+    for cpu in sorted(results, key=lambda cpu: results[cpu][metric], reverse=True):
+        lower, upper = results[cpu][f"{metric}_lower"], results[cpu][f"{metric}_upper"]
+
+        if tiers and upper >= tier_lower:
+            tiers[-1].append(cpu)
+            tier_lower = min(tier_lower, lower)
+        else:
+            tiers.append([cpu])
+            tier_lower = lower
+
+    return tiers
+
+
+def analyze_results(
+    csv_directory: str,
+    workers: int | None = None,
+    bootstrap_resamples: int = 1000,
+) -> tuple[dict[str, dict[str, float]], tuple[str, ...]]:
+    """Results of every cpu in the directory in display order and the metrics that can be compared across them."""
+    results: dict[str, dict[str, float]] = {}
+
+    # keyed by the label of the affinity mask, e.g. "3" or "0,1"
+    # binary frametime files are preferred as they can be memory-mapped, columnar exports only decompress the frametimes
+    capture_files = framestore.find_captures(csv_directory, ("bin", "npz", "csv"))
+
+    # single cpus first, followed by the multi-core masks
+    cpus = sorted(capture_files, key=lambda label: (label.count(","), [int(cpu) for cpu in label.split(",")]))
+
+    cache = open_cache(csv_directory, bootstrap_resamples)
+
+    for cpu in cpus:
+        capture_file = capture_files[cpu]
+
+        if (cached_results := cache.lookup(capture_file, os.path.join(csv_directory, capture_file))) is not None:
+            results[cpu] = cached_results
+
+    # only new or changed captures are analyzed
+    pending_cpus = [cpu for cpu in cpus if cpu not in results]
+    capture_paths = [os.path.join(csv_directory, capture_files[cpu]) for cpu in pending_cpus]
+
+    analyze = functools.partial(analyze_capture_uncached, bootstrap_resamples=bootstrap_resamples)
+
+    if workers == 1 or len(pending_cpus) < 2:
+        cpu_results = list(map(analyze, capture_paths))
+    else:
+        # parsing and computing metrics is cpu-bound, map preserves the order of the cpus
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            cpu_results = list(executor.map(analyze, capture_paths))
+
+    for cpu, (file_fingerprint, cpu_result) in zip(pending_cpus, cpu_results):
+        results[cpu] = cpu_result
+        cache.store(capture_files[cpu], file_fingerprint, cpu_result)
+
+    cache.save()
+
+    # merge cached and computed results back in cpu order
+    results = {cpu: results[cpu] for cpu in cpus}
+
+    metrics: tuple[str, ...] = framerate.METRICS
+
+    # dpcisr reports are written next to the csv directory if xperf was enabled during the session
+    xperf_directory = os.path.join(os.path.dirname(os.path.normpath(csv_directory)), "xperf")
+    report_paths = {cpu: os.path.join(xperf_directory, f"CPU-{cpu}.txt") for cpu in cpus}
+
+    # latency columns are only shown if they can be compared across all cpus
+    if cpus and all(os.path.exists(report_path) for report_path in report_paths.values()):
+        for cpu, report_path in report_paths.items():
+            results[cpu] = results[cpu] | analyze_latency(report_path)
+
+        metrics += dpcisr.METRICS
+
+    return results, metrics
+
+
+def display_results(
+    csv_directory: str,
+    enable_color: bool,
+    workers: int | None = None,
+    bootstrap_resamples: int = 1000,
+    database_path: str | None = None,
+) -> None:
+    results, metrics = analyze_results(csv_directory, workers, bootstrap_resamples)
+
+    # index the session so that it can be compared with other sessions without analyzing it again
+    if database_path is not None and results:
+        resultsdb.index_session(database_path, csv_directory, results, metrics)
+
+    # each index represents the rank (e.g. index 0 is 1st)
+    colors: list[str] = [
+        "\x1b[92m",  # Green
+        "\x1b[93m",  # Yellow
+    ]
+
+    if enable_color:
+        default = "\x1b[0m"
+        if os.name == "nt":
+            # enables virtual terminal sequences in the console
+            os.system("color")
+    else:
+        default = ""
+
+    formatted_results: dict[str, dict[str, str]] = {cpu: {} for cpu in results}
+
+    # analyze best values for each metric
+    for metric in metrics:
+        tiers = rank_tiers(results, metric)
+
+        # 1 tier means no ranking will be done as no cpu is separated from the rest
+        # always leave the last tier unranked
+        ranked_tiers = tiers[: min(len(colors), len(tiers) - 1)]
+        tier_colors = {_cpu: colors[nth_best] for nth_best, tier in enumerate(ranked_tiers) for _cpu in tier}
+
+        for _cpu, _results in results.items():
+            # abs is for negative values such as stdev
+            # :.2f is for .00 numerical formatting
+            new_value = f"{abs(_results[metric]):.2f}"
+
+            # determine rank of value
+            if enable_color and (color := tier_colors.get(_cpu)) is not None:
+                new_value = f"{color}{new_value}{default}"
+
+            formatted_results[_cpu][metric] = new_value
+
+    if os.name == "nt":
+        # widen the console so that the table does not wrap
+        os.system("<nul set /p=\x1b[8;50;1000t")
+
+    print_table(formatted_results, metrics)
+
+    # captures without warm-up detection (e.g. csv files) have no warm-up
+    warmups = [
+        f"CPU {_cpu} {seconds:.2f}s" for _cpu, _results in results.items() if (seconds := _results["warmup_seconds"])
+    ]
+
+    if warmups:
+        print(f"Warm-up excluded from the results: {', '.join(warmups)}\n")
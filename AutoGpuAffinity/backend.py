@@ -0,0 +1,174 @@
+import logging
+import subprocess
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Protocol
+
+import readiness
+import topology
+
+LOG_BACKEND = logging.getLogger("BACKEND")
+
+# device state changes, the values match DICS_ENABLE and DICS_DISABLE of setupapi
+DRIVER_ENABLE = 0x1
+DRIVER_DISABLE = 0x2
+
+
+class CaptureProcess(Protocol):
+    """Subset of subprocess.Popen used to supervise a running PresentMon capture."""
+
+    args: list[str]
+    returncode: int | None
+
+    def wait(self, timeout: float | None = None) -> int: ...
+
+
+class Backend(ABC):
+    """Platform operations performed by a benchmark session."""
+
+    @abstractmethod
+    def is_admin(self) -> bool:
+        pass
+
+    @abstractmethod
+    def gpu_hwids(self) -> list[str]:
+        pass
+
+    @abstractmethod
+    def cpu_topology(self) -> topology.Topology:
+        pass
+
+    @abstractmethod
+    def basic_display_start_type(self) -> int | None:
+        pass
+
+    @abstractmethod
+    def set_driver_state(self, hwid: str, state: int) -> int:
+        pass
+
+    @abstractmethod
+    def is_driver_started(self, hwid: str) -> bool:
+        pass
+
+    @abstractmethod
+    def read_affinity_policy(self, hwid: str) -> int | None:
+        """Returns the mask of the current affinity policy or None if no policy is set."""
+
+    @abstractmethod
+    def write_affinity_policy(self, hwid: str, mask: int) -> None:
+        pass
+
+    @abstractmethod
+    def remove_affinity_policy(self, hwid: str) -> None:
+        pass
+
+    @abstractmethod
+    def start_afterburner(self, path: str, profile: int) -> int:
+        """Applies the profile, returns 1 if afterburner did not exit once it was applied."""
+
+    @abstractmethod
+    def launch_subject(self, binpath: str, args: list[str], affinity: int | None) -> None:
+        pass
+
+    @abstractmethod
+    def is_subject_presenting(self) -> bool:
+        """Whether the launched subject (or a process it started) shows a window that it presents to."""
+
+    @abstractmethod
+    def start_presentmon(self, args: list[str], timeout: float | None = None) -> CaptureProcess:
+        """Starts a capture that is terminated once the timeout has passed so that a hung instance can not stall."""
+
+    @abstractmethod
+    def stop_presentmon(self, presentmon_path: str) -> None:
+        pass
+
+    @abstractmethod
+    def xperf(self, location: str, args: list[str], quiet: bool = True, background: bool = False) -> None:
+        """
+        Runs xperf and raises subprocess.CalledProcessError if it fails. Background runs (e.g. report generation while
+        the next cpu is captured) have the lowest priority and are kept off the cpus under test.
+        """
+
+    @abstractmethod
+    def kill_processes(self, *targets: str) -> None:
+        """
+        Kills the processes with the given names that a crashed session left running, scans every process. Only used
+        if kill_stray_processes is enabled as unrelated processes with the same name are killed as well.
+        """
+
+    @abstractmethod
+    def terminate_children(self) -> None:
+        """Tears down the subject and the capture processes that were launched by the backend."""
+
+    @abstractmethod
+    def background_thread(self) -> None:
+        """Lowers the priority of the calling post-processing thread and keeps it off the cpus under test."""
+
+    @abstractmethod
+    def isolate_background(self, mask: int) -> None:
+        """Moves the post-processing threads and processes to the cpus outside of the mask that is benchmarked next."""
+
+    @abstractmethod
+    def sleep(self, seconds: float) -> None:
+        pass
+
+    @abstractmethod
+    def remove_kernel_etl(self) -> None:
+        pass
+
+    def run_presentmon(self, args: list[str], timeout: float | None = None) -> None:
+        process = self.start_presentmon(args, timeout)
+
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, args)
+
+    def restart_driver(self, hwid: str) -> int:
+        if self.set_driver_state(hwid, DRIVER_DISABLE) != 0:
+            LOG_BACKEND.error("failed to disable driver while restarting %s", hwid)
+            return 1
+
+        if not readiness.wait_until(lambda: not self.is_driver_started(hwid), 2, "driver disabled"):
+            LOG_BACKEND.error("driver did not stop while restarting %s", hwid)
+            return 1
+
+        if self.set_driver_state(hwid, DRIVER_ENABLE) != 0:
+            LOG_BACKEND.error("failed to enable driver while restarting %s", hwid)
+            return 1
+
+        # allow more time than the previous fixed wait as the device may take longer to start on some systems
+        if not readiness.wait_until(lambda: self.is_driver_started(hwid), 10, "driver started", fixed_wait=2):
+            LOG_BACKEND.error("driver did not start while restarting %s", hwid)
+            return 1
+
+        return 0
+
+    def apply_affinity(self, hwids: list[str], mask: int | None) -> int:
+        """Assigns the affinity mask to the graphics drivers, None removes the policy."""
+        changed: list[str] = []
+
+        for hwid in hwids:
+            # the driver already runs with the requested policy, restarting it would be a no-op
+            if self.read_affinity_policy(hwid) == mask:
+                LOG_BACKEND.debug("affinity policy is already up to date for %s", hwid)
+                continue
+
+            if mask is None:
+                self.remove_affinity_policy(hwid)
+            else:
+                self.write_affinity_policy(hwid, mask)
+
+            changed.append(hwid)
+
+        if not changed:
+            return 0
+
+        # restart the devices concurrently so that the overhead does not grow with the number of GPUs
+        with ThreadPoolExecutor(max_workers=len(changed)) as executor:
+            results = list(executor.map(self.restart_driver, changed))
+
+        failed = [hwid for hwid, result in zip(changed, results) if result != 0]
+
+        for hwid in failed:
+            LOG_BACKEND.error("failed to restart driver for %s", hwid)
+
+        return 1 if failed else 0
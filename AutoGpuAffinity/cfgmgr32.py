@@ -0,0 +1,23 @@
+import ctypes
+import ctypes.wintypes
+
+CFGMGR32 = ctypes.windll.cfgmgr32
+
+CR_SUCCESS = 0x0
+
+CM_LOCATE_DEVNODE_NORMAL = 0x0
+
+DN_STARTED = 0x8
+
+CM_Locate_DevNodeW = CFGMGR32.CM_Locate_DevNodeW
+CM_Locate_DevNodeW.argtypes = [ctypes.POINTER(ctypes.wintypes.DWORD), ctypes.c_wchar_p, ctypes.wintypes.ULONG]
+CM_Locate_DevNodeW.restype = ctypes.wintypes.DWORD
+
+CM_Get_DevNode_Status = CFGMGR32.CM_Get_DevNode_Status
+CM_Get_DevNode_Status.argtypes = [
+    ctypes.POINTER(ctypes.wintypes.ULONG),
+    ctypes.POINTER(ctypes.wintypes.ULONG),
+    ctypes.wintypes.DWORD,
+    ctypes.wintypes.ULONG,
+]
+CM_Get_DevNode_Status.restype = ctypes.wintypes.DWORD
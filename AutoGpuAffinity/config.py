@@ -4,6 +4,8 @@ from configparser import ConfigParser
 from dataclasses import dataclass
 from enum import Enum
 
+import framerate
+
 LOG_CONFIG = logging.getLogger("CONFIG")
 
 
@@ -12,6 +14,11 @@ class Api(Enum):
     D3D9 = 2
 
 
+class SchedulerPolicy(Enum):
+    LINEAR = 1
+    SUCCESSIVE_HALVING = 2
+
+
 @dataclass
 class Settings:
     cache_duration: int
@@ -20,6 +27,9 @@ class Settings:
     api: Api
     sync_driver_affinity: bool
     skip_confirmation: bool
+    save_csvs: bool
+    live_stats_interval: int
+    kill_stray_processes: bool
 
 
 @dataclass
@@ -35,6 +45,45 @@ class Xperf:
     save_etls: bool
 
 
+@dataclass
+class AdaptiveDuration:
+    enabled: bool
+    min_duration: int
+    tolerance: float
+    metrics: list[str]
+
+
+@dataclass
+class Scheduler:
+    policy: SchedulerPolicy
+    round_duration: int
+    finalists: int
+    metric: str
+
+
+@dataclass
+class AffinitySearch:
+    enabled: bool
+    topology: str
+
+
+@dataclass
+class WarmupDetection:
+    enabled: bool
+    max_fraction: float
+
+
+@dataclass
+class Matrix:
+    enabled: bool
+    # values of each setting to benchmark, empty arrays keep the value of their own section
+    api: list[Api]
+    resolution: list[tuple[int, int]]
+    fps_cap: list[int]
+    triple_buffering: list[bool]
+    sync_driver_affinity: list[bool]
+
+
 @dataclass
 class Liblava:
     fullscreen: bool
@@ -66,6 +115,9 @@ class Config:
             api=apis[config.getint("settings", "api")],
             sync_driver_affinity=config.getboolean("settings", "sync_driver_affinity"),
             skip_confirmation=config.getboolean("settings", "skip_confirmation"),
+            save_csvs=config.getboolean("settings", "save_csvs", fallback=True),
+            live_stats_interval=config.getint("settings", "live_stats_interval", fallback=0),
+            kill_stray_processes=config.getboolean("settings", "kill_stray_processes", fallback=False),
         )
 
         self.msi_afterburner = MSIAfterburner(
@@ -79,6 +131,30 @@ class Config:
             config.getboolean("xperf", "save_etls"),
         )
 
+        self.adaptive_duration = AdaptiveDuration(
+            config.getboolean("adaptive duration", "enabled", fallback=False),
+            config.getint("adaptive duration", "min_duration", fallback=10),
+            config.getfloat("adaptive duration", "tolerance", fallback=0.05),
+            Config.str_to_str_array(config.get("adaptive duration", "metrics", fallback="[average, lows1]")),
+        )
+
+        scheduler_policies: dict[int, SchedulerPolicy] = {
+            1: SchedulerPolicy.LINEAR,
+            2: SchedulerPolicy.SUCCESSIVE_HALVING,
+        }
+
+        self.scheduler = Scheduler(
+            scheduler_policies[config.getint("scheduler", "policy", fallback=1)],
+            config.getint("scheduler", "round_duration", fallback=5),
+            config.getint("scheduler", "finalists", fallback=2),
+            config.get("scheduler", "metric", fallback="lows1"),
+        )
+
+        self.affinity_search = AffinitySearch(
+            config.getboolean("affinity search", "enabled", fallback=False),
+            config.get("affinity search", "topology", fallback=""),
+        )
+
         self.liblava = Liblava(
             config.getboolean("liblava", "fullscreen"),
             config.getint("liblava", "x_resolution"),
@@ -87,10 +163,30 @@ class Config:
             config.getboolean("liblava", "triple_buffering"),
         )
 
+        self.warmup_detection = WarmupDetection(
+            config.getboolean("warmup detection", "enabled", fallback=False),
+            config.getfloat("warmup detection", "max_fraction", fallback=0.5),
+        )
+
+        matrix_apis = Config.str_to_int_array(config.get("matrix", "api", fallback="[]"))
+
+        self.matrix = Matrix(
+            config.getboolean("matrix", "enabled", fallback=False),
+            [apis[api] for api in matrix_apis],
+            Config.str_to_resolution_array(config.get("matrix", "resolution", fallback="[]")),
+            Config.str_to_int_array(config.get("matrix", "fps_cap", fallback="[]")),
+            Config.str_to_bool_array(config.get("matrix", "triple_buffering", fallback="[]")),
+            Config.str_to_bool_array(config.get("matrix", "sync_driver_affinity", fallback="[]")),
+        )
+
     def validate_config(self):
         errors = 0
 
-        if self.settings.cache_duration < 0 or self.settings.benchmark_duration <= 0:
+        if (
+            self.settings.cache_duration < 0
+            or self.settings.benchmark_duration <= 0
+            or self.settings.live_stats_interval < 0
+        ):
             LOG_CONFIG.error("invalid durations specified")
             errors += 1
 
@@ -104,10 +200,59 @@ class Config:
             LOG_CONFIG.error("invalid MSI Afterburner path specified")
             errors += 1
 
+        if self.adaptive_duration.enabled:
+            if not 0 <= self.adaptive_duration.min_duration <= self.settings.benchmark_duration:
+                LOG_CONFIG.error("invalid adaptive duration min_duration specified")
+                errors += 1
+
+            if not 0 < self.adaptive_duration.tolerance < 1:
+                LOG_CONFIG.error("invalid adaptive duration tolerance specified")
+                errors += 1
+
+            if not self.adaptive_duration.metrics:
+                LOG_CONFIG.error("no adaptive duration metrics specified")
+                errors += 1
+
+            for metric in self.adaptive_duration.metrics:
+                if metric not in framerate.METRICS:
+                    LOG_CONFIG.error("invalid adaptive duration metric specified: %s", metric)
+                    errors += 1
+
+        if self.scheduler.policy == SchedulerPolicy.SUCCESSIVE_HALVING:
+            if not 0 < self.scheduler.round_duration < self.settings.benchmark_duration:
+                LOG_CONFIG.error("invalid scheduler round_duration specified")
+                errors += 1
+
+            if self.scheduler.finalists < 1:
+                LOG_CONFIG.error("invalid scheduler finalists specified")
+                errors += 1
+
+        if self.scheduler.metric not in framerate.METRICS:
+            LOG_CONFIG.error("invalid scheduler metric specified")
+            errors += 1
+
+        if self.affinity_search.topology and not os.path.exists(self.affinity_search.topology):
+            LOG_CONFIG.error("invalid affinity search topology path specified")
+            errors += 1
+
         if self.settings.api not in Api:
             LOG_CONFIG.error("invalid api specified")
             errors += 1
 
+        if not 0 < self.warmup_detection.max_fraction < 1:
+            LOG_CONFIG.error("invalid warmup detection max_fraction specified")
+            errors += 1
+
+        if self.matrix.enabled:
+            # every variant of a cpu is benchmarked for the full duration, there are no rounds to eliminate cpus in
+            if self.scheduler.policy != SchedulerPolicy.LINEAR:
+                LOG_CONFIG.error("matrix mode requires the linear scheduler policy")
+                errors += 1
+
+            if any(x <= 0 or y <= 0 for x, y in self.matrix.resolution) or any(cap < 0 for cap in self.matrix.fps_cap):
+                LOG_CONFIG.error("invalid matrix resolution or fps_cap specified")
+                errors += 1
+
         return 1 if errors else 0
 
     @staticmethod
@@ -130,3 +275,28 @@ class Config:
                 parsed_list.append(int(item))
 
         return parsed_list
+
+    @staticmethod
+    def str_to_str_array(str_array: str) -> list[str]:
+        # return if empty
+        if str_array == "[]":
+            return []
+
+        return [x.strip() for x in str_array[1:-1].split(",")]
+
+    @staticmethod
+    def str_to_bool_array(str_array: str) -> list[bool]:
+        booleans = {"true": True, "1": True, "false": False, "0": False}
+
+        return [booleans[x.lower()] for x in Config.str_to_str_array(str_array)]
+
+    @staticmethod
+    def str_to_resolution_array(str_array: str) -> list[tuple[int, int]]:
+        # e.g. [640x480, 1920x1080]
+        resolutions: list[tuple[int, int]] = []
+
+        for item in Config.str_to_str_array(str_array):
+            x_resolution, y_resolution = item.lower().split("x")
+            resolutions.append((int(x_resolution), int(y_resolution)))
+
+        return resolutions
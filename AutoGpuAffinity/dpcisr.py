@@ -0,0 +1,127 @@
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+# e.g. "Total = 2431 for module ntoskrnl.exe"
+MODULE_PATTERN = re.compile(r"Total\s*=\s*(\d+)\s+for\s+module\s+(.+?)\s*$")
+# e.g. "Elapsed Time, >        1 usecs AND <=        2 usecs,       512, or  21.06%"
+BUCKET_PATTERN = re.compile(r"Elapsed Time,\s*>\s*(\d+)\s*usecs\s+AND\s+<=\s*(\d+)\s*usecs,\s*(\d+)")
+# e.g. "DPC Info", the headings of the histograms of all cpus switch between the dpc and isr histograms
+SECTION_PATTERN = re.compile(r"(DPC|ISR) Info")
+# e.g. "DPC Info for CPU 0" or "Distribution of number of DPCs/ISRs per 1 msec interval", these would count the same
+# executions again or are not latencies
+OTHER_SECTION_PATTERN = re.compile(r".*\b(CPU\s*\d+|interval|Distribution)\b.*", re.IGNORECASE)
+
+# percentile of the latency distribution shown in the results
+LATENCY_PERCENTILE = 99
+
+# keys of the results computed for each cpu, lower is better
+METRICS = tuple(
+    f"{kind}_{metric}" for kind in ("dpc", "isr") for metric in ("maximum", f"percentile{LATENCY_PERCENTILE}")
+)
+
+
+@dataclass
+class Histogram:
+    # number of executions keyed by the upper bound of each bucket in usecs
+    buckets: dict[int, int] = field(default_factory=dict)
+
+    def add(self, upper: int, count: int) -> None:
+        self.buckets[upper] = self.buckets.get(upper, 0) + count
+
+    def merge(self, other: "Histogram") -> None:
+        for upper, count in other.buckets.items():
+            self.add(upper, count)
+
+    def count(self) -> int:
+        return sum(self.buckets.values())
+
+    def maximum(self) -> int:
+        """Upper bound of the slowest bucket that has been hit, 0 if the histogram is empty."""
+        return max((upper for upper, count in self.buckets.items() if count > 0), default=0)
+
+    def percentile(self, value: float) -> int:
+        """Upper bound of the bucket that contains the given percentile, 0 if the histogram is empty."""
+        threshold = self.count() * value / 100
+        cumulative = 0
+
+        for upper in sorted(self.buckets):
+            cumulative += self.buckets[upper]
+
+            if cumulative >= threshold and cumulative > 0:
+                return upper
+
+        return 0
+
+
+@dataclass
+class Report:
+    # histograms of each module, e.g. "dxgkrnl.sys"
+    dpc: dict[str, Histogram] = field(default_factory=dict)
+    isr: dict[str, Histogram] = field(default_factory=dict)
+
+    def total(self, kind: str) -> Histogram:
+        total = Histogram()
+
+        for histogram in getattr(self, kind).values():
+            total.merge(histogram)
+
+        return total
+
+
+def parse_report(lines: Iterable[str]) -> Report:
+    """
+    Parses the output of xperf -a dpcisr line by line. Only the histograms of the DPC Info and ISR Info sections are
+    read, the per-cpu sections and interval distributions that follow them are skipped.
+    """
+    report = Report()
+    section: dict[str, Histogram] | None = None
+    histogram: Histogram | None = None
+
+    for line in lines:
+        # headings are surrounded by separators
+        line = line.strip(" \t\r\n-=")
+
+        if not line:
+            continue
+
+        # most lines are buckets so check for them first
+        if line.startswith("Elapsed Time"):
+            if histogram is not None and (match := BUCKET_PATTERN.match(line)) is not None:
+                histogram.add(int(match.group(2)), int(match.group(3)))
+        elif line.startswith("Total"):
+            # a module is only listed once per section, it is not counted twice if it is repeated
+            if (
+                section is not None
+                and (match := MODULE_PATTERN.match(line)) is not None
+                and match.group(2) not in section
+            ):
+                histogram = section[match.group(2)] = Histogram()
+            else:
+                # the summary line at the end of a module
+                histogram = None
+        elif (match := SECTION_PATTERN.fullmatch(line)) is not None:
+            section = report.dpc if match.group(1) == "DPC" else report.isr
+            histogram = None
+        elif OTHER_SECTION_PATTERN.fullmatch(line) is not None:
+            section = histogram = None
+        else:
+            histogram = None
+
+    return report
+
+
+def read_report(report_path: str) -> Report:
+    with open(report_path, encoding="utf-8", errors="replace") as file:
+        return parse_report(file)
+
+
+def summarize(report: Report) -> dict[str, float]:
+    results: dict[str, float] = {}
+
+    for kind in ("dpc", "isr"):
+        total = report.total(kind)
+        results[f"{kind}_maximum"] = total.maximum()
+        results[f"{kind}_percentile{LATENCY_PERCENTILE}"] = total.percentile(LATENCY_PERCENTILE)
+
+    return results
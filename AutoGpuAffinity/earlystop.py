@@ -0,0 +1,122 @@
+import math
+import re
+from collections.abc import Sequence
+
+import framerate
+import numpy as np
+import numpy.typing as npt
+import warmup
+
+# metric names match the keys of the results in display_results (e.g. average, stdev, lows1, percentile0.1)
+METRIC_PATTERN = re.compile(r"(maximum|average|minimum|stdev)|(percentile|lows)(\d+(?:\.\d+)?)")
+
+# resamples of each convergence check, only the width of the intervals is compared with the tolerance
+BOOTSTRAP_RESAMPLES = 200
+
+# frames needed before the intervals are computed, the 1% metrics are meaningless with fewer
+MIN_FRAMES = 100
+
+
+def parse_metric(metric: str) -> tuple[str, float | None]:
+    if (match := METRIC_PATTERN.fullmatch(metric)) is None:
+        msg = f"invalid metric: {metric}"
+        raise ValueError(msg)
+
+    if match.group(1) is not None:
+        return match.group(1), None
+
+    return match.group(2), float(match.group(3))
+
+
+def metric_value(fps: framerate.Fps, metric: str) -> float:
+    name, value = parse_metric(metric)
+    return getattr(fps, name)() if value is None else getattr(fps, name)(value)
+
+
+class ConvergenceMonitor:
+    """
+    Decides when a capture can stop because the chosen metrics have converged.
+
+    The metrics are computed over every frame captured so far, excluding the warm-up if it is detected, and the capture
+    has converged once the bootstrap confidence interval of each metric is narrower than the relative tolerance. These
+    are the same estimates that the results are ranked by. Elapsed time is derived from the frametimes themselves so
+    the decision can be replayed from recorded data.
+    """
+
+    def __init__(
+        self,
+        metrics: Sequence[str],
+        tolerance: float,
+        min_duration: float,
+        max_duration: float,
+        warmup_max_fraction: float | None = None,
+        confidence: float = 0.95,
+        resamples: int = BOOTSTRAP_RESAMPLES,
+    ) -> None:
+        for metric in metrics:
+            # the bootstrap only computes the intervals of the metrics shown in the results
+            if metric not in framerate.METRICS:
+                msg = f"invalid metric: {metric}"
+                raise ValueError(msg)
+
+        self.metrics = tuple(metrics)
+        self.tolerance = tolerance
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        # None if warm-up detection is disabled
+        self.warmup_max_fraction = warmup_max_fraction
+        self.confidence = confidence
+        self.resamples = resamples
+
+        self.elapsed_ms = 0.0
+        self.chunks: list[npt.NDArray[np.float64]] = []
+
+    def add(self, frametimes: npt.NDArray[np.floating]) -> None:
+        frametimes = np.asarray(frametimes, dtype=np.float64)
+        self.elapsed_ms += float(np.sum(frametimes))
+        self.chunks.append(frametimes)
+
+    @property
+    def elapsed(self) -> float:
+        return self.elapsed_ms / 1000
+
+    @property
+    def timed_out(self) -> bool:
+        return self.elapsed >= self.max_duration
+
+    def steady_frametimes(self) -> npt.NDArray[np.float64]:
+        """Frametimes captured so far excluding the warm-up, which is excluded from the results as well."""
+        frametimes = np.concatenate(self.chunks) if self.chunks else np.empty(0, dtype=np.float64)
+        # the warm-up is detected again on every check as the steady state is only known in hindsight
+        self.chunks = [frametimes]
+
+        if self.warmup_max_fraction is None:
+            return frametimes
+
+        return frametimes[warmup.detect_warmup(frametimes, self.warmup_max_fraction) :]
+
+    def intervals(self) -> dict[str, tuple[float, float]]:
+        """Value and confidence interval half-width of each metric over the steady-state frames."""
+        frametimes = self.steady_frametimes()
+
+        if frametimes.size < MIN_FRAMES:
+            return {metric: (0.0, math.inf) for metric in self.metrics}
+
+        fps = framerate.Fps(frametimes)
+        bounds = fps.bootstrap(self.resamples, self.confidence)
+
+        return {
+            metric: (metric_value(fps, metric), (bounds[metric][1] - bounds[metric][0]) / 2) for metric in self.metrics
+        }
+
+    def converged(self) -> bool:
+        return all(half_width <= self.tolerance * abs(value) for value, half_width in self.intervals().values())
+
+    def should_stop(self) -> bool:
+        if self.timed_out:
+            return True
+
+        if self.elapsed < self.min_duration:
+            return False
+
+        return self.converged()
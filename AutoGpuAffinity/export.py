@@ -0,0 +1,97 @@
+import logging
+import os
+from collections.abc import Iterator, Sequence
+
+import framestore
+import numpy as np
+import numpy.typing as npt
+import presentmon
+import resultsdb
+
+LOG_EXPORT = logging.getLogger("EXPORT")
+
+EXPORT_DIRECTORY = os.path.join("captures", "export")
+
+# frames of each cpu are written to <export directory>/<session>/FRAMES_DIRECTORY/CPU-<label>.npz
+FRAMES_DIRECTORY = "frames"
+
+# position of each frame within its capture
+FRAME_COLUMN = "frame"
+
+
+def capture_columns(capture_path: str) -> dict[str, npt.NDArray]:
+    if os.path.splitext(capture_path)[1].lower() == ".csv":
+        # durations are stored as single precision like the binary frametime files which halves the size before
+        # compression, timestamps keep double precision as they grow with the length of the capture
+        columns = {
+            column: values if column == presentmon.TIME_COLUMN else values.astype(framestore.FRAMETIME_DTYPE)
+            for column, values in presentmon.read_timing_columns(capture_path).items()
+        }
+    else:
+        # the csv was not kept, only the frametimes are available. the warm-up is kept in the header and not trimmed
+        columns = {presentmon.FRAMETIME_COLUMN: np.asarray(framestore.load_capture(capture_path)[0])}
+
+    frame_count = len(columns[presentmon.FRAMETIME_COLUMN])
+
+    return {FRAME_COLUMN: np.arange(frame_count, dtype=np.uint32), **columns}
+
+
+def export_session(csv_directory: str, export_directory: str = EXPORT_DIRECTORY) -> str:
+    """
+    Exports the frames of every cpu in the csv directory to compressed columnar files partitioned by session and cpu,
+    the exported frames directory can be passed to --analyze. Returns the path of the frames directory.
+    """
+    session_directory = os.path.dirname(os.path.abspath(os.path.normpath(csv_directory)))
+    session_name = os.path.basename(session_directory)
+
+    # matrix variants are subdirectories of the session and only named by their settings, the session is part of the
+    # name so that the same variant of another session is not overwritten (e.g. AutoGpuAffinity-<time>_fps_cap-144)
+    if resultsdb.parse_session_name(parent_directory := os.path.dirname(session_directory)) is not None:
+        session_name = f"{os.path.basename(parent_directory)}_{session_name}"
+
+    frames_directory = os.path.join(export_directory, session_name, FRAMES_DIRECTORY)
+    os.makedirs(frames_directory, exist_ok=True)
+
+    # csv files have every timing column, the binary frametime files are only used if the csv was not kept
+    captures = framestore.find_captures(csv_directory, ("csv", "bin"))
+    headers = framestore.find_captures(csv_directory, ("bin",))
+
+    for label, capture_file in captures.items():
+        if label in headers:
+            header = framestore.read_header(os.path.join(csv_directory, headers[label]))
+        else:
+            header = framestore.Header("", "", 0, 0)
+
+        framestore.write_columns(
+            os.path.join(frames_directory, f"CPU-{label}.npz"),
+            capture_columns(os.path.join(csv_directory, capture_file)),
+            header,
+        )
+
+        LOG_EXPORT.info("exported %s", capture_file)
+
+    return frames_directory
+
+
+def scan(
+    export_directory: str = EXPORT_DIRECTORY,
+    columns: Sequence[str] = (presentmon.FRAMETIME_COLUMN,),
+) -> Iterator[tuple[str, str, dict[str, npt.NDArray]]]:
+    """
+    Yields the session, cpu label and requested columns of every exported capture, only the requested columns are
+    decompressed. Captures without all of the columns (e.g. exported without the csv) are skipped.
+    """
+    for session_name in sorted(os.listdir(export_directory)):
+        frames_directory = os.path.join(export_directory, session_name, FRAMES_DIRECTORY)
+
+        if not os.path.isdir(frames_directory):
+            continue
+
+        for label, file in framestore.find_captures(frames_directory, ("npz",)).items():
+            try:
+                capture_columns = framestore.read_columns(os.path.join(frames_directory, file), columns)
+            except ValueError as e:
+                LOG_EXPORT.debug("skipping %s: %s", file, e)
+                continue
+
+            yield session_name, label, capture_columns
@@ -1,36 +1,150 @@
-import math
+from collections.abc import Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+# values of the percentile and lows metrics shown in the results
+METRIC_VALUES = (1, 0.1, 0.01, 0.005)
+
+# keys of the results computed for each cpu (e.g. "percentile1", "lows0.1")
+METRICS = (
+    "maximum",
+    "average",
+    "minimum",
+    "stdev",
+    *(f"{metric}{value}" for metric in ("percentile", "lows") for value in METRIC_VALUES),
+)
+
+
+def rank_group_sizes(length: int, exact: int = 64, growth: float = 0.05) -> list[int]:
+    """
+    Sizes of consecutive groups of ranks which grow geometrically away from the slowest and fastest frames, the
+    extremes that the metrics are most sensitive to are kept as individual frames.
+    """
+    sizes: list[int] = []
+
+    for half_length in (length - length // 2, length // 2):
+        half_sizes: list[int] = []
+        position = 0
+
+        while position < half_length:
+            size = 1 if position < exact else int(position * growth)
+            half_sizes.append(min(size, half_length - position))
+            position += half_sizes[-1]
+
+        # the second half mirrors the first so that the groups shrink towards the fastest frame
+        sizes.extend(half_sizes if not sizes else half_sizes[::-1])
+
+    return sizes
 
 
 class Fps:
-    def __init__(self, frametimes: list[float]) -> None:
-        self.sorted_frametimes = sorted(frametimes, reverse=True)
+    def __init__(self, frametimes: Sequence[float] | npt.NDArray[np.floating]) -> None:
+        # descending order so that the slowest frames come first
+        self.sorted_frametimes = np.sort(np.asarray(frametimes, dtype=np.float64))[::-1]
+
+        # running total of the sorted frametimes, used to resolve every "% low" threshold at once
+        self.cumulative_frametimes = np.cumsum(self.sorted_frametimes)
 
         # cache values
-        self.total = sum(frametimes)
-        self.length = len(frametimes)
+        self.total = float(self.cumulative_frametimes[-1]) if self.sorted_frametimes.size else 0.0
+        self.length = self.sorted_frametimes.size
         self.mean = 1000 / (self.total / self.length)
 
+    def lows_many(self, values: Sequence[float]) -> list[float]:
+        thresholds = np.asarray(values, dtype=np.float64) / 100 * self.total
+
+        # index of the first frame where the running total reaches each threshold
+        indices = np.searchsorted(self.cumulative_frametimes, thresholds, side="left")
+
+        return [
+            1000 / float(self.sorted_frametimes[index]) if index < self.length else 0.0 for index in indices.tolist()
+        ]
+
     def lows(self, value: float) -> float:
-        current_total = 0.0
+        return self.lows_many((value,))[0]
 
-        for frametime in self.sorted_frametimes:
-            current_total += frametime
-            if current_total >= value / 100 * self.total:
-                return 1000 / frametime
-        return 0.0
+    def percentiles(self, values: Sequence[float]) -> list[float]:
+        indices = np.ceil(np.asarray(values, dtype=np.float64) / 100 * self.length).astype(np.int64) - 1
+        return (1000 / self.sorted_frametimes[indices]).tolist()
 
     def percentile(self, value: float) -> float:
-        return 1000 / self.sorted_frametimes[math.ceil(value / 100 * self.length) - 1]
+        return self.percentiles((value,))[0]
 
     def stdev(self) -> float:
-        squared_deviations = sum((1000 / framerate - self.mean) ** 2 for framerate in self.sorted_frametimes)
-        return math.sqrt(squared_deviations / (self.length - 1))  # bessel's correction
+        squared_deviations = float(np.sum(np.square(1000 / self.sorted_frametimes - self.mean)))
+        return float(np.sqrt(squared_deviations / (self.length - 1)))  # bessel's correction
 
     def maximum(self) -> float:
-        return 1000 / self.sorted_frametimes[-1]
+        return 1000 / float(self.sorted_frametimes[-1])
 
     def minimum(self) -> float:
-        return 1000 / self.sorted_frametimes[0]
+        return 1000 / float(self.sorted_frametimes[0])
 
     def average(self) -> float:
         return self.mean
+
+    def bootstrap(
+        self,
+        resamples: int = 1000,
+        confidence: float = 0.95,
+        seed: int = 0,
+    ) -> dict[str, tuple[float, float]]:
+        """
+        Percentile bootstrap confidence interval of every metric in METRICS.
+
+        Frames are compressed into groups of neighbouring ranks so that each resample is a multinomial draw of group
+        counts rather than of individual frames, which keeps the cost independent of the number of frames.
+        """
+        sizes = np.asarray(rank_group_sizes(self.length), dtype=np.int64)
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+        framerates = 1000 / self.sorted_frametimes
+
+        # mean frametime, framerate and squared framerate of each group
+        group_frametimes = np.add.reduceat(self.sorted_frametimes, starts) / sizes
+        group_framerates = np.add.reduceat(framerates, starts) / sizes
+        group_squared_framerates = np.add.reduceat(np.square(framerates), starts) / sizes
+
+        rng = np.random.default_rng(seed)
+        samples: dict[str, list[npt.NDArray[np.float64]]] = {metric: [] for metric in METRICS}
+
+        # resample in chunks to bound memory usage
+        for chunk_start in range(0, resamples, 256):
+            counts = rng.multinomial(self.length, sizes / self.length, size=min(256, resamples - chunk_start))
+
+            totals = counts @ group_frametimes
+            means = 1000 / (totals / self.length)
+
+            squared_deviations = (
+                counts @ group_squared_framerates - 2 * means * (counts @ group_framerates) + self.length * means**2
+            )
+
+            # first and last group present in each resample
+            present = counts > 0
+            slowest = np.argmax(present, axis=1)
+            fastest = present.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+
+            samples["maximum"].append(1000 / group_frametimes[fastest])
+            samples["average"].append(means)
+            samples["minimum"].append(1000 / group_frametimes[slowest])
+            samples["stdev"].append(np.sqrt(np.maximum(squared_deviations, 0) / (self.length - 1)))
+
+            cumulative_counts = np.cumsum(counts, axis=1)
+            cumulative_frametimes = np.cumsum(counts * group_frametimes, axis=1)
+
+            for value in METRIC_VALUES:
+                # group containing the frame at the percentile rank and the group reaching the "% low" threshold
+                ranks = np.ceil(value / 100 * self.length)
+                percentile_groups = np.sum(cumulative_counts < ranks, axis=1)
+                low_groups = np.sum(cumulative_frametimes < (value / 100 * totals)[:, None], axis=1)
+
+                samples[f"percentile{value}"].append(1000 / group_frametimes[percentile_groups])
+                samples[f"lows{value}"].append(1000 / group_frametimes[np.minimum(low_groups, sizes.size - 1)])
+
+        alpha = (1 - confidence) / 2
+
+        return {
+            metric: tuple(np.quantile(np.concatenate(metric_samples), (alpha, 1 - alpha)).tolist())
+            for metric, metric_samples in samples.items()
+        }
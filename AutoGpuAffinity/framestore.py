@@ -0,0 +1,165 @@
+import os
+import re
+import struct
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+import presentmon
+
+MAGIC = b"AGAF"
+FORMAT_VERSION = 2
+
+# version 1 files are read as having no warm-up, their padding is zero
+SUPPORTED_VERSIONS = (1, 2)
+
+# magic, format version, reserved, benchmark duration, frame count, presentmon version, subject, warm-up frame count
+HEADER = struct.Struct("<4sHHIQ16s24sI")
+
+FRAMETIME_DTYPE = np.dtype("<f4")
+
+# e.g. CPU-3.bin or CPU-0,1.csv, captures are labeled with the cpus of their affinity mask
+CAPTURE_PATTERN = re.compile(r"CPU-(\d+(?:,\d+)*)\.(bin|npz|csv)")
+
+# member of a columnar file that holds the packed header, the remaining members are columns
+HEADER_MEMBER = "header"
+
+
+@dataclass
+class Header:
+    presentmon_version: str
+    subject: str
+    duration: int
+    frame_count: int
+    # frames at the start of the capture that are excluded from the results
+    warmup_frames: int = 0
+
+
+def write_frametimes(path: str, frametimes: npt.NDArray[np.floating], header: Header) -> None:
+    with open(path, "wb") as file:
+        file.write(pack_header(header, len(frametimes)))
+        file.write(np.asarray(frametimes, dtype=FRAMETIME_DTYPE).tobytes())
+
+
+def pack_header(header: Header, frame_count: int) -> bytes:
+    return HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        0,
+        header.duration,
+        frame_count,
+        header.presentmon_version.encode("ascii"),
+        header.subject.encode("ascii"),
+        header.warmup_frames,
+    )
+
+
+def read_header(path: str) -> Header:
+    if os.path.splitext(path)[1].lower() == ".npz":
+        with np.load(path) as columns:
+            raw_header = columns[HEADER_MEMBER].tobytes()
+    else:
+        with open(path, "rb") as file:
+            raw_header = file.read(HEADER.size)
+
+    if len(raw_header) != HEADER.size:
+        msg = f"truncated frametime file: {path}"
+        raise ValueError(msg)
+
+    magic, version, _, duration, frame_count, presentmon_version, subject, warmup_frames = HEADER.unpack(raw_header)
+
+    if magic != MAGIC or version not in SUPPORTED_VERSIONS:
+        msg = f"unsupported frametime file: {path}"
+        raise ValueError(msg)
+
+    return Header(
+        presentmon_version.rstrip(b"\x00").decode("ascii"),
+        subject.rstrip(b"\x00").decode("ascii"),
+        duration,
+        frame_count,
+        warmup_frames,
+    )
+
+
+def validate_file(path: str) -> None:
+    """Raises ValueError if the frametime file is unreadable or was not completely written (e.g. after a crash)."""
+    header = read_header(path)
+
+    if os.path.getsize(path) != HEADER.size + header.frame_count * FRAMETIME_DTYPE.itemsize:
+        msg = f"truncated frametime file: {path}"
+        raise ValueError(msg)
+
+
+def read_frametimes(path: str) -> npt.NDArray[np.float32]:
+    header = read_header(path)
+
+    if header.frame_count == 0:
+        return np.empty(0, dtype=FRAMETIME_DTYPE)
+
+    # maps the file rather than reading it, pages are only loaded as they are accessed
+    return np.memmap(path, dtype=FRAMETIME_DTYPE, mode="r", offset=HEADER.size, shape=(header.frame_count,))
+
+
+def write_columns(path: str, columns: dict[str, npt.NDArray], header: Header) -> None:
+    """
+    Writes the columns of a capture to a compressed columnar file (.npz). Each column is a separately compressed
+    member, so reading a single column only decompresses that column.
+    """
+    frame_count = len(next(iter(columns.values()))) if columns else 0
+    raw_header = np.frombuffer(pack_header(header, frame_count), dtype=np.uint8)
+
+    np.savez_compressed(path, **{HEADER_MEMBER: raw_header}, **columns)
+
+
+def read_columns(path: str, names: Sequence[str] | None = None) -> dict[str, npt.NDArray]:
+    """Reads the given columns (default: all) of a columnar file, raises ValueError if a column is missing."""
+    with np.load(path) as columns:
+        available = [name for name in columns.files if name != HEADER_MEMBER]
+
+        if names is None:
+            names = available
+
+        if missing := [name for name in names if name not in available]:
+            msg = f"columns {', '.join(missing)} not found in {path}"
+            raise ValueError(msg)
+
+        return {name: columns[name] for name in names}
+
+
+def find_captures(directory: str, preference: Sequence[str] = ("bin", "npz", "csv")) -> dict[str, str]:
+    """File of each capture in the directory keyed by its label, the first extension in the preference is used."""
+    # rank of the extension of each capture file found so far
+    captures: dict[str, tuple[int, str]] = {}
+
+    for file in os.listdir(directory):
+        if (match := CAPTURE_PATTERN.fullmatch(file)) is None or match.group(2) not in preference:
+            continue
+
+        label, rank = match.group(1), preference.index(match.group(2))
+
+        if label not in captures or rank < captures[label][0]:
+            captures[label] = (rank, file)
+
+    return {label: file for label, (_, file) in captures.items()}
+
+
+def load_capture(path: str) -> tuple[npt.NDArray[np.floating], int]:
+    """Every frametime of a capture and the number of warm-up frames at its start, csv files have no warm-up."""
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".bin":
+        return read_frametimes(path), read_header(path).warmup_frames
+
+    if extension == ".npz":
+        frametimes = read_columns(path, (presentmon.FRAMETIME_COLUMN,))[presentmon.FRAMETIME_COLUMN]
+        return frametimes, read_header(path).warmup_frames
+
+    return presentmon.read_frametimes(path), 0
+
+
+def load_frametimes(path: str) -> npt.NDArray[np.floating]:
+    """Frametimes of a capture excluding the warm-up."""
+    frametimes, warmup_frames = load_capture(path)
+
+    return frametimes[warmup_frames:]
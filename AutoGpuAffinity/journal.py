@@ -0,0 +1,119 @@
+import dataclasses
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from enum import Enum
+
+from config import Config
+
+JOURNAL_FILE = "session.json"
+JOURNAL_VERSION = 1
+
+
+@dataclass
+class Entry:
+    mask: int
+    duration: int
+    # None until the capture has been analyzed, such entries are captured again when resuming
+    score: float | None = None
+    # paths relative to the session directory
+    artifacts: list[str] = field(default_factory=list)
+
+
+def config_snapshot(cfg: Config) -> dict:
+    """Settings that the captures of a session depend on as json-compatible values."""
+    sections = {name: asdict(section) for name, section in vars(cfg).items() if dataclasses.is_dataclass(section)}
+
+    # prompts, live statistics and killing stray processes do not affect the captures
+    sections["settings"].pop("skip_confirmation", None)
+    sections["settings"].pop("live_stats_interval", None)
+    sections["settings"].pop("kill_stray_processes", None)
+
+    return json.loads(
+        json.dumps(sections, default=lambda value: value.name if isinstance(value, Enum) else str(value)),
+    )
+
+
+def config_hash(cfg: Config, masks: list[int]) -> str:
+    """Hash of everything that the captures of a session depend on, a session can only be resumed if it matches."""
+    data = json.dumps({"config": config_snapshot(cfg), "masks": masks}, sort_keys=True)
+
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class Journal:
+    """Measurements completed in a session, in the order that they were scheduled."""
+
+    def __init__(
+        self,
+        directory: str,
+        session_hash: str,
+        entries: list[Entry] | None = None,
+        config: dict | None = None,
+    ) -> None:
+        self.path = os.path.join(directory, JOURNAL_FILE)
+        self.session_hash = session_hash
+        self.entries = entries or []
+        # snapshot of the config for the results database
+        self.config = config
+        # entries are completed by the background post-processing
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def load(directory: str) -> "Journal":
+        with open(os.path.join(directory, JOURNAL_FILE), encoding="utf-8") as file:
+            journal = json.load(file)
+
+        if journal.get("version") != JOURNAL_VERSION:
+            msg = f"unsupported session journal in {directory}"
+            raise ValueError(msg)
+
+        return Journal(
+            directory,
+            journal["config_hash"],
+            [Entry(**entry) for entry in journal["entries"]],
+            journal.get("config"),
+        )
+
+    def completed(self) -> int:
+        """Number of leading entries which are complete, only these can be skipped when resuming."""
+        for index, entry in enumerate(self.entries):
+            if entry.score is None:
+                return index
+
+        return len(self.entries)
+
+    def append(self, entry: Entry) -> None:
+        with self.lock:
+            self.entries.append(entry)
+            self.save()
+
+    def complete(self, entry: Entry, score: float) -> None:
+        with self.lock:
+            entry.score = score
+            self.save()
+
+    def truncate(self, length: int) -> None:
+        with self.lock:
+            del self.entries[length:]
+            self.save()
+
+    def save(self) -> None:
+        temp_path = f"{self.path}.tmp"
+
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "version": JOURNAL_VERSION,
+                    "config_hash": self.session_hash,
+                    "config": self.config,
+                    "entries": [asdict(entry) for entry in self.entries],
+                },
+                file,
+                indent=2,
+            )
+
+        # the journal is never left partially written if the session is interrupted
+        os.replace(temp_path, self.path)
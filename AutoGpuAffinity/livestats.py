@@ -0,0 +1,57 @@
+import os
+import warnings
+
+import numpy as np
+import numpy.typing as npt
+import presentmon
+
+
+class CsvTail:
+    """Reads frametimes from a PresentMon csv log while it is still being written."""
+
+    def __init__(self, csv_path: str) -> None:
+        self.csv_path = csv_path
+        self.offset = 0
+        self.column_index: int | None = None
+        self.remainder = b""
+
+    def reset(self) -> None:
+        self.offset = 0
+        self.column_index = None
+        self.remainder = b""
+
+    def poll(self) -> npt.NDArray[np.float64]:
+        if not os.path.exists(self.csv_path):
+            return np.empty(0, dtype=np.float64)
+
+        with open(self.csv_path, "rb") as file:
+            # the log was truncated or created again, e.g. by another instance of presentmon
+            if os.fstat(file.fileno()).st_size < self.offset:
+                self.reset()
+
+            file.seek(self.offset)
+            data = self.remainder + file.read()
+            self.offset = file.tell()
+
+        # only complete lines are parsed, a partially written row is kept until the next poll
+        end = data.rfind(b"\n") + 1
+        self.remainder = data[end:]
+        lines = data[:end].decode("utf-8").splitlines()
+
+        if self.column_index is None and lines:
+            self.column_index = presentmon.find_column(lines.pop(0))
+
+        if not lines:
+            return np.empty(0, dtype=np.float64)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+
+            return np.loadtxt(
+                lines,
+                dtype=np.float64,
+                delimiter=",",
+                quotechar='"',
+                usecols=self.column_index,
+                ndmin=1,
+            )
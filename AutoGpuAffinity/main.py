@@ -1,256 +1,52 @@
 import argparse
-import csv
 import ctypes
 import datetime
 import logging
+import multiprocessing
 import os
-import shutil
-import subprocess
+import sqlite3
 import sys
 import textwrap
 import time
 import traceback
-import winreg
 from typing import NoReturn
 
+import analysis
 import consts
+import dpcisr
+import export
 import framerate
-import psutil
-import setupapi
-import wmi
-from config import Api, Config
+import journal
+import matrix
+import resultsdb
+import topology
+import tracing
 
 LOG_CLI = logging.getLogger("CLI")
 
 
-def start_afterburner(path: str, profile: int) -> None:
-    with subprocess.Popen([path, f"/Profile{profile}", "/Q"]) as process:
-        time.sleep(5)
-        process.kill()
+def supports_color() -> bool:
+    if sys.platform == "win32":
+        # virtual terminal sequences are supported since windows 10
+        return sys.getwindowsversion().major >= 10
 
-
-def set_driver_state(hwid: str, state: int) -> int:
-    device_info_handle = setupapi.SetupDiGetClassDevsW(
-        None, ctypes.c_wchar_p(hwid), None, setupapi.DIGCF_ALLCLASSES | setupapi.DIGCF_DEVICEINTERFACE
-    )
-
-    if device_info_handle == -1:
-        LOG_CLI.error(f"SetupDiGetClassDevsW failed: {ctypes.GetLastError()}")
-        return 1
-
-    dev_info_data = setupapi.SP_DEVINFO_DATA()
-    dev_info_data.cbSize = ctypes.sizeof(setupapi.SP_DEVINFO_DATA)
-
-    if not setupapi.SetupDiEnumDeviceInfo(device_info_handle, 0, ctypes.byref(dev_info_data)):
-        LOG_CLI.error(f"SetupDiEnumDeviceInfo failed: {ctypes.GetLastError()}")
-        return 1
-
-    params = setupapi.SP_PROPCHANGE_PARAMS()
-
-    params.ClassInstallHeader.cbSize = ctypes.sizeof(params.ClassInstallHeader)
-    params.ClassInstallHeader.InstallFunction = setupapi.DIF_PROPERTYCHANGE
-    params.StateChange = state
-    params.Scope = setupapi.DICS_FLAG_GLOBAL
-    params.HwProfile = 0
-
-    if not setupapi.SetupDiSetClassInstallParamsA(
-        device_info_handle,
-        ctypes.byref(dev_info_data),
-        ctypes.byref(params.ClassInstallHeader),
-        ctypes.sizeof(params),
-    ):
-        LOG_CLI.error(f"SetupDiSetClassInstallParamsA failed: {ctypes.GetLastError()}")
-        return 1
-
-    if not setupapi.SetupDiCallClassInstaller(
-        setupapi.DIF_PROPERTYCHANGE, device_info_handle, ctypes.byref(dev_info_data)
-    ):
-        LOG_CLI.error(f"SetupDiCallClassInstaller failed: {ctypes.GetLastError()}")
-        return 1
-
-    return 0
-
-
-def restart_driver(hwid: str) -> int:
-    if set_driver_state(hwid, setupapi.DICS_DISABLE) != 0:
-        LOG_CLI.error("failed to disable driver while restarting")
-        return 1
-
-    time.sleep(2)
-
-    if set_driver_state(hwid, setupapi.DICS_ENABLE) != 0:
-        LOG_CLI.error("failed to enable driver while restarting")
-        return 1
-
-    time.sleep(2)
-
-    return 0
+    return sys.stdout.isatty()
 
 
-def apply_affinity(hwids: list[str], cpu: int = -1, apply: bool = True) -> int:
-    for hwid in hwids:
-        policy_path = f"SYSTEM\\ControlSet001\\Enum\\{hwid}\\Device Parameters\\Interrupt Management\\Affinity Policy"
+def resolve_path(path: str, invocation_dir: str) -> str:
+    """
+    Resolves a path passed on the command line, relative paths are looked up in the directory the program was
+    started from before the program directory. Windows separators are accepted on other platforms.
+    """
+    if os.sep != "\\":
+        path = path.replace("\\", os.sep)
 
-        if apply and cpu > -1:
-            mask = 1 << cpu
-            le_hex = mask.to_bytes(8, "little").rstrip(b"\x00")
+    path = os.path.normpath(path)
 
-            with winreg.CreateKey(winreg.HKEY_LOCAL_MACHINE, policy_path) as key:
-                winreg.SetValueEx(key, "DevicePolicy", 0, winreg.REG_DWORD, 4)
-                winreg.SetValueEx(
-                    key,
-                    "AssignmentSetOverride",
-                    0,
-                    winreg.REG_BINARY,
-                    le_hex,
-                )
-
-        else:
-            try:
-                with winreg.OpenKey(
-                    winreg.HKEY_LOCAL_MACHINE,
-                    policy_path,
-                    0,
-                    winreg.KEY_SET_VALUE | winreg.KEY_WOW64_64KEY,
-                ) as key:
-                    winreg.DeleteValue(key, "DevicePolicy")
-                    winreg.DeleteValue(key, "AssignmentSetOverride")
-            except FileNotFoundError:
-                LOG_CLI.debug("affinity policy has already been removed for %s", hwid)
-
-        if restart_driver(hwid) != 0:
-            LOG_CLI.error("failed to restart driver")
-            return 1
-
-    return 0
-
-
-def print_table(formatted_results: dict[str, dict[str, str]]):
-    # print table headings
-    print(f"{'CPU':<5}", end="")
-
-    for metric in (
-        "Max",
-        "Avg",
-        "Min",
-        "STDEV",
-        "1 %ile",
-        "0.1 %ile",
-        "0.01 %ile",
-        "0.005 %ile",
-        "1% Low",
-        "0.1% Low",
-        "0.01% Low",
-        "0.005% Low",
-    ):
-        print(f"{metric:<12}", end="")
-
-    print()  # new line
-
-    # print values for each heading
-    for _cpu, _results in formatted_results.items():
-        print(f"{_cpu:<5}", end="")
-        for metric_value in _results.values():
-            # padding needs to be larger to compensate for color chars
-            right_padding = 21 if "[" in metric_value else 12
-            print(f"{metric_value:<{right_padding}}", end="")
-
-        print()  # new line
+    if not os.path.isabs(path) and os.path.exists(invoked_path := os.path.join(invocation_dir, path)):
+        return invoked_path
 
-    print()  # new line
-
-
-def display_results(csv_directory: str, enable_color: bool) -> None:
-    results: dict[str, dict[str, float]] = {}
-
-    # each index represents the rank (e.g. index 0 is 1st)
-    colors: list[str] = [
-        "\x1b[92m",  # Green
-        "\x1b[93m",  # Yellow
-    ]
-
-    if enable_color:
-        default = "\x1b[0m"
-        os.system("color")
-    else:
-        default = ""
-
-    cpus = sorted([int(file.strip("CPU-.csv")) for file in os.listdir(csv_directory)])
-    num_cpus = len(cpus)
-    # 1 CPUs means no ranking will be done
-    # 2 CPUs means only one metric will be ranked since it can be either or
-    # always leave last place unranked
-
-    top_n_values = num_cpus - 1 if num_cpus < 3 else len(colors)
-
-    for cpu in cpus:
-        csv_file = f"CPU-{cpu}.csv"
-
-        frametimes: list[float] = []
-
-        with open(f"{csv_directory}\\{csv_file}", encoding="utf-8") as file:
-            for row in csv.DictReader(file):
-                # convert key names to lowercase because column names changed in a newer version of PresentMon
-                row_lower = {key.lower(): value for key, value in row.items()}
-
-                if (ms_between_presents := row_lower.get("msbetweenpresents")) is not None:
-                    frametimes.append(float(ms_between_presents))
-
-        fps = framerate.Fps(frametimes)
-
-        # results of current CPU in results dict
-        results[str(cpu)] = {
-            "maximum": round(fps.maximum(), 2),
-            "average": round(fps.average(), 2),
-            "minimum": round(fps.minimum(), 2),
-            # negate positive value so that highest negative value will be the lowest absolute value
-            "stdev": round(-fps.stdev(), 2),
-            **{
-                f"{metric}{value}": round(getattr(fps, metric)(value), 2)
-                for metric in ("percentile", "lows")
-                for value in (1, 0.1, 0.01, 0.005)
-            },
-        }
-
-    formatted_results: dict[str, dict[str, str]] = {cpu: {} for cpu in results}
-
-    # analyze best values for each metric
-    for metric in (
-        "maximum",
-        "average",
-        "minimum",
-        "stdev",
-        # "percentile1", "percentile0.1" etc
-        *(tuple(f"{metric}{value}" for metric in ("percentile", "lows") for value in (1, 0.1, 0.01, 0.005))),
-    ):
-        # set of all values within the metric
-        values = {_results[metric] for _results in results.values()}
-
-        # create ordered list without duplicates of top n values
-        top_values = list(dict.fromkeys(sorted(values, reverse=True)[:top_n_values]))
-
-        for _cpu, _results in results.items():
-            metric_value = _results[metric]
-
-            # abs is for negative values such as stdev
-            # :.2f is for .00 numerical formatting
-            new_value = f"{abs(metric_value):.2f}"
-
-            # determine rank of value
-            if enable_color:
-                try:
-                    nth_best = top_values.index(metric_value)
-                    color = colors[nth_best]
-                    new_value = f"{color}{new_value}{default}"
-                except ValueError:
-                    # don't highlight value as top n by leaving it unmodified
-                    pass
-
-            formatted_results[_cpu][metric] = new_value
-
-    os.system("<nul set /p=\x1b[8;50;1000t")
-
-    print_table(formatted_results)
+    return path
 
 
 def parse_args() -> argparse.Namespace:
@@ -273,28 +69,84 @@ def parse_args() -> argparse.Namespace:
         type=str,
         help="analyze csv files from a previous benchmark",
     )
+    parser.add_argument(
+        "--resume",
+        metavar="<session directory>",
+        type=str,
+        help="resume an interrupted benchmark, cpus that have already been benchmarked are skipped",
+    )
     parser.add_argument(
         "--apply-affinity",
         metavar="<cpu>",
         type=int,
         help="assign a single core affinity to graphics drivers",
     )
+    parser.add_argument(
+        "--bootstrap-resamples",
+        metavar="<count>",
+        type=int,
+        default=1000,
+        help="number of bootstrap resamples used to only highlight statistically separated cpus, 0 disables it",
+    )
+    parser.add_argument(
+        "--export",
+        metavar="<csv directory>",
+        type=str,
+        help="export the frames of a previous benchmark to compressed columnar files in captures\\export",
+    )
+    parser.add_argument(
+        "--query",
+        metavar="<metric>",
+        type=str,
+        help="rank cpus across all analyzed sessions by a metric (e.g. lows1, average, dpc_maximum)",
+    )
+    parser.add_argument(
+        "--subject",
+        metavar="<name>",
+        type=str,
+        help="only query sessions of a subject (e.g. lava-triangle)",
+    )
+    parser.add_argument(
+        "--filter",
+        metavar="<setting=value>",
+        type=str,
+        action="append",
+        default=[],
+        help="only query sessions with a config setting (e.g. settings.sync_driver_affinity=true), can be repeated",
+    )
+    parser.add_argument(
+        "--trend",
+        action="store_true",
+        help="show the queried metric of the best cpu (or --cpu) of each session over time instead",
+    )
+    parser.add_argument(
+        "--aggregate",
+        action="store_true",
+        help="rank cpus by the queried framerate metric over the frames of all matching sessions combined instead",
+    )
+    parser.add_argument(
+        "--cpu",
+        metavar="<cpu>",
+        type=str,
+        help="cpu (or affinity mask label e.g. 0,1) to show the trend of",
+    )
+    parser.add_argument(
+        "--database",
+        metavar="<file>",
+        type=str,
+        help="results database to index --analyze into or to --query (default: results.db next to the analyzed "
+        "sessions, captures\\results.db to query)",
+    )
+    parser.add_argument(
+        "--workers",
+        metavar="<count>",
+        type=int,
+        help="number of processes used to analyze csv files (default: number of logical processors)",
+    )
 
     return parser.parse_args()
 
 
-def is_admin() -> bool:
-    return ctypes.windll.shell32.IsUserAnAdmin()
-
-
-def kill_processes(*targets: str) -> None:
-    targets_set = set(targets)
-
-    for process in psutil.process_iter():
-        if process.name().lower() in targets_set:
-            process.kill()
-
-
 def main() -> int:
     logging.basicConfig(format="[%(name)s] %(levelname)s: %(message)s", level=logging.INFO)
 
@@ -302,18 +154,96 @@ def main() -> int:
         f"AutoGpuAffinity Version {consts.VERSION} - GPLv3\nGitHub - https://github.com/valleyofdoom\n",
     )
 
-    if not is_admin():
-        LOG_CLI.error("administrator privileges required")
-        return 1
-
+    invocation_dir = os.getcwd()
     full_program_dir = os.path.dirname(sys.executable) if getattr(sys, "frozen", False) else os.path.dirname(__file__)
     os.chdir(full_program_dir)
 
     args = parse_args()
 
+    if args.workers is not None and args.workers < 1:
+        LOG_CLI.error("invalid worker count specified %d", args.workers)
+        return 1
+
+    if args.bootstrap_resamples < 0:
+        LOG_CLI.error("invalid bootstrap resample count specified %d", args.bootstrap_resamples)
+        return 1
+
+    # a database that does not exist yet is created relative to the directory the program was started from
+    database_path = os.path.join(invocation_dir, args.database) if args.database is not None else None
+
+    # the analysis commands only read files, so they run without administrator privileges or hardware discovery and
+    # on other platforms than windows
+    if args.analyze:
+        csv_directory = resolve_path(args.analyze, invocation_dir)
+
+        analysis.display_results(
+            csv_directory,
+            supports_color(),
+            args.workers,
+            args.bootstrap_resamples,
+            database_path or resultsdb.database_path(csv_directory),
+        )
+        return 0
+
+    if args.export:
+        try:
+            frames_directory = export.export_session(resolve_path(args.export, invocation_dir))
+        except (OSError, ValueError) as e:
+            LOG_CLI.error("unable to export %s: %s", args.export, e)
+            return 1
+
+        LOG_CLI.info("exported frames to %s", frames_directory)
+        return 0
+
+    if args.query:
+        if args.query not in framerate.METRICS + dpcisr.METRICS:
+            LOG_CLI.error("invalid metric specified %s", args.query)
+            return 1
+
+        if args.aggregate and (args.trend or args.query not in framerate.METRICS):
+            LOG_CLI.error("--aggregate only ranks cpus by framerate metrics")
+            return 1
+
+        database_path = database_path or resultsdb.DATABASE_FILE
+
+        try:
+            if args.aggregate:
+                resultsdb.print_aggregate(
+                    resultsdb.aggregate_cpus(database_path, args.query, args.subject, args.filter),
+                )
+            elif args.trend:
+                resultsdb.print_trend(
+                    resultsdb.trend(database_path, args.query, args.subject, args.filter, args.cpu),
+                )
+            else:
+                resultsdb.print_ranking(
+                    resultsdb.rank_cpus(database_path, args.query, args.subject, args.filter),
+                )
+        except (ValueError, sqlite3.Error) as e:
+            LOG_CLI.error("unable to query the results database: %s", e)
+            return 1
+
+        return 0
+
+    return benchmark(args, invocation_dir)
+
+
+def benchmark(args: argparse.Namespace, invocation_dir: str) -> int:
+    # imported here so that the analysis commands do not load the windows apis (winreg, wmi, setupapi) or the session
+    import scheduler
+    import session
+    from config import Api, Config, SchedulerPolicy
+    from windows_backend import WindowsBackend
+
+    backend = WindowsBackend()
+
+    if not backend.is_admin():
+        LOG_CLI.error("administrator privileges required")
+        return 1
+
     winver = sys.getwindowsversion()
 
-    hwids_gpu: list[str] = [gpu.PnPDeviceID for gpu in wmi.WMI().Win32_VideoController()]
+    hwids_gpu = backend.gpu_hwids()
 
     if not hwids_gpu:
         LOG_CLI.error("no graphics cards found")
@@ -326,21 +256,7 @@ def main() -> int:
 
     cpu_count -= 1  # adjust for zero-based indexing
 
-    if args.analyze:
-        display_results(args.analyze, winver.major >= 10)
-        return 0
-
-    bd_start = None
-    try:
-        with winreg.OpenKey(
-            winreg.HKEY_LOCAL_MACHINE,
-            "SYSTEM\\CurrentControlSet\\Services\\BasicDisplay",
-            0,
-            winreg.KEY_READ | winreg.KEY_WOW64_64KEY,
-        ) as key:
-            bd_start = winreg.QueryValueEx(key, "Start")[0]
-    except FileNotFoundError:
-        pass
+    bd_start = backend.basic_display_start_type()
 
     if bd_start is None:
         LOG_CLI.error("unable to get BasicDisplay start type")
@@ -357,7 +273,7 @@ def main() -> int:
             LOG_CLI.error("invalid affinity specified %d", args.apply_affinity)
             return 1
 
-        if apply_affinity(hwids_gpu, args.apply_affinity) != 0:
+        if backend.apply_affinity(hwids_gpu, 1 << args.apply_affinity) != 0:
             LOG_CLI.error(f"failed to apply affinity to CPU {args.apply_affinity}")
             return 1
 
@@ -365,14 +281,14 @@ def main() -> int:
         return 0
 
     presentmon_version = "1.10.0" if winver.major >= 10 and winver.product_type != 3 else "1.6.0"
-    presentmon_binary = f"PresentMon-{presentmon_version}-x64.exe"
+    presentmon_path = os.path.join("bin", "PresentMon", f"PresentMon-{presentmon_version}-x64.exe")
 
     config_path = args.config if args.config is not None else "config.ini"
 
     try:
         cfg = Config(config_path)
-    except FileNotFoundError as e:
-        LOG_CLI.exception(e)
+    except FileNotFoundError:
+        LOG_CLI.exception("config file not found")
         return 1
 
     if cfg.validate_config() != 0:
@@ -380,8 +296,8 @@ def main() -> int:
         return 1
 
     api_binpaths: dict[Api, str] = {
-        Api.LIBLAVA: "bin\\liblava\\lava-triangle.exe",
-        Api.D3D9: "bin\\D3D9-benchmark.exe",
+        Api.LIBLAVA: os.path.join("bin", "liblava", "lava-triangle.exe"),
+        Api.D3D9: os.path.join("bin", "D3D9-benchmark.exe"),
     }
 
     api_binpath = api_binpaths[cfg.settings.api]
@@ -397,14 +313,97 @@ def main() -> int:
     else:
         benchmark_cpus = list(range(cpu_count + 1))
 
-    session_directory = f"captures\\AutoGpuAffinity-{time.strftime('%d%m%y%H%M%S')}"
+    if cfg.affinity_search.enabled:
+        try:
+            if cfg.affinity_search.topology:
+                cpu_topology = topology.load_topology(cfg.affinity_search.topology)
+            else:
+                cpu_topology = backend.cpu_topology()
+        except (OSError, ValueError, KeyError) as e:
+            LOG_CLI.error("failed to read cpu topology: %s", e)
+            return 1
+
+        # candidates instead of every combination of cpus, custom_cpus limits the cpus they are built from
+        benchmark_masks = topology.candidate_masks(
+            cpu_topology.restrict(topology.cpus_to_mask(benchmark_cpus)),
+            topology.cpus_to_mask(cpu for core in cpu_topology.cores for cpu in core),
+        )
+    else:
+        benchmark_masks = [1 << cpu for cpu in benchmark_cpus]
+
+    schedulers: dict[SchedulerPolicy, scheduler.Scheduler] = {
+        SchedulerPolicy.LINEAR: scheduler.LinearScheduler(cfg.settings.benchmark_duration),
+        SchedulerPolicy.SUCCESSIVE_HALVING: scheduler.SuccessiveHalvingScheduler(
+            cfg.settings.benchmark_duration,
+            cfg.scheduler.round_duration,
+            cfg.scheduler.finalists,
+        ),
+    }
+
+    cpu_scheduler = schedulers[cfg.scheduler.policy]
+
+    if args.resume:
+        session_directory = resolve_path(args.resume, invocation_dir)
+    else:
+        session_directory = os.path.join("captures", f"AutoGpuAffinity-{time.strftime('%d%m%y%H%M%S')}")
+
+    if cfg.matrix.enabled:
+        variants = matrix.expand(cfg)
 
-    estimated_time_seconds = (
-        10
-        + cfg.settings.cache_duration
-        + cfg.settings.benchmark_duration
-        + (5 if cfg.msi_afterburner.profile > 0 else 0)
-    ) * len(benchmark_cpus)
+        try:
+            session_journals = matrix.open_journals(session_directory, cfg, variants, benchmark_masks, args.resume)
+        except ValueError as e:
+            LOG_CLI.error("unable to resume: %s", e)
+            return 1
+    else:
+        variants = [matrix.base_variant(cfg)]
+        session_hash = journal.config_hash(cfg, benchmark_masks)
+
+        if args.resume:
+            try:
+                session_journal = journal.Journal.load(session_directory)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                LOG_CLI.error("unable to read session journal: %s", e)
+                return 1
+
+            if session_journal.session_hash != session_hash:
+                LOG_CLI.error("the config has changed since the session was started, unable to resume")
+                return 1
+        else:
+            session_journal = journal.Journal(session_directory, session_hash, config=journal.config_snapshot(cfg))
+
+        session_journals = [session_journal]
+
+    cache_duration = 0 if cfg.warmup_detection.enabled else cfg.settings.cache_duration
+
+    # phases of each benchmark excluding the capture and the cache duration, the defaults are the upper bounds of the
+    # waits for the drivers, afterburner and the subject which the readiness probes usually end sooner
+    phase_defaults = {"driver restart": 5, "launch": 5, "process kill": 0}
+
+    if cfg.msi_afterburner.profile > 0:
+        phase_defaults["afterburner"] = 5
+
+    if cfg.xperf.enabled:
+        phase_defaults |= {"xperf start": 1, "xperf stop": 1}
+
+    # median duration of each phase in the previous sessions
+    phase_history, history_sessions = tracing.phase_history("captures")
+    estimated_from_history = any(phase in phase_history for phase in phase_defaults)
+
+    benchmark_overhead = cache_duration + tracing.estimate_overhead(phase_history, phase_defaults)
+
+    estimated_time_seconds = round(cpu_scheduler.estimate(len(benchmark_masks), benchmark_overhead) * len(variants))
+    linear_time_seconds = round(
+        schedulers[SchedulerPolicy.LINEAR].estimate(len(benchmark_masks), benchmark_overhead) * len(variants),
+    )
+
+    affinity_search = cfg.affinity_search.enabled and " ".join(topology.mask_label(mask) for mask in benchmark_masks)
+
+    # the variants of a cpu share a driver restart, separate sessions would restart the drivers for each of them
+    matrix_restarts = cfg.matrix.enabled and (
+        f"{matrix.restart_count(matrix.plan(benchmark_masks, variants))} driver restarts "
+        f"({matrix.separate_sessions_restart_count(benchmark_masks, variants)} as separate sessions)"
+    )
 
     estimated_time = datetime.timedelta(seconds=estimated_time_seconds)
     finish_time = datetime.datetime.now() + estimated_time
@@ -412,11 +411,19 @@ def main() -> int:
     print(
         textwrap.dedent(
             f"""        Session Directory        {session_directory}
-        Cache Duration           {cfg.settings.cache_duration}
+        Cache Duration           {cache_duration}
+        Warm-up Detection        {cfg.warmup_detection.enabled}
         Benchmark Duration       {cfg.settings.benchmark_duration}
+        Adaptive Duration        {cfg.adaptive_duration.enabled}
         Benchmark CPUs           {"All" if not cfg.settings.custom_cpus else ",".join([str(cpu) for cpu in benchmark_cpus])}
+        Affinity Search          {affinity_search}
+        Matrix Variants          {cfg.matrix.enabled and len(variants)}
+        Matrix Restarts          {matrix_restarts}
         Subject                  {os.path.splitext(api_binname)[0]}
+        Scheduler                {cfg.scheduler.policy.name.lower()}
         Estimated Time           {estimated_time}
+        Estimated From           {f"{history_sessions} previous sessions" if estimated_from_history else "defaults"}
+        Estimated Time Saved     {datetime.timedelta(seconds=max(0, linear_time_seconds - estimated_time_seconds))}
         Estimated End Time       {finish_time.strftime("%H:%M:%S")}
         Load Afterburner         {cfg.msi_afterburner.profile > 0}
         DPC/ISR Logging          {cfg.xperf.enabled}
@@ -429,149 +436,72 @@ def main() -> int:
     if not cfg.settings.skip_confirmation:
         input("press enter to start benchmarking...")
 
-    subject_args: list[str] = []
-
-    if cfg.settings.api == Api.LIBLAVA:
-        subject_args = [
-            f"--fullscreen={int(cfg.liblava.fullscreen)}",
-            f"--width={cfg.liblava.x_resolution}",
-            f"--height={cfg.liblava.y_resolution}",
-            f"--fps_cap={cfg.liblava.fps_cap}",
-            f"--triple_buffering={int(cfg.liblava.triple_buffering)}",
-        ]
+    # a single trace of every phase of the session, viewable in chrome://tracing or ui.perfetto.dev
+    tracer = tracing.Tracer(os.path.join(session_directory, tracing.TRACE_FILE))
+
+    benchmark_sessions: list[session.BenchmarkSession] = []
+
+    for variant, session_journal in zip(variants, session_journals):
+        variant_cfg = matrix.variant_config(cfg, variant) if cfg.matrix.enabled else cfg
+
+        benchmark_sessions.append(
+            session.BenchmarkSession(
+                backend,
+                variant_cfg,
+                os.path.dirname(session_journal.path),
+                hwids_gpu,
+                presentmon_path,
+                presentmon_version,
+                api_binpaths[variant_cfg.settings.api],
+                session_journal,
+                args.bootstrap_resamples,
+                tracer,
+            ),
+        )
 
-    # this will create all of the required folders
-    os.makedirs(f"{session_directory}\\CSVs", exist_ok=True)
+    session_start = time.monotonic()
 
-    # stop any existing trace sessions and processes
-    if cfg.xperf.enabled:
-        os.mkdir(f"{session_directory}\\xperf")
+    if cfg.matrix.enabled:
+        matrix_session = session.MatrixSession(session_directory, variants, benchmark_sessions)
 
-        try:
-            subprocess.run(
-                [cfg.xperf.location, "-stop"],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                check=True,
-            )
-        except subprocess.CalledProcessError as e:
-            # ignore if already stopped
-            if e.returncode != 2147946601:
-                LOG_CLI.exception(e)
-                raise
-
-    kill_processes("xperf.exe", api_binname, presentmon_binary)
-
-    for cpu in benchmark_cpus:
-        LOG_CLI.info("benchmarking CPU %d", cpu)
-
-        if apply_affinity(hwids_gpu, cpu) != 0:
-            LOG_CLI.error(f"failed to apply affinity to CPU {cpu}")
+        if matrix_session.run(benchmark_masks, cfg.settings.benchmark_duration) != 0:
             return 1
+    elif benchmark_sessions[0].run(cpu_scheduler, benchmark_masks) != 0:
+        return 1
 
-        time.sleep(5)
-
-        if (profile := cfg.msi_afterburner.profile) > 0:
-            start_afterburner(cfg.msi_afterburner.location, profile)
-
-        affinity_args: list[str] = []
-        if cfg.settings.sync_driver_affinity:
-            affinity_args.extend(["/affinity", hex(1 << cpu)])
-
-        subprocess.run(
-            ["start", "", *affinity_args, api_binpath, *subject_args],
-            shell=True,
-            check=True,
-        )
+    session_time_seconds = round(time.monotonic() - session_start)
 
-        # 5s offset to allow subject to launch
-        time.sleep(5 + cfg.settings.cache_duration)
-
-        if cfg.xperf.enabled:
-            subprocess.run(
-                [cfg.xperf.location, "-on", "base+interrupt+dpc"],
-                check=True,
-            )
-
-        subprocess.run(
-            [
-                f"bin\\PresentMon\\{presentmon_binary}",
-                "-stop_existing_session",
-                "-no_top",
-                "-timed",
-                str(cfg.settings.benchmark_duration),
-                "-process_name",
-                api_binname,
-                "-output_file",
-                f"{session_directory}\\CSVs\\CPU-{cpu}.csv",
-                "-terminate_after_timed",
-            ],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            check=True,
+    if cfg.scheduler.policy != SchedulerPolicy.LINEAR:
+        LOG_CLI.info(
+            "session took %s, saved %s compared to benchmarking every cpu for the full duration",
+            datetime.timedelta(seconds=session_time_seconds),
+            datetime.timedelta(seconds=max(0, linear_time_seconds - session_time_seconds)),
         )
 
-        if not os.path.exists(f"{session_directory}\\CSVs\\CPU-{cpu}.csv"):
-            LOG_CLI.error(
-                "csv log unsuccessful, this may be due to a missing dependency or windows component",
-            )
-            shutil.rmtree(session_directory)
-            if apply_affinity(hwids_gpu, apply=False) != 0:
-                LOG_CLI.error("failed to reset affinity")
-                return 1
-
-            return 1
+    for variant, benchmark_session in zip(variants, benchmark_sessions):
+        print()  # new line
 
-        if cfg.xperf.enabled:
-            subprocess.run(
-                [
-                    cfg.xperf.location,
-                    "-d",
-                    f"{session_directory}\\xperf\\CPU-{cpu}.etl",
-                ],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                check=True,
-            )
+        if cfg.matrix.enabled:
+            print(f"Variant: {matrix.variant_label(variant, variants)}\n")
 
-            try:
-                subprocess.run(
-                    [
-                        cfg.xperf.location,
-                        "-quiet",
-                        "-i",
-                        f"{session_directory}\\xperf\\CPU-{cpu}.etl",
-                        "-o",
-                        f"{session_directory}\\xperf\\CPU-{cpu}.txt",
-                        "-a",
-                        "dpcisr",
-                    ],
-                    check=True,
-                )
-            except subprocess.CalledProcessError:
-                LOG_CLI.error("unable to generate dpcisr report")
-                shutil.rmtree(session_directory)
-                if apply_affinity(hwids_gpu, apply=False) != 0:
-                    LOG_CLI.error("failed to reset affinity")
-                    return 1  # return 1 after anyway
-                return 1
+        analysis.display_results(
+            benchmark_session.csv_directory,
+            supports_color(),
+            args.workers,
+            args.bootstrap_resamples,
+            resultsdb.DATABASE_FILE,
+        )
 
-            if not cfg.xperf.save_etls:
-                os.remove(f"{session_directory}\\xperf\\CPU-{cpu}.etl")
+    # the results of every successful capture are displayed before the failures are reported
+    errors = [error for benchmark_session in benchmark_sessions for error in benchmark_session.errors]
 
-        kill_processes("xperf.exe", api_binname, presentmon_binary)
+    for name, error in errors:
+        LOG_CLI.error("%s failed: %s", name, error)
 
-    # cleanup
-    if apply_affinity(hwids_gpu, apply=False) != 0:
-        LOG_CLI.error("failed to reset affinity")
+    if errors:
+        LOG_CLI.error("%d post-processing task(s) failed", len(errors))
         return 1
 
-    if os.path.exists("C:\\kernel.etl"):
-        os.remove("C:\\kernel.etl")
-
-    print()  # new line
-    display_results(f"{session_directory}\\CSVs", winver.major >= 10)
-
     return 0
 
 
@@ -586,16 +516,19 @@ def _main() -> NoReturn:
         print(traceback.format_exc())
         exit_code = 1
     finally:
-        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
-        process_array = (ctypes.c_uint * 1)()
-        num_processes = kernel32.GetConsoleProcessList(process_array, 1)
-
         # only pause if script was ran by double-clicking
-        if num_processes < 3:
-            input("press enter to exit")
+        if sys.platform == "win32" and sys.stdin.isatty():
+            kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+            process_array = (ctypes.c_uint * 1)()
+            num_processes = kernel32.GetConsoleProcessList(process_array, 1)
+
+            if num_processes < 3:
+                input("press enter to exit")
 
         sys.exit(exit_code)
 
 
 if __name__ == "__main__":
+    # required for the analysis process pool in the frozen executable
+    multiprocessing.freeze_support()
     _main()
@@ -0,0 +1,161 @@
+import copy
+import itertools
+import os
+from dataclasses import dataclass
+
+import journal
+from config import Api, Config
+
+
+@dataclass(frozen=True)
+class Variant:
+    api: Api
+    x_resolution: int
+    y_resolution: int
+    fps_cap: int
+    triple_buffering: bool
+    sync_driver_affinity: bool
+
+
+def base_variant(cfg: Config) -> Variant:
+    return Variant(
+        cfg.settings.api,
+        cfg.liblava.x_resolution,
+        cfg.liblava.y_resolution,
+        cfg.liblava.fps_cap,
+        cfg.liblava.triple_buffering,
+        cfg.settings.sync_driver_affinity,
+    )
+
+
+def expand(cfg: Config) -> list[Variant]:
+    """Every combination of the matrix values, settings without values keep their configured value."""
+    base = base_variant(cfg)
+
+    combinations = itertools.product(
+        cfg.matrix.api or [base.api],
+        cfg.matrix.resolution or [(base.x_resolution, base.y_resolution)],
+        cfg.matrix.fps_cap or [base.fps_cap],
+        cfg.matrix.triple_buffering or [base.triple_buffering],
+        cfg.matrix.sync_driver_affinity or [base.sync_driver_affinity],
+    )
+
+    variants: list[Variant] = []
+
+    for api, (x_resolution, y_resolution), fps_cap, triple_buffering, sync_driver_affinity in combinations:
+        if api != Api.LIBLAVA:
+            # the liblava settings have no effect on other subjects, combinations that only differ in them are equal
+            x_resolution, y_resolution = base.x_resolution, base.y_resolution
+            fps_cap, triple_buffering = base.fps_cap, base.triple_buffering
+
+        variant = Variant(api, x_resolution, y_resolution, fps_cap, triple_buffering, sync_driver_affinity)
+
+        if variant not in variants:
+            variants.append(variant)
+
+    return variants
+
+
+def variant_label(variant: Variant, variants: list[Variant]) -> str:
+    """Name of the variant made of the settings that differ between the variants, e.g. "fps_cap-144_api-liblava"."""
+    parts: list[str] = []
+
+    for name, value in (
+        ("api", variant.api.name.lower()),
+        ("resolution", f"{variant.x_resolution}x{variant.y_resolution}"),
+        ("fps_cap", variant.fps_cap),
+        ("triple_buffering", int(variant.triple_buffering)),
+        ("sync_driver_affinity", int(variant.sync_driver_affinity)),
+    ):
+        attributes = ("x_resolution", "y_resolution") if name == "resolution" else (name,)
+
+        if len({tuple(getattr(other, attribute) for attribute in attributes) for other in variants}) > 1:
+            parts.append(f"{name}-{value}")
+
+    return "_".join(parts) or "default"
+
+
+def variant_config(cfg: Config, variant: Variant) -> Config:
+    variant_cfg = copy.deepcopy(cfg)
+
+    variant_cfg.settings.api = variant.api
+    variant_cfg.settings.sync_driver_affinity = variant.sync_driver_affinity
+    variant_cfg.liblava.x_resolution = variant.x_resolution
+    variant_cfg.liblava.y_resolution = variant.y_resolution
+    variant_cfg.liblava.fps_cap = variant.fps_cap
+    variant_cfg.liblava.triple_buffering = variant.triple_buffering
+
+    return variant_cfg
+
+
+def plan(masks: list[int], variants: list[Variant], group_by_cpu: bool = True) -> list[tuple[int, Variant]]:
+    """
+    Order in which the affinity masks and variants are benchmarked. Grouping by cpu benchmarks every variant of a cpu
+    after another, otherwise every cpu is benchmarked for a variant before the next one like separate sessions.
+    """
+    if group_by_cpu:
+        return [(mask, variant) for mask in masks for variant in variants]
+
+    return [(mask, variant) for variant in variants for mask in masks]
+
+
+def restart_count(steps: list[tuple[int, Variant]]) -> int:
+    """
+    Number of graphics driver restarts of a plan. The drivers are only restarted if the affinity changes, starting
+    from and ending with the default affinity (no policy). Separate sessions reset the affinity after each variant.
+    """
+    restarts = 0
+    current_mask: int | None = None
+
+    for mask, _ in steps:
+        if mask != current_mask:
+            restarts += 1
+            current_mask = mask
+
+    # the affinity is reset once the session has ended
+    return restarts + (current_mask is not None)
+
+
+def separate_sessions_restart_count(masks: list[int], variants: list[Variant]) -> int:
+    # each session benchmarks the cpus from the default affinity and resets it at the end
+    return len(variants) * restart_count(plan(masks, variants[:1]))
+
+
+def open_journals(
+    directory: str,
+    cfg: Config,
+    variants: list[Variant],
+    masks: list[int],
+    resume: bool,
+) -> list[journal.Journal]:
+    """
+    Journal of each variant, stored in the subdirectory of the variant. Raises ValueError if a resumed journal was
+    started with a different config or is unreadable.
+    """
+    journals: list[journal.Journal] = []
+
+    for variant in variants:
+        variant_directory = os.path.join(directory, variant_label(variant, variants))
+        variant_cfg = variant_config(cfg, variant)
+        session_hash = journal.config_hash(variant_cfg, masks)
+
+        if resume and os.path.exists(os.path.join(variant_directory, journal.JOURNAL_FILE)):
+            try:
+                variant_journal = journal.Journal.load(variant_directory)
+            except (OSError, KeyError, TypeError) as e:
+                msg = f"unable to read session journal of {variant_directory}: {e}"
+                raise ValueError(msg) from e
+
+            if variant_journal.session_hash != session_hash:
+                msg = f"the config of {variant_directory} has changed since the session was started"
+                raise ValueError(msg)
+        else:
+            variant_journal = journal.Journal(
+                variant_directory,
+                session_hash,
+                config=journal.config_snapshot(variant_cfg),
+            )
+
+        journals.append(variant_journal)
+
+    return journals
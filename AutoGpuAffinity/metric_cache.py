@@ -0,0 +1,94 @@
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+
+LOG_CACHE = logging.getLogger("CACHE")
+
+CACHE_FILE = "metrics-cache.json"
+
+# bump when the metrics computed by display_results change so stale entries are discarded
+CACHE_VERSION = 3
+
+
+@dataclass
+class Fingerprint:
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+def file_hash(path: str) -> str:
+    with open(path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+def fingerprint(path: str) -> Fingerprint:
+    stat = os.stat(path)
+    return Fingerprint(stat.st_size, stat.st_mtime_ns, file_hash(path))
+
+
+class MetricCache:
+    def __init__(self, directory: str, parameters: dict | None = None) -> None:
+        self.path = os.path.join(directory, CACHE_FILE)
+        # analysis parameters which the cached results depend on
+        self.parameters = parameters or {}
+        self.entries: dict[str, dict] = {}
+        self.modified = False
+
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                cache = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            LOG_CACHE.warning("ignoring unreadable metric cache %s", self.path)
+            return
+
+        if cache.get("version") == CACHE_VERSION and cache.get("parameters") == self.parameters:
+            self.entries = cache.get("entries", {})
+
+    def lookup(self, name: str, path: str) -> dict | None:
+        if (entry := self.entries.get(name)) is None:
+            return None
+
+        cached = Fingerprint(**entry["fingerprint"])
+        stat = os.stat(path)
+
+        if stat.st_size != cached.size:
+            return None
+
+        # fast path, the file has not been touched since it was cached
+        if stat.st_mtime_ns == cached.mtime_ns:
+            return entry["results"]
+
+        # the file was touched (e.g. copied) so only trust the entry if the content is identical
+        if file_hash(path) != cached.sha256:
+            return None
+
+        entry["fingerprint"]["mtime_ns"] = stat.st_mtime_ns
+        self.modified = True
+
+        return entry["results"]
+
+    def store(self, name: str, file_fingerprint: Fingerprint, results: dict) -> None:
+        self.entries[name] = {"fingerprint": asdict(file_fingerprint), "results": results}
+        self.modified = True
+
+    def save(self) -> None:
+        if not self.modified:
+            return
+
+        temp_path = f"{self.path}.tmp"
+
+        try:
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump({"version": CACHE_VERSION, "parameters": self.parameters, "entries": self.entries}, file)
+
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            LOG_CACHE.warning("unable to save metric cache: %s", e)
+            return
+
+        self.modified = False
@@ -0,0 +1,42 @@
+import logging
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+LOG_POSTPROCESS = logging.getLogger("POSTPROCESS")
+
+
+class PostProcessor:
+    """
+    Runs the post-processing of finished captures in the background while the next cpu is benchmarked. The number of
+    workers is bounded and the initializer (e.g. Backend.background_thread) lowers their priority so that the
+    post-processing competes as little as possible with the measurement.
+    """
+
+    def __init__(self, workers: int = 1, initializer: Callable[[], None] | None = None) -> None:
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="postprocess",
+            initializer=initializer,
+        )
+        self.tasks: list[tuple[str, Future]] = []
+
+    def submit(self, name: str, fn: Callable[..., Any], *args: Any) -> Future:
+        future = self.executor.submit(fn, *args)
+        self.tasks.append((name, future))
+
+        LOG_POSTPROCESS.debug("queued %s", name)
+
+        return future
+
+    def finish(self) -> list[tuple[str, BaseException]]:
+        """Waits for all tasks and returns the ones that failed, errors are only surfaced here."""
+        self.executor.shutdown(wait=True)
+
+        errors = [(name, error) for name, future in self.tasks if (error := future.exception()) is not None]
+        self.tasks.clear()
+
+        for name, error in errors:
+            LOG_POSTPROCESS.debug("%s failed: %s", name, error)
+
+        return errors
@@ -0,0 +1,94 @@
+import csv
+import warnings
+
+import numpy as np
+import numpy.typing as npt
+
+# column names changed case in newer versions of PresentMon (MsBetweenPresents in 1.6.0, msBetweenPresents in 1.10.0)
+FRAMETIME_COLUMN = "msbetweenpresents"
+
+# timestamp of each frame, the remaining timing columns are prefixed with ms
+TIME_COLUMN = "timeinseconds"
+
+
+def parse_header(header: str) -> list[str]:
+    return [field.strip().lower() for field in next(csv.reader([header]))]
+
+
+def find_column(header: str, column: str = FRAMETIME_COLUMN) -> int:
+    fields = parse_header(header)
+
+    try:
+        return fields.index(column)
+    except ValueError as e:
+        msg = f"column {column} not found in PresentMon header"
+        raise ValueError(msg) from e
+
+
+def read_frametimes(csv_path: str) -> npt.NDArray[np.float64]:
+    with open(csv_path, encoding="utf-8") as file:
+        column_index = find_column(file.readline())
+
+        with warnings.catch_warnings():
+            # a capture without any frames is handled by the caller
+            warnings.simplefilter("ignore", UserWarning)
+
+            # only the requested column is converted, the rest of each row is skipped by the tokenizer
+            return np.loadtxt(
+                file,
+                dtype=np.float64,
+                delimiter=",",
+                quotechar='"',
+                usecols=column_index,
+                ndmin=1,
+            )
+
+
+def parse_timing(value: str) -> float:
+    # e.g. msUntilDisplayed is NA for frames that were dropped
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+def read_timing_columns(csv_path: str) -> dict[str, npt.NDArray[np.float64]]:
+    """Every timing column of a PresentMon csv keyed by its lowercase name, frames without a value are NaN."""
+    with open(csv_path, encoding="utf-8") as file:
+        fields = parse_header(file.readline())
+        columns = {field: index for index, field in enumerate(fields) if field.startswith("ms") or field == TIME_COLUMN}
+
+        if FRAMETIME_COLUMN not in columns:
+            msg = f"column {FRAMETIME_COLUMN} not found in PresentMon header"
+            raise ValueError(msg)
+
+        start = file.tell()
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+
+            try:
+                rows = np.loadtxt(
+                    file,
+                    dtype=np.float64,
+                    delimiter=",",
+                    quotechar='"',
+                    usecols=list(columns.values()),
+                    ndmin=2,
+                )
+            except ValueError:
+                # only parse each value in python if the csv contains values that are not numbers
+                file.seek(start)
+                rows = np.loadtxt(
+                    file,
+                    dtype=np.float64,
+                    delimiter=",",
+                    quotechar='"',
+                    usecols=list(columns.values()),
+                    ndmin=2,
+                    converters=parse_timing,
+                )
+
+    rows = rows.reshape(-1, len(columns))
+
+    return {column: rows[:, index] for index, column in enumerate(columns)}
@@ -0,0 +1,33 @@
+import logging
+import time
+from collections.abc import Callable
+
+LOG_READINESS = logging.getLogger("READINESS")
+
+
+def wait_until(
+    condition: Callable[[], bool],
+    timeout: float,
+    name: str,
+    fixed_wait: float | None = None,
+    interval: float = 0.05,
+) -> bool:
+    """
+    Polls the condition until it is met or the timeout expires. The time saved compared to the fixed wait that the
+    probe replaces (the timeout by default) is logged.
+    """
+    fixed_wait = timeout if fixed_wait is None else fixed_wait
+    start = time.monotonic()
+
+    while True:
+        elapsed = time.monotonic() - start
+
+        if condition():
+            LOG_READINESS.info("%s after %.2fs, saved %.2fs", name, elapsed, fixed_wait - elapsed)
+            return True
+
+        if elapsed >= timeout:
+            LOG_READINESS.warning("timed out waiting for %s after %.2fs", name, elapsed)
+            return False
+
+        time.sleep(interval)
@@ -0,0 +1,319 @@
+import contextlib
+import datetime
+import json
+import logging
+import os
+import re
+import sqlite3
+from collections.abc import Iterator
+
+import framerate
+import framestore
+import journal
+import sketch
+
+LOG_RESULTSDB = logging.getLogger("RESULTSDB")
+
+DATABASE_NAME = "results.db"
+DATABASE_FILE = os.path.join("captures", DATABASE_NAME)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    directory TEXT NOT NULL UNIQUE,
+    started_at TEXT NOT NULL,
+    subject TEXT,
+    presentmon_version TEXT,
+    config TEXT
+);
+
+CREATE TABLE IF NOT EXISTS results (
+    session_id INTEGER NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    cpu TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    lower REAL NOT NULL,
+    upper REAL NOT NULL,
+    PRIMARY KEY (session_id, metric, cpu)
+);
+
+CREATE INDEX IF NOT EXISTS sessions_subject ON sessions (subject, started_at);
+"""
+
+# filters are applied to the config snapshot of each session, e.g. settings.api=LIBLAVA
+FILTER_PATTERN = re.compile(r"([A-Za-z_][\w.]*)=(.*)")
+
+
+@contextlib.contextmanager
+def connect(database_path: str) -> Iterator[sqlite3.Connection]:
+    if directory := os.path.dirname(database_path):
+        os.makedirs(directory, exist_ok=True)
+
+    connection = sqlite3.connect(database_path)
+
+    try:
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.executescript(SCHEMA)
+
+        # commits on success and rolls back on errors
+        with connection:
+            yield connection
+    finally:
+        connection.close()
+
+
+def parse_session_name(directory: str) -> datetime.datetime | None:
+    """Time that a session directory is named after, None if the directory is not named like a session."""
+    try:
+        return datetime.datetime.strptime(os.path.basename(directory).removeprefix("AutoGpuAffinity-"), "%d%m%y%H%M%S")
+    except ValueError:
+        return None
+
+
+def session_started_at(session_directory: str) -> str:
+    # matrix variants and the csv directories of sessions without a journal are subdirectories of the session
+    for directory in (session_directory, os.path.dirname(session_directory)):
+        if (started_at := parse_session_name(directory)) is not None:
+            return started_at.isoformat(sep=" ")
+
+    return datetime.datetime.fromtimestamp(os.path.getmtime(session_directory)).isoformat(sep=" ")
+
+
+def session_key(csv_directory: str) -> tuple[str, dict | None]:
+    """
+    Directory that identifies the session of a csv directory in the database and the config snapshot of the session.
+    Sessions with a journal are identified by their session directory and other folders by the csv directory itself,
+    so folders that are analyzed side by side (e.g. C:\\data\\run1 and C:\\data\\run2) are separate sessions.
+    """
+    csv_directory = os.path.abspath(os.path.normpath(csv_directory))
+    session_directory = os.path.dirname(csv_directory)
+
+    try:
+        return session_directory, journal.Journal.load(session_directory).config
+    except (OSError, ValueError, KeyError, TypeError):
+        # analyzed folders that were not created by a session, e.g. copied csv logs
+        return csv_directory, None
+
+
+def database_path(csv_directory: str) -> str:
+    """Database next to the analyzed data, in the directory that contains the session (e.g. captures\\results.db)."""
+    directory = os.path.dirname(session_key(csv_directory)[0])
+
+    # matrix variants and the csv directories of sessions without a journal are subdirectories of the session
+    if parse_session_name(directory) is not None:
+        directory = os.path.dirname(directory)
+
+    return os.path.join(directory, DATABASE_NAME)
+
+
+def index_session(
+    database_path: str,
+    csv_directory: str,
+    results: dict[str, dict[str, float]],
+    metrics: tuple[str, ...],
+) -> None:
+    """Replaces the results of the session that the csv directory belongs to in the database."""
+    session_directory, config = session_key(csv_directory)
+
+    subject = presentmon_version = None
+
+    # the binary frametime and columnar files record the capture environment
+    for file in sorted(os.listdir(csv_directory)):
+        if file.endswith((".bin", ".npz")):
+            try:
+                header = framestore.read_header(os.path.join(csv_directory, file))
+            except (OSError, ValueError):
+                continue
+
+            subject, presentmon_version = header.subject, header.presentmon_version
+            break
+
+    try:
+        with connect(database_path) as connection:
+            connection.execute("DELETE FROM sessions WHERE directory = ?", (session_directory,))
+            session_id = connection.execute(
+                """
+                INSERT INTO sessions (directory, started_at, subject, presentmon_version, config)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (
+                    session_directory,
+                    session_started_at(session_directory),
+                    subject,
+                    presentmon_version,
+                    json.dumps(config) if config is not None else None,
+                ),
+            ).lastrowid
+            connection.executemany(
+                "INSERT INTO results (session_id, cpu, metric, value, lower, upper) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        session_id,
+                        cpu,
+                        metric,
+                        cpu_results[metric],
+                        cpu_results.get(f"{metric}_lower", cpu_results[metric]),
+                        cpu_results.get(f"{metric}_upper", cpu_results[metric]),
+                    )
+                    for cpu, cpu_results in results.items()
+                    for metric in metrics
+                ],
+            )
+    except sqlite3.Error as e:
+        LOG_RESULTSDB.warning("unable to add the session to the results database: %s", e)
+
+
+def session_filter(subject: str | None, filters: list[str]) -> tuple[str, list[str]]:
+    """SQL condition on the sessions table and its parameters, raises ValueError for malformed filters."""
+    conditions = ["1"]
+    parameters: list[str] = []
+
+    if subject is not None:
+        conditions.append("lower(sessions.subject) = lower(?)")
+        parameters.append(os.path.splitext(subject)[0])
+
+    for expression in filters:
+        if (match := FILTER_PATTERN.fullmatch(expression)) is None:
+            msg = f"invalid filter: {expression}"
+            raise ValueError(msg)
+
+        # booleans are stored as json true/false which json_extract returns as 1/0
+        value = {"true": "1", "false": "0"}.get(match.group(2).lower(), match.group(2))
+
+        conditions.append("CAST(json_extract(sessions.config, ?) AS TEXT) = ?")
+        parameters.extend((f"$.{match.group(1)}", value))
+
+    return " AND ".join(conditions), parameters
+
+
+def rank_cpus(database_path: str, metric: str, subject: str | None = None, filters: list[str] | None = None) -> list:
+    """Mean value of the metric of each cpu across the matching sessions, best first."""
+    condition, parameters = session_filter(subject, filters or [])
+
+    with connect(database_path) as connection:
+        # values where lower is better are negated, so higher is always better
+        return connection.execute(
+            f"""
+            SELECT results.cpu, COUNT(*), AVG(results.value), MIN(results.value), MAX(results.value)
+            FROM results JOIN sessions ON sessions.id = results.session_id
+            WHERE results.metric = ? AND {condition}
+            GROUP BY results.cpu
+            ORDER BY AVG(results.value) DESC
+            """,
+            [metric, *parameters],
+        ).fetchall()
+
+
+def trend(
+    database_path: str,
+    metric: str,
+    subject: str | None = None,
+    filters: list[str] | None = None,
+    cpu: str | None = None,
+) -> list:
+    """Value of the metric per session in chronological order, the best cpu of each session unless cpu is given."""
+    condition, parameters = session_filter(subject, filters or [])
+
+    if cpu is not None:
+        condition += " AND results.cpu = ?"
+        parameters.append(cpu)
+
+    with connect(database_path) as connection:
+        # sqlite returns the other columns of the row that has the maximum value
+        return connection.execute(
+            f"""
+            SELECT sessions.started_at, sessions.subject, results.cpu, MAX(results.value)
+            FROM results JOIN sessions ON sessions.id = results.session_id
+            WHERE results.metric = ? AND {condition}
+            GROUP BY sessions.id
+            ORDER BY sessions.started_at
+            """,
+            [metric, *parameters],
+        ).fetchall()
+
+
+def session_csv_directory(directory: str) -> str:
+    # sessions with a journal are indexed by their session directory which contains the captures in CSVs
+    csv_directory = os.path.join(directory, "CSVs")
+    return csv_directory if os.path.isdir(csv_directory) else directory
+
+
+def aggregate_cpus(
+    database_path: str,
+    metric: str,
+    subject: str | None = None,
+    filters: list[str] | None = None,
+) -> list:
+    """
+    Value of the metric of each cpu over the frames of all matching sessions, best first. The sketches of the
+    captures are merged so that the memory used does not grow with the number of sessions or frames.
+    """
+    if metric not in framerate.METRICS:
+        msg = f"only framerate metrics can be aggregated: {metric}"
+        raise ValueError(msg)
+
+    condition, parameters = session_filter(subject, filters or [])
+
+    with connect(database_path) as connection:
+        directories = [
+            row[0]
+            for row in connection.execute(
+                f"SELECT sessions.directory FROM sessions WHERE {condition} ORDER BY sessions.started_at", parameters
+            )
+        ]
+
+    sketches: dict[str, sketch.FrametimeSketch] = {}
+    sessions: dict[str, int] = {}
+
+    for directory in directories:
+        csv_directory = session_csv_directory(directory)
+
+        try:
+            capture_files = framestore.find_captures(csv_directory)
+        except OSError as e:
+            LOG_RESULTSDB.warning("skipping session %s: %s", directory, e)
+            continue
+
+        for cpu, capture_file in capture_files.items():
+            try:
+                capture_sketch = sketch.capture_sketch(os.path.join(csv_directory, capture_file))
+            except (OSError, ValueError) as e:
+                LOG_RESULTSDB.warning("skipping %s of session %s: %s", capture_file, directory, e)
+                continue
+
+            sketches.setdefault(cpu, sketch.FrametimeSketch()).merge(capture_sketch)
+            sessions[cpu] = sessions.get(cpu, 0) + 1
+
+    rows = [
+        (cpu, sessions[cpu], cpu_sketch.length, cpu_sketch.results()[metric]) for cpu, cpu_sketch in sketches.items()
+    ]
+
+    return sorted(rows, key=lambda row: row[3], reverse=True)
+
+
+def print_ranking(rows: list) -> None:
+    print(f"{'CPU':<12}{'Sessions':<12}{'Mean':<12}{'Worst':<12}{'Best':<12}")
+
+    for cpu, sessions, mean, worst, best in rows:
+        # abs is for negated values such as stdev
+        print(f"{cpu:<12}{sessions:<12}{abs(mean):<12.2f}{abs(worst):<12.2f}{abs(best):<12.2f}")
+
+    print()  # new line
+
+
+def print_trend(rows: list) -> None:
+    print(f"{'Session':<22}{'Subject':<20}{'CPU':<12}{'Value':<12}")
+
+    for started_at, subject, cpu, value in rows:
+        print(f"{started_at:<22}{subject or '':<20}{cpu:<12}{abs(value):<12.2f}")
+
+    print()  # new line
+
+
+def print_aggregate(rows: list) -> None:
+    print(f"{'CPU':<12}{'Sessions':<12}{'Frames':<12}{'Value':<12}")
+
+    for cpu, sessions, frames, value in rows:
+        print(f"{cpu:<12}{sessions:<12}{frames:<12}{abs(value):<12.2f}")
+
+    print()  # new line
@@ -0,0 +1,104 @@
+import logging
+import math
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+
+import topology
+
+LOG_SCHEDULER = logging.getLogger("SCHEDULER")
+
+# score of a benchmark, higher is better. resolving it blocks until the capture has been analyzed which allows the
+# analysis to run in the background while the next cpu is benchmarked
+Score = Callable[[], float]
+
+# benchmarks an affinity mask (e.g. a single cpu) for the given duration in seconds and returns its deferred score
+Measure = Callable[[int, int], Score]
+
+
+@dataclass
+class Round:
+    # affinity masks benchmarked in the round, a single cpu is 1 << cpu
+    cpus: list[int]
+    duration: int
+    scores: dict[int, float] = field(default_factory=dict)
+
+
+class Scheduler(ABC):
+    def __init__(self, benchmark_duration: int) -> None:
+        self.benchmark_duration = benchmark_duration
+
+    @abstractmethod
+    def plan(self, num_cpus: int) -> list[tuple[int, int]]:
+        """Number of cpus benchmarked and the duration of each round."""
+
+    @abstractmethod
+    def run(self, cpus: Sequence[int], measure: Measure) -> list[Round]:
+        pass
+
+    def estimate(self, num_cpus: int, overhead: float) -> float:
+        """Estimated session time in seconds, overhead is the time spent per benchmark excluding the capture."""
+        return sum(count * (overhead + duration) for count, duration in self.plan(num_cpus))
+
+
+class LinearScheduler(Scheduler):
+    """Benchmarks every cpu once for the full benchmark duration."""
+
+    def plan(self, num_cpus: int) -> list[tuple[int, int]]:
+        return [(num_cpus, self.benchmark_duration)]
+
+    def run(self, cpus: Sequence[int], measure: Measure) -> list[Round]:
+        current_round = Round(list(cpus), self.benchmark_duration)
+
+        scores = {cpu: measure(cpu, current_round.duration) for cpu in current_round.cpus}
+        current_round.scores = {cpu: score() for cpu, score in scores.items()}
+
+        return [current_round]
+
+
+class SuccessiveHalvingScheduler(Scheduler):
+    """
+    Benchmarks every cpu for a short round and only keeps the better half for the next short round until the number of
+    finalists is reached. The finalists are then benchmarked for the full benchmark duration.
+    """
+
+    def __init__(self, benchmark_duration: int, round_duration: int, finalists: int) -> None:
+        super().__init__(benchmark_duration)
+        self.round_duration = round_duration
+        self.finalists = finalists
+
+    def plan(self, num_cpus: int) -> list[tuple[int, int]]:
+        rounds: list[tuple[int, int]] = []
+        remaining = num_cpus
+
+        while remaining > self.finalists:
+            rounds.append((remaining, self.round_duration))
+            remaining = max(self.finalists, math.ceil(remaining / 2))
+
+        rounds.append((remaining, self.benchmark_duration))
+
+        return rounds
+
+    def run(self, cpus: Sequence[int], measure: Measure) -> list[Round]:
+        rounds: list[Round] = []
+        contenders = list(cpus)
+
+        for count, duration in self.plan(len(cpus)):
+            current_round = Round(contenders[:count], duration)
+
+            # only the ranking at the end of the round depends on the scores
+            scores = {cpu: measure(cpu, duration) for cpu in current_round.cpus}
+            current_round.scores = {cpu: score() for cpu, score in scores.items()}
+
+            rounds.append(current_round)
+
+            # stable sort so that ties keep the original cpu order
+            contenders = sorted(current_round.cpus, key=lambda cpu: current_round.scores[cpu], reverse=True)
+
+            LOG_SCHEDULER.info(
+                "round %d finished, contenders: %s",
+                len(rounds),
+                " ".join(topology.mask_label(mask) for mask in contenders),
+            )
+
+        return rounds
@@ -0,0 +1,582 @@
+import concurrent.futures
+import contextlib
+import logging
+import os
+import shutil
+import subprocess
+import time
+
+import analysis
+import earlystop
+import framestore
+import journal
+import livestats
+import matrix
+import postprocess
+import presentmon
+import readiness
+import scheduler
+import sketch
+import topology
+import tracing
+import warmup
+from backend import Backend
+from config import Api, Config
+
+LOG_SESSION = logging.getLogger("SESSION")
+
+# seconds that presentmon may run beyond the capture duration before the watchdog terminates it
+PRESENTMON_TIMEOUT_MARGIN = 30
+
+
+class BenchmarkError(Exception):
+    def __init__(self, mask: int) -> None:
+        super().__init__(f"failed to benchmark CPU {topology.mask_label(mask)}")
+        self.mask = mask
+
+
+def presentmon_timeout(duration: int) -> float:
+    return duration + PRESENTMON_TIMEOUT_MARGIN
+
+
+def subject_args(cfg: Config) -> list[str]:
+    if cfg.settings.api == Api.LIBLAVA:
+        return [
+            f"--fullscreen={int(cfg.liblava.fullscreen)}",
+            f"--width={cfg.liblava.x_resolution}",
+            f"--height={cfg.liblava.y_resolution}",
+            f"--fps_cap={cfg.liblava.fps_cap}",
+            f"--triple_buffering={int(cfg.liblava.triple_buffering)}",
+        ]
+
+    return []
+
+
+class BenchmarkSession:
+    def __init__(
+        self,
+        backend: Backend,
+        cfg: Config,
+        directory: str,
+        hwids: list[str],
+        presentmon_path: str,
+        presentmon_version: str,
+        subject_path: str,
+        session_journal: journal.Journal,
+        bootstrap_resamples: int = 1000,
+        tracer: tracing.Tracer | None = None,
+    ) -> None:
+        self.backend = backend
+        self.cfg = cfg
+        self.directory = directory
+        self.csv_directory = os.path.join(directory, "CSVs")
+        self.xperf_directory = os.path.join(directory, "xperf")
+        self.hwids = hwids
+        self.presentmon_path = presentmon_path
+        self.presentmon_version = presentmon_version
+        self.subject_path = subject_path
+        self.subject_name = os.path.basename(subject_path)
+        self.subject_args = subject_args(cfg)
+        self.bootstrap_resamples = bootstrap_resamples
+        self.postprocessor = postprocess.PostProcessor(initializer=backend.background_thread)
+        # post-processing tasks that failed, reported after the results have been displayed
+        self.errors: list[tuple[str, BaseException]] = []
+        self.cache = analysis.open_cache(self.csv_directory, bootstrap_resamples)
+        # results of the most recent capture of each affinity mask
+        self.analyses: dict[int, concurrent.futures.Future] = {}
+        self.journal = session_journal
+        # the variants of a matrix session share the trace of the session
+        self.tracer = tracer or tracing.Tracer(os.path.join(directory, tracing.TRACE_FILE))
+        # number of measurements requested by the scheduler and how many of them can be skipped when resuming
+        self.measurements = 0
+        self.resumable = 0
+
+    def prepare(self) -> None:
+        # this will create all of the required folders
+        os.makedirs(self.csv_directory, exist_ok=True)
+
+        # stop any existing trace sessions and processes
+        if self.cfg.xperf.enabled:
+            os.makedirs(self.xperf_directory, exist_ok=True)
+
+            try:
+                self.backend.xperf(self.cfg.xperf.location, ["-stop"])
+            except subprocess.CalledProcessError as e:
+                # ignore if already stopped
+                if e.returncode != 2147946601:
+                    LOG_SESSION.exception("failed to stop the existing xperf trace")
+                    raise
+
+        # processes of this session are tracked by the backend, instances left running by a crashed session can only be
+        # found by their name which may match unrelated processes, so they are only killed if it is enabled
+        if self.cfg.settings.kill_stray_processes:
+            self.backend.kill_processes(
+                "xperf.exe",
+                self.subject_name.lower(),
+                os.path.basename(self.presentmon_path).lower(),
+            )
+
+    def kill_processes(self) -> None:
+        self.backend.terminate_children()
+
+    def discard(self) -> bool:
+        """Removes the session directory unless a capture has been completed, returns whether it was kept."""
+        # background tasks may still be writing to the session directory
+        self.postprocessor.finish()
+
+        # completed captures are kept so that the session can be resumed
+        if self.journal.completed() > 0:
+            return True
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+        return False
+
+    def abort(self) -> int:
+        # the subject and presentmon are left running when a benchmark fails or is interrupted
+        self.kill_processes()
+        self.tracer.save()
+
+        if self.discard():
+            LOG_SESSION.info("the session can be resumed with --resume %s", self.directory)
+
+        if self.backend.apply_affinity(self.hwids, None) != 0:
+            LOG_SESSION.error("failed to reset affinity")
+
+        return 1
+
+    def validate_journal(self) -> int:
+        """Number of completed measurements whose artifacts are intact, captures after them are done again."""
+        for index, entry in enumerate(self.journal.entries[: self.journal.completed()]):
+            for artifact in entry.artifacts:
+                path = os.path.join(self.directory, artifact)
+
+                try:
+                    if path.endswith(".bin"):
+                        framestore.validate_file(path)
+                    elif not os.path.exists(path):
+                        raise FileNotFoundError(path)
+                except (OSError, ValueError) as e:
+                    LOG_SESSION.warning("invalid artifact of CPU %s: %s", topology.mask_label(entry.mask), e)
+                    return index
+
+        return self.journal.completed()
+
+    def monitored_capture(
+        self,
+        presentmon_args: list[str],
+        csv_path: str,
+        duration: int,
+        convergence: earlystop.ConvergenceMonitor | None = None,
+    ) -> None:
+        live_stats_interval = self.cfg.settings.live_stats_interval
+
+        tail = livestats.CsvTail(csv_path)
+        # bounded-memory summary of the frames captured so far
+        stats = sketch.FrametimeSketch()
+
+        # convergence is checked every second while live statistics are only reported at their own interval
+        poll_interval = 1 if convergence is not None else live_stats_interval
+        last_report = time.monotonic()
+        stopped_early = False
+
+        process = self.backend.start_presentmon(presentmon_args, presentmon_timeout(duration))
+
+        while True:
+            try:
+                process.wait(poll_interval)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+
+            frametimes = tail.poll()
+            stats.add(frametimes)
+
+            if convergence is not None:
+                convergence.add(frametimes)
+
+                if convergence.should_stop():
+                    self.backend.stop_presentmon(self.presentmon_path)
+                    process.wait()
+                    stopped_early = True
+                    break
+
+            if live_stats_interval > 0 and stats.length > 0 and time.monotonic() - last_report >= live_stats_interval:
+                last_report = time.monotonic()
+                LOG_SESSION.info(
+                    "frames: %d, avg: %.2f, 1%% low: %.2f, stdev: %.2f",
+                    stats.length,
+                    stats.average(),
+                    stats.lows(1),
+                    stats.stdev(),
+                )
+
+        if convergence is not None:
+            if stopped_early and not convergence.timed_out:
+                LOG_SESSION.info("metrics converged, stopped capture after %.1fs", convergence.elapsed)
+            else:
+                LOG_SESSION.info("metrics did not converge within the maximum duration of %ds", duration)
+
+        if process.returncode != 0 and not stopped_early:
+            raise subprocess.CalledProcessError(process.returncode or 0, presentmon_args)
+
+    def benchmark(self, mask: int, duration: int) -> int:
+        cfg = self.cfg
+
+        # single cpus are labeled with their index so that their files are named the same as before (e.g. CPU-3.csv)
+        label = topology.mask_label(mask)
+
+        LOG_SESSION.info("benchmarking CPU %s for %ds", label, duration)
+
+        with self.tracer.phase("driver restart", cpu=label):
+            if self.backend.apply_affinity(self.hwids, mask) != 0:
+                LOG_SESSION.error(f"failed to apply affinity to CPU {label}")
+                return 1
+
+            # the drivers may have been restarted, a capture is never taken before all of them are running again
+            if not readiness.wait_until(
+                lambda: all(self.backend.is_driver_started(hwid) for hwid in self.hwids),
+                5,
+                "graphics drivers running",
+            ):
+                LOG_SESSION.error("graphics drivers are not running after applying affinity to CPU %s", label)
+                return 1
+
+        # the analysis and report of the previous capture may still be running
+        self.backend.isolate_background(mask)
+
+        if (profile := cfg.msi_afterburner.profile) > 0:
+            with self.tracer.phase("afterburner", cpu=label):
+                if self.backend.start_afterburner(cfg.msi_afterburner.location, profile) != 0:
+                    LOG_SESSION.error("failed to apply msi afterburner profile %d", profile)
+                    return 1
+
+        with self.tracer.phase("launch", cpu=label):
+            self.backend.launch_subject(
+                self.subject_path,
+                self.subject_args,
+                mask if cfg.settings.sync_driver_affinity else None,
+            )
+
+            # allow subject to launch, more time than the previous fixed wait is allowed before giving up
+            if not readiness.wait_until(
+                self.backend.is_subject_presenting,
+                10,
+                "subject presenting",
+                fixed_wait=5,
+            ):
+                LOG_SESSION.error("%s is not presenting", self.subject_name)
+                return 1
+
+        # the warm-up is detected in the capture instead
+        if not cfg.warmup_detection.enabled:
+            with self.tracer.phase("cache", cpu=label):
+                self.backend.sleep(cfg.settings.cache_duration)
+
+        if cfg.xperf.enabled:
+            with self.tracer.phase("xperf start", cpu=label):
+                self.backend.xperf(cfg.xperf.location, ["-on", "base+interrupt+dpc"], quiet=False)
+
+        # captures of the elimination rounds are kept apart so that the results only compare captures of the full
+        # duration, successive halving benchmarks a cpu once per round that it takes part in
+        capture_directory = ""
+
+        if duration < cfg.settings.benchmark_duration:
+            capture_round = sum(entry.mask == mask for entry in self.journal.entries) + 1
+            capture_directory = os.path.join("rounds", f"round-{capture_round}")
+            os.makedirs(os.path.join(self.csv_directory, capture_directory), exist_ok=True)
+
+        csv_path = os.path.join(self.csv_directory, capture_directory, f"CPU-{label}.csv")
+
+        presentmon_args = [
+            self.presentmon_path,
+            "-stop_existing_session",
+            "-no_top",
+            "-timed",
+            str(duration),
+            "-process_name",
+            self.subject_name,
+            "-output_file",
+            csv_path,
+            "-terminate_after_timed",
+        ]
+
+        # a log left over from a failed or interrupted attempt would be counted as part of this capture
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(csv_path)
+
+        convergence: earlystop.ConvergenceMonitor | None = None
+
+        if cfg.adaptive_duration.enabled:
+            # the scheduled duration is the upper bound of the capture
+            convergence = earlystop.ConvergenceMonitor(
+                cfg.adaptive_duration.metrics,
+                cfg.adaptive_duration.tolerance,
+                cfg.adaptive_duration.min_duration,
+                duration,
+                # the warm-up is excluded from the results so it can not delay convergence
+                cfg.warmup_detection.max_fraction if cfg.warmup_detection.enabled else None,
+            )
+
+        with self.tracer.phase("capture", cpu=label, duration=duration):
+            try:
+                if cfg.settings.live_stats_interval > 0 or convergence is not None:
+                    self.monitored_capture(presentmon_args, csv_path, duration, convergence)
+                else:
+                    self.backend.run_presentmon(presentmon_args, presentmon_timeout(duration))
+            except subprocess.CalledProcessError as e:
+                # also raised when the watchdog terminated a hung instance
+                LOG_SESSION.error("presentmon exited with %s", e.returncode)
+                return 1
+
+        if not os.path.exists(csv_path):
+            LOG_SESSION.error(
+                "csv log unsuccessful, this may be due to a missing dependency or windows component",
+            )
+            return 1
+
+        # the trace has to be stopped before the next cpu starts a new one, the report is generated in the background
+        if cfg.xperf.enabled:
+            etl_path = os.path.join(self.xperf_directory, capture_directory, f"CPU-{label}.etl")
+            os.makedirs(os.path.dirname(etl_path), exist_ok=True)
+
+            with self.tracer.phase("xperf stop", cpu=label):
+                self.backend.xperf(cfg.xperf.location, ["-d", etl_path])
+
+            self.postprocessor.submit(f"CPU {label} dpcisr report", self.generate_report, label, etl_path)
+
+        artifacts = [os.path.join("CSVs", capture_directory, f"CPU-{label}.bin")]
+
+        if cfg.settings.save_csvs:
+            artifacts.append(os.path.join("CSVs", capture_directory, f"CPU-{label}.csv"))
+
+        if cfg.xperf.enabled:
+            artifacts.append(os.path.join("xperf", capture_directory, f"CPU-{label}.txt"))
+
+        # the entry is completed once the capture has been analyzed
+        entry = journal.Entry(mask, duration, artifacts=artifacts)
+        self.journal.append(entry)
+
+        self.analyses[mask] = self.postprocessor.submit(
+            f"CPU {label} analysis",
+            self.process_capture,
+            label,
+            csv_path,
+            round(convergence.elapsed) if convergence is not None else duration,
+            entry,
+        )
+
+        with self.tracer.phase("process kill", cpu=label):
+            self.kill_processes()
+
+        return 0
+
+    def process_capture(self, label: str, csv_path: str, duration: int, entry: journal.Entry) -> dict[str, float]:
+        with self.tracer.phase("analysis", tracing.CATEGORY_BACKGROUND, cpu=label):
+            return self.analyze_capture(label, csv_path, duration, entry)
+
+    def analyze_capture(self, label: str, csv_path: str, duration: int, entry: journal.Entry) -> dict[str, float]:
+        bin_path = os.path.splitext(csv_path)[0] + ".bin"
+        # relative to the csv directory, e.g. rounds\round-1\CPU-3.bin for a capture of an elimination round
+        capture_file = os.path.relpath(bin_path, self.csv_directory)
+
+        frametimes = presentmon.read_frametimes(csv_path)
+        warmup_frames = 0
+
+        if self.cfg.warmup_detection.enabled:
+            warmup_frames = warmup.detect_warmup(frametimes, self.cfg.warmup_detection.max_fraction)
+            LOG_SESSION.info(
+                "CPU %s warmed up after %d frames (%.2fs)",
+                label,
+                warmup_frames,
+                frametimes[:warmup_frames].sum() / 1000,
+            )
+
+        # convert to a compact binary frametime file which is memory-mapped during analysis, the warm-up is recorded in
+        # its header so that it is excluded whenever the capture is analyzed
+        framestore.write_frametimes(
+            bin_path,
+            frametimes,
+            framestore.Header(
+                self.presentmon_version,
+                os.path.splitext(self.subject_name)[0],
+                duration,
+                len(frametimes),
+                warmup_frames,
+            ),
+        )
+
+        if not self.cfg.settings.save_csvs:
+            os.remove(csv_path)
+
+        # the results are cached so that they are displayed without analyzing the captures again
+        file_fingerprint, results = analysis.analyze_capture_uncached(bin_path, self.bootstrap_resamples)
+        self.cache.store(capture_file, file_fingerprint, results)
+        self.journal.complete(entry, results[self.cfg.scheduler.metric])
+
+        return results
+
+    def generate_report(self, label: str, etl_path: str) -> None:
+        with self.tracer.phase("report generation", tracing.CATEGORY_BACKGROUND, cpu=label):
+            self.write_report(etl_path)
+
+    def write_report(self, etl_path: str) -> None:
+        try:
+            self.backend.xperf(
+                self.cfg.xperf.location,
+                [
+                    "-quiet",
+                    "-i",
+                    etl_path,
+                    "-o",
+                    os.path.splitext(etl_path)[0] + ".txt",
+                    "-a",
+                    "dpcisr",
+                ],
+                quiet=False,
+                background=True,
+            )
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError("unable to generate dpcisr report") from e
+
+        if not self.cfg.xperf.save_etls:
+            os.remove(etl_path)
+
+    def measure(self, mask: int, duration: int) -> scheduler.Score:
+        index = self.measurements
+        self.measurements += 1
+
+        # the scheduler requests the same measurements in the same order when a session is resumed
+        if index < self.resumable:
+            entry = self.journal.entries[index]
+
+            if (entry.mask, entry.duration) == (mask, duration) and (score := entry.score) is not None:
+                LOG_SESSION.info("CPU %s has already been benchmarked, skipping", topology.mask_label(mask))
+                return lambda: score
+
+            self.resumable = index
+
+        # discard the measurements that are captured again
+        if index < len(self.journal.entries):
+            self.journal.truncate(index)
+
+        label = topology.mask_label(mask)
+
+        with self.tracer.phase(f"CPU {label}", tracing.CATEGORY_BENCHMARK, cpu=label, duration=duration):
+            result = self.benchmark(mask, duration)
+
+        # an interrupted session keeps the trace up to its last benchmark
+        self.tracer.save()
+
+        if result != 0:
+            raise BenchmarkError(mask)
+
+        analysis_future = self.analyses[mask]
+
+        def score() -> float:
+            try:
+                return analysis_future.result()[self.cfg.scheduler.metric]
+            except Exception as e:
+                raise BenchmarkError(mask) from e
+
+        return score
+
+    def start(self) -> None:
+        self.prepare()
+
+        self.resumable = self.validate_journal()
+
+        if self.resumable > 0:
+            LOG_SESSION.info("resuming session, %d measurement(s) have already been completed", self.resumable)
+
+    def finish(self) -> None:
+        """Waits for the remaining post-processing and saves the results, failed tasks are kept in errors."""
+        self.errors = self.postprocessor.finish()
+        self.cache.save()
+        self.tracer.save()
+
+    def run(self, cpu_scheduler: scheduler.Scheduler, masks: list[int]) -> int:
+        self.start()
+
+        try:
+            cpu_scheduler.run(masks, self.measure)
+        except BenchmarkError as e:
+            LOG_SESSION.error("failed to benchmark CPU %s", topology.mask_label(e.mask))
+            return self.abort()
+        except BaseException:
+            # also resets the affinity if the session was interrupted or failed unexpectedly (e.g. xperf did not start)
+            self.abort()
+            raise
+
+        # most of the post-processing overlapped with the benchmarks, only the last capture is left
+        self.finish()
+
+        return cleanup(self.backend, self.hwids)
+
+
+def cleanup(backend: Backend, hwids: list[str]) -> int:
+    if backend.apply_affinity(hwids, None) != 0:
+        LOG_SESSION.error("failed to reset affinity")
+        return 1
+
+    backend.remove_kernel_etl()
+
+    return 0
+
+
+class MatrixSession:
+    """
+    Benchmarks several variants of the config in a single session. Every variant of a cpu is benchmarked one after
+    another, the affinity is only applied by the first of them so the drivers are restarted once per cpu rather than
+    once per cpu and variant. Each variant is a BenchmarkSession with its own directory, journal and results.
+    """
+
+    def __init__(self, directory: str, variants: list[matrix.Variant], sessions: list[BenchmarkSession]) -> None:
+        self.directory = directory
+        self.variants = variants
+        self.sessions = dict(zip(variants, sessions))
+
+    def abort(self) -> int:
+        first_session = next(iter(self.sessions.values()))
+
+        # the variants share the processes of the backend
+        first_session.kill_processes()
+        first_session.tracer.save()
+
+        kept = [benchmark_session.discard() for benchmark_session in self.sessions.values()]
+
+        if any(kept):
+            LOG_SESSION.info("the session can be resumed with --resume %s", self.directory)
+        else:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+        if first_session.backend.apply_affinity(first_session.hwids, None) != 0:
+            LOG_SESSION.error("failed to reset affinity")
+
+        return 1
+
+    def run(self, masks: list[int], duration: int) -> int:
+        for benchmark_session in self.sessions.values():
+            benchmark_session.start()
+
+        first_session = next(iter(self.sessions.values()))
+
+        try:
+            scores = [
+                self.sessions[variant].measure(mask, duration) for mask, variant in matrix.plan(masks, self.variants)
+            ]
+
+            # surfaces failed analyses like the scheduler does at the end of a round
+            for score in scores:
+                score()
+        except BenchmarkError as e:
+            LOG_SESSION.error("failed to benchmark CPU %s", topology.mask_label(e.mask))
+            return self.abort()
+        except BaseException:
+            # also resets the affinity if the session was interrupted or failed unexpectedly (e.g. xperf did not start)
+            self.abort()
+            raise
+
+        for benchmark_session in self.sessions.values():
+            benchmark_session.finish()
+
+        return cleanup(first_session.backend, first_session.hwids)
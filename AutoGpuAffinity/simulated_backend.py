@@ -0,0 +1,291 @@
+import logging
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import topology
+from backend import DRIVER_ENABLE, Backend, CaptureProcess
+
+LOG_BACKEND = logging.getLogger("BACKEND")
+
+PRESENTMON_HEADER = (
+    "Application,ProcessID,SwapChainAddress,Runtime,SyncInterval,PresentFlags,AllowsTearing,PresentMode,"
+    "msBetweenPresents,msInPresentAPI\n"
+)
+
+# modules that report dpcs and isrs in the simulated dpcisr reports
+DPCISR_MODULES = {
+    "DPC Info": ("ntoskrnl.exe", "dxgkrnl.sys", "nvlddmkm.sys"),
+    "ISR Info": ("dxgkrnl.sys", "USBPORT.SYS"),
+}
+
+
+def dpcisr_report(rng: np.random.Generator) -> str:
+    """Report in the layout of xperf -a dpcisr with lognormal execution times in usecs."""
+    lines = ["", "DPC/ISR Summary Report", ""]
+
+    for heading, modules in DPCISR_MODULES.items():
+        lines.extend(["-" * 68, heading, "-" * 68, ""])
+
+        for module in modules:
+            latencies = rng.lognormal(0.5, 0.8, size=int(rng.integers(500, 2000)))
+            # power of two buckets like xperf, the first one is (0, 1]
+            uppers, counts = np.unique(
+                np.exp2(np.ceil(np.log2(np.maximum(latencies, 1)))).astype(int), return_counts=True
+            )
+
+            lines.append(f"Total = {latencies.size} for module {module}")
+            lines.extend(
+                f"Elapsed Time, > {upper // 2 if upper > 1 else 0:>8} usecs AND <= {upper:>8} usecs, {count:>9}, or "
+                f"{count / latencies.size * 100:>6.2f}%"
+                for upper, count in zip(uppers.tolist(), counts.tolist())
+            )
+            lines.extend([f"Total, {latencies.size:>55}", ""])
+
+    return "\n".join(lines)
+
+
+@dataclass
+class Latencies:
+    """Wall time in seconds spent by each simulated operation."""
+
+    set_driver_state: float = 0.0
+    write_affinity_policy: float = 0.0
+    start_afterburner: float = 0.0
+    launch_subject: float = 0.0
+    stop_presentmon: float = 0.0
+    xperf: float = 0.0
+    terminate_children: float = 0.0
+    # time until a device reports that it started after being enabled
+    driver_start: float = 0.0
+    # time until the subject presents after being launched
+    subject_ready: float = 0.0
+    # fraction of the fixed waits (sleeps) and capture durations that is actually waited
+    time_scale: float = 0.0
+
+
+@dataclass
+class SimulatedSystem:
+    cpu_count: int = 8
+    gpu_count: int = 1
+    # mean frametime in milliseconds of the subject, each cpu adds a deterministic penalty to it
+    frametime: float = 2.0
+    cpu_penalty: list[float] = field(default_factory=list)
+    threads_per_core: int = 2
+    cores_per_cache: int = 4
+    # seconds after the subject is launched during which frametimes ramp down from 3x to the steady state
+    warmup: float = 0.0
+    seed: int = 0
+
+
+class SimulatedCapture:
+    """Writes a synthetic PresentMon csv log in the background like a running PresentMon instance."""
+
+    def __init__(self, args: list[str], frametimes: np.ndarray, output_file: str, duration: float) -> None:
+        self.args = args
+        self.returncode: int | None = None
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.write, args=(frametimes, output_file, duration), daemon=True)
+        self.thread.start()
+
+    def write(self, frametimes: np.ndarray, output_file: str, duration: float) -> None:
+        chunks = np.array_split(frametimes, max(1, int(duration * 10)))
+
+        with open(output_file, "w", encoding="utf-8") as file:
+            file.write(PRESENTMON_HEADER)
+
+            for chunk in chunks:
+                if self.stop_event.is_set():
+                    break
+
+                file.writelines(
+                    f"subject.exe,1000,0x0,DXGI,0,0,1,Hardware: Independent Flip,{frametime:.4f},0.0100\n"
+                    for frametime in chunk.tolist()
+                )
+                file.flush()
+
+                self.stop_event.wait(duration / len(chunks))
+
+        self.returncode = 0
+
+    def wait(self, timeout: float | None = None) -> int:
+        self.thread.join(timeout)
+
+        if self.thread.is_alive():
+            raise subprocess.TimeoutExpired(self.args, timeout or 0)
+
+        return self.returncode or 0
+
+    def terminate(self) -> None:
+        self.stop_event.set()
+
+
+class SimulatedBackend(Backend):
+    """Backend without any hardware access, used to run and time the session pipeline on any platform."""
+
+    def __init__(self, system: SimulatedSystem | None = None, latencies: Latencies | None = None) -> None:
+        self.system = system or SimulatedSystem()
+        self.latencies = latencies or Latencies()
+        self.rng = np.random.default_rng(self.system.seed)
+
+        self.policies: dict[str, int] = {}
+        # time at which each device started, or None while it is disabled
+        self.driver_started_at: dict[str, float | None] = {}
+        self.subject_ready_at: float | None = None
+        self.driver_restarts = 0
+        # devices are restarted concurrently
+        self.lock = threading.Lock()
+        # total duration of the fixed waits requested by the session, regardless of the time scale
+        self.requested_sleep = 0.0
+        # fixed waits requested since the subject was launched, the subject warms up during them
+        self.slept_since_launch = 0.0
+        self.captures: list[SimulatedCapture] = []
+        self.reports = 0
+        # mask that the post-processing is kept away from
+        self.background_mask: int | None = None
+
+    def delay(self, seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def is_admin(self) -> bool:
+        return True
+
+    def gpu_hwids(self) -> list[str]:
+        return [f"PCI\\VEN_0000&DEV_0000\\{index}" for index in range(self.system.gpu_count)]
+
+    def cpu_topology(self) -> topology.Topology:
+        cpus = list(range(self.system.cpu_count))
+        cache_size = self.system.threads_per_core * self.system.cores_per_cache
+
+        return topology.Topology(
+            [cpus[i : i + self.system.threads_per_core] for i in range(0, len(cpus), self.system.threads_per_core)],
+            [cpus[i : i + cache_size] for i in range(0, len(cpus), cache_size)],
+        )
+
+    def basic_display_start_type(self) -> int | None:
+        return 3
+
+    def set_driver_state(self, hwid: str, state: int) -> int:
+        self.delay(self.latencies.set_driver_state)
+
+        with self.lock:
+            if state == DRIVER_ENABLE:
+                self.driver_restarts += 1
+                self.driver_started_at[hwid] = time.monotonic() + self.latencies.driver_start
+            else:
+                self.driver_started_at[hwid] = None
+
+        return 0
+
+    def is_driver_started(self, hwid: str) -> bool:
+        started_at = self.driver_started_at.get(hwid, 0.0)
+        return started_at is not None and time.monotonic() >= started_at
+
+    def read_affinity_policy(self, hwid: str) -> int | None:
+        return self.policies.get(hwid)
+
+    def write_affinity_policy(self, hwid: str, mask: int) -> None:
+        self.delay(self.latencies.write_affinity_policy)
+        self.policies[hwid] = mask
+
+    def remove_affinity_policy(self, hwid: str) -> None:
+        self.delay(self.latencies.write_affinity_policy)
+        self.policies.pop(hwid, None)
+
+    def start_afterburner(self, path: str, profile: int) -> int:
+        self.delay(self.latencies.start_afterburner)
+        return 0
+
+    def launch_subject(self, binpath: str, args: list[str], affinity: int | None) -> None:
+        self.delay(self.latencies.launch_subject)
+        self.subject_ready_at = time.monotonic() + self.latencies.subject_ready
+        self.slept_since_launch = 0.0
+
+    def is_subject_presenting(self) -> bool:
+        return self.subject_ready_at is not None and time.monotonic() >= self.subject_ready_at
+
+    def current_cpus(self) -> list[int]:
+        # the subject performs according to the cpus that the driver affinity of the first gpu is assigned to
+        mask = next(iter(self.policies.values()), 1)
+        return topology.mask_to_cpus(mask)
+
+    def penalty(self, cpu: int) -> float:
+        return self.system.cpu_penalty[cpu] if cpu < len(self.system.cpu_penalty) else 0.05 * (cpu * 7 % 5)
+
+    def frametimes(self, duration: float) -> np.ndarray:
+        cpus = self.current_cpus()
+        penalty = sum(self.penalty(cpu) for cpu in cpus) / len(cpus)
+        mean = self.system.frametime * (1 + penalty)
+
+        frame_count = int(duration * 1000 / mean)
+        frametimes = self.rng.lognormal(np.log(mean), 0.3, size=frame_count)
+
+        # the part of the warm-up that has not passed while waiting for the cache duration
+        warmup_frames = min(frame_count, int(max(0.0, self.system.warmup - self.slept_since_launch) * 1000 / mean))
+        frametimes[:warmup_frames] *= np.linspace(3, 1, warmup_frames)
+
+        return frametimes
+
+    def start_presentmon(self, args: list[str], timeout: float | None = None) -> CaptureProcess:
+        duration = float(args[args.index("-timed") + 1])
+        output_file = args[args.index("-output_file") + 1]
+
+        capture = SimulatedCapture(
+            args,
+            self.frametimes(duration),
+            output_file,
+            duration * self.latencies.time_scale,
+        )
+        self.captures.append(capture)
+
+        return capture
+
+    def stop_presentmon(self, presentmon_path: str) -> None:
+        self.delay(self.latencies.stop_presentmon)
+
+        for capture in self.captures:
+            capture.terminate()
+
+    def xperf(self, location: str, args: list[str], quiet: bool = True, background: bool = False) -> None:
+        self.delay(self.latencies.xperf)
+
+        # create the artifacts that xperf would have written
+        for flag in ("-d", "-o"):
+            if flag in args:
+                with open(args[args.index(flag) + 1], "w", encoding="utf-8") as file:
+                    if flag == "-o" and "dpcisr" in args:
+                        # reports are generated in the background, the generator of the frametimes is not shared
+                        with self.lock:
+                            self.reports += 1
+                            rng = np.random.default_rng((self.system.seed, self.reports))
+
+                        file.write(dpcisr_report(rng))
+
+    def kill_processes(self, *targets: str) -> None:
+        pass
+
+    def terminate_children(self) -> None:
+        self.delay(self.latencies.terminate_children)
+
+        for capture in self.captures:
+            capture.terminate()
+
+        self.captures.clear()
+        self.subject_ready_at = None
+
+    def background_thread(self) -> None:
+        pass
+
+    def isolate_background(self, mask: int) -> None:
+        self.background_mask = mask
+
+    def sleep(self, seconds: float) -> None:
+        self.requested_sleep += seconds
+        self.slept_since_launch += seconds
+        self.delay(seconds * self.latencies.time_scale)
+
+    def remove_kernel_etl(self) -> None:
+        pass
@@ -0,0 +1,252 @@
+import json
+import logging
+import math
+import os
+from collections.abc import Sequence
+
+import framerate
+import framestore
+import numpy as np
+import numpy.typing as npt
+
+LOG_SKETCH = logging.getLogger("SKETCH")
+
+SKETCH_VERSION = 1
+
+# frames added at a time so that memory-mapped captures are never loaded entirely
+CHUNK_SIZE = 1 << 20
+
+# presents within the same timer tick (100ns) have a frametime of 0 ms, they are counted as one tick so that their
+# bucket and framerate are finite
+MIN_FRAMETIME = 1e-4
+
+# written next to each capture, e.g. CPU-3.sketch.json for CPU-3.bin
+SKETCH_EXTENSION = ".sketch.json"
+
+
+class FrametimeSketch:
+    """
+    Mergeable summary of frametimes in constant memory, provides the same metrics as framerate.Fps.
+
+    Frametimes are counted in logarithmically sized buckets and the exact sum of each bucket is kept. The maximum,
+    average, minimum and stdev are exact (up to floating-point rounding). Percentiles and lows are resolved to the
+    bucket that contains the exact frame and are within the relative accuracy of framerate.Fps (e.g. 0.01 is +/- 1%).
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+
+        self.counts: dict[int, int] = {}
+        self.sums: dict[int, float] = {}
+
+        self.length = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.fastest = math.inf
+
+        # mean and sum of squared deviations of the framerates, combined with chan et al.'s parallel algorithm
+        self.fps_mean = 0.0
+        self.fps_m2 = 0.0
+
+    def add(self, frametimes: Sequence[float] | npt.NDArray[np.floating]) -> None:
+        frametimes = np.asarray(frametimes)
+
+        for start in range(0, frametimes.size, CHUNK_SIZE):
+            self.add_chunk(np.asarray(frametimes[start : start + CHUNK_SIZE], dtype=np.float64))
+
+    def add_chunk(self, frametimes: npt.NDArray[np.float64]) -> None:
+        if frametimes.size == 0:
+            return
+
+        frametimes = np.maximum(frametimes, MIN_FRAMETIME)
+
+        keys = np.ceil(np.log(frametimes) / self.log_gamma).astype(np.int64)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse)
+        sums = np.bincount(inverse, weights=frametimes)
+
+        for key, count, total in zip(unique_keys.tolist(), counts.tolist(), sums.tolist()):
+            self.counts[key] = self.counts.get(key, 0) + count
+            self.sums[key] = self.sums.get(key, 0.0) + total
+
+        framerates = 1000 / frametimes
+        batch_mean = float(np.mean(framerates))
+
+        self.combine(
+            frametimes.size,
+            float(np.sum(frametimes)),
+            batch_mean,
+            float(np.sum(np.square(framerates - batch_mean))),
+        )
+
+        self.slowest = max(self.slowest, float(np.max(frametimes)))
+        self.fastest = min(self.fastest, float(np.min(frametimes)))
+
+    def combine(self, length: int, total: float, fps_mean: float, fps_m2: float) -> None:
+        combined_length = self.length + length
+        delta = fps_mean - self.fps_mean
+
+        self.fps_mean += delta * length / combined_length
+        self.fps_m2 += fps_m2 + delta**2 * self.length * length / combined_length
+
+        self.length = combined_length
+        self.total += total
+
+    def merge(self, other: "FrametimeSketch") -> None:
+        if other.gamma != self.gamma:
+            msg = "sketches with different relative accuracies can not be merged"
+            raise ValueError(msg)
+
+        if other.length == 0:
+            return
+
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+            self.sums[key] = self.sums.get(key, 0.0) + other.sums[key]
+
+        self.combine(other.length, other.total, other.fps_mean, other.fps_m2)
+
+        self.slowest = max(self.slowest, other.slowest)
+        self.fastest = min(self.fastest, other.fastest)
+
+    def value(self, key: int) -> float:
+        # midpoint of the bucket (gamma^(key-1), gamma^key] in terms of relative error
+        return 2 * self.gamma**key / (self.gamma + 1)
+
+    def lows_many(self, values: Sequence[float]) -> list[float]:
+        keys = sorted(self.sums, reverse=True)
+        # slowest frames first to match framerate.Fps
+        cumulative_sums = np.cumsum([self.sums[key] for key in keys])
+        indices = np.searchsorted(cumulative_sums, np.asarray(values, dtype=np.float64) / 100 * self.total)
+
+        return [1000 / self.value(keys[index]) if index < len(keys) else 0.0 for index in indices.tolist()]
+
+    def lows(self, value: float) -> float:
+        return self.lows_many((value,))[0]
+
+    def percentiles(self, values: Sequence[float]) -> list[float]:
+        keys = sorted(self.counts, reverse=True)
+        cumulative_counts = np.cumsum([self.counts[key] for key in keys])
+        targets = np.maximum(np.ceil(np.asarray(values, dtype=np.float64) / 100 * self.length), 1)
+        indices = np.searchsorted(cumulative_counts, targets)
+
+        return [1000 / self.value(keys[index]) if index < len(keys) else 0.0 for index in indices.tolist()]
+
+    def percentile(self, value: float) -> float:
+        return self.percentiles((value,))[0]
+
+    def stdev(self) -> float:
+        if self.length < 2:
+            return 0.0
+
+        # deviations are measured from the average framerate (not the mean of the framerates) like framerate.Fps
+        squared_deviations = self.fps_m2 + self.length * (self.fps_mean - self.average()) ** 2
+        return math.sqrt(squared_deviations / (self.length - 1))  # bessel's correction
+
+    def maximum(self) -> float:
+        return 1000 / self.fastest if self.length else 0.0
+
+    def minimum(self) -> float:
+        return 1000 / self.slowest if self.length else 0.0
+
+    def average(self) -> float:
+        return 1000 / (self.total / self.length) if self.length else 0.0
+
+    def results(self) -> dict[str, float]:
+        """Every metric in framerate.METRICS, stdev is negated like in the results of analysis.analyze_capture."""
+        return {
+            "maximum": self.maximum(),
+            "average": self.average(),
+            "minimum": self.minimum(),
+            "stdev": -self.stdev(),
+            **{
+                f"{metric}{value}": result
+                for metric, batch in (("percentile", self.percentiles), ("lows", self.lows_many))
+                for value, result in zip(framerate.METRIC_VALUES, batch(framerate.METRIC_VALUES))
+            },
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "version": SKETCH_VERSION,
+            "relative_accuracy": self.relative_accuracy,
+            "length": self.length,
+            "total": self.total,
+            "slowest": self.slowest,
+            "fastest": self.fastest if self.length else None,
+            "fps_mean": self.fps_mean,
+            "fps_m2": self.fps_m2,
+            # json keys are strings
+            "buckets": {str(key): [self.counts[key], self.sums[key]] for key in sorted(self.counts)},
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> "FrametimeSketch":
+        if data.get("version") != SKETCH_VERSION:
+            msg = "unsupported sketch version"
+            raise ValueError(msg)
+
+        sketch = FrametimeSketch(data["relative_accuracy"])
+        sketch.length = data["length"]
+        sketch.total = data["total"]
+        sketch.slowest = data["slowest"]
+        sketch.fastest = data["fastest"] if data["fastest"] is not None else math.inf
+        sketch.fps_mean = data["fps_mean"]
+        sketch.fps_m2 = data["fps_m2"]
+
+        for key, (count, total) in data["buckets"].items():
+            sketch.counts[int(key)] = count
+            sketch.sums[int(key)] = total
+
+        return sketch
+
+
+def sketch_path(capture_path: str) -> str:
+    return os.path.splitext(capture_path)[0] + SKETCH_EXTENSION
+
+
+def capture_fingerprint(capture_path: str) -> dict[str, int]:
+    stat = os.stat(capture_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def save_capture_sketch(
+    capture_path: str,
+    frametimes: npt.NDArray[np.floating],
+    relative_accuracy: float = 0.01,
+) -> FrametimeSketch:
+    """
+    Sketch of the frametimes of a capture excluding its warm-up, it is saved next to the capture so that sessions can
+    be aggregated without reading their frames again. Failing to save it (e.g. read-only folders) is not an error.
+    """
+    sketch = FrametimeSketch(relative_accuracy)
+    sketch.add(frametimes)
+
+    try:
+        with open(sketch_path(capture_path), "w", encoding="utf-8") as file:
+            json.dump(sketch.to_dict() | {"capture": capture_fingerprint(capture_path)}, file)
+    except OSError as e:
+        LOG_SKETCH.warning("unable to save sketch: %s", e)
+
+    return sketch
+
+
+def capture_sketch(capture_path: str, relative_accuracy: float = 0.01) -> FrametimeSketch:
+    """Saved sketch of a capture, it is only created again if the capture changed since it was saved."""
+    try:
+        with open(sketch_path(capture_path), encoding="utf-8") as file:
+            data = json.load(file)
+
+        if (
+            data.get("capture") == capture_fingerprint(capture_path)
+            and data.get("relative_accuracy") == relative_accuracy
+        ):
+            return FrametimeSketch.from_dict(data)
+    except (OSError, ValueError, KeyError, TypeError):
+        # missing, unreadable or from another version
+        pass
+
+    # binary frametime files are memory-mapped and added in chunks
+    return save_capture_sketch(capture_path, framestore.load_frametimes(capture_path), relative_accuracy)
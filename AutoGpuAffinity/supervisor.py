@@ -0,0 +1,216 @@
+import contextlib
+import logging
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+
+import psutil
+
+LOG_SUPERVISOR = logging.getLogger("SUPERVISOR")
+
+# seconds that a process tree is given to exit after being terminated before it is killed
+TERMINATE_GRACE = 3
+# seconds between the lookups of the processes started by a tracked child, e.g. a launcher that exits after starting
+# the actual subject, its processes are no longer found by their parent pid once it exited
+TRACK_INTERVAL = 1
+
+
+@dataclass
+class Child:
+    name: str
+    process: subprocess.Popen
+    # identifies the process (and its descendants) even after it exited and its pid was reused
+    handle: psutil.Process | None
+    watchdog: threading.Timer | None = None
+    timed_out: bool = False
+    # whether its descendants are looked up periodically rather than only when they are needed
+    tracked: bool = False
+    # every descendant that has been seen while its parent was running
+    descendants: dict[int, psutil.Process] = field(default_factory=dict)
+
+
+class Supervisor:
+    """
+    Launches child processes and tears down their process trees by pid. The descendants of a child are looked up by
+    their parent pid and recorded, so they are still found after their parent exited as long as they were seen while
+    it was running. No process is ever matched by its name. Children that exceed their timeout are terminated by a
+    watchdog so that a hung process can not stall the session.
+    """
+
+    def __init__(self, grace: float = TERMINATE_GRACE, track_interval: float = TRACK_INTERVAL) -> None:
+        self.grace = grace
+        self.track_interval = track_interval
+        self.children: list[Child] = []
+        # the watchdogs and the tracker access the children from their own threads
+        self.lock = threading.Lock()
+        self.tracker: threading.Thread | None = None
+
+    def launch(
+        self,
+        name: str,
+        args: list[str],
+        timeout: float | None = None,
+        affinity: list[int] | None = None,
+        track: bool = False,
+        **kwargs,
+    ) -> subprocess.Popen:
+        """
+        Starts a child restricted to the given cpus, the keyword arguments are passed to subprocess.Popen. The
+        descendants of tracked children are recorded every track_interval seconds until they are torn down.
+        """
+        process = subprocess.Popen(args, **kwargs)
+
+        try:
+            handle = psutil.Process(process.pid)
+
+            # processes started by the child inherit its affinity
+            if affinity is not None:
+                handle.cpu_affinity(affinity)
+        except psutil.NoSuchProcess:
+            handle = None
+
+        child = Child(name, process, handle, tracked=track)
+
+        if timeout is not None:
+            child.watchdog = threading.Timer(timeout, self.expire, (child, timeout))
+            child.watchdog.daemon = True
+            child.watchdog.start()
+
+        with self.lock:
+            self.children.append(child)
+
+            if track and self.tracker is None:
+                self.tracker = threading.Thread(target=self.track, name="supervisor", daemon=True)
+                self.tracker.start()
+
+        LOG_SUPERVISOR.debug("launched %s (pid %d)", name, process.pid)
+
+        return process
+
+    def run(
+        self,
+        name: str,
+        args: list[str],
+        timeout: float | None = None,
+        check: bool = False,
+        affinity: list[int] | None = None,
+        **kwargs,
+    ) -> int:
+        """Runs a child to completion, raises subprocess.CalledProcessError if check is set and it fails or times out."""
+        process = self.launch(name, args, timeout, affinity, **kwargs)
+
+        try:
+            returncode = process.wait()
+        finally:
+            # also tears down the child if waiting was interrupted
+            self.release(process)
+
+        if check and returncode != 0:
+            raise subprocess.CalledProcessError(returncode, args)
+
+        return returncode
+
+    def track(self) -> None:
+        while True:
+            time.sleep(self.track_interval)
+
+            with self.lock:
+                children = [child for child in self.children if child.tracked]
+
+            for child in children:
+                self.refresh(child)
+
+    def refresh(self, child: Child) -> list[psutil.Process]:
+        """Records the descendants of the child that are running and returns all of them."""
+        with self.lock:
+            descendants = dict(child.descendants)
+
+        # psutil compares the creation time, so a recorded process whose pid was reused is not running
+        running = [process for process in descendants.values() if process.is_running()]
+
+        if child.handle is not None and child.process.poll() is None:
+            parents = [child.handle]
+        else:
+            # the processes that were started by the exited child (or by its exited descendants)
+            parents = running
+
+        found = {process.pid: process for process in running}
+
+        for parent in parents:
+            with contextlib.suppress(psutil.Error):
+                found.update((process.pid, process) for process in parent.children(recursive=True))
+
+        with self.lock:
+            child.descendants = found
+
+        return list(found.values())
+
+    def expire(self, child: Child, timeout: float) -> None:
+        if child.process.poll() is not None:
+            return
+
+        LOG_SUPERVISOR.error("%s did not exit within %ss, terminating it", child.name, timeout)
+        child.timed_out = True
+        self.stop(child)
+
+    def stop(self, child: Child) -> None:
+        if child.watchdog is not None:
+            child.watchdog.cancel()
+
+        # includes the recorded descendants of a child that already exited (e.g. a launcher)
+        descendants = self.refresh(child)
+
+        # the child itself is stopped through popen so that its return code is kept
+        if child.process.poll() is None:
+            child.process.terminate()
+
+        for descendant in descendants:
+            with contextlib.suppress(psutil.NoSuchProcess):
+                descendant.terminate()
+
+        try:
+            child.process.wait(self.grace)
+        except subprocess.TimeoutExpired:
+            child.process.kill()
+            child.process.wait()
+
+        _, alive = psutil.wait_procs(descendants, timeout=self.grace)
+
+        for descendant in alive:
+            with contextlib.suppress(psutil.NoSuchProcess):
+                descendant.kill()
+
+    def release(self, process: subprocess.Popen) -> None:
+        """Tears down the tree of a child if it is still running and stops tracking it."""
+        with self.lock:
+            children = [child for child in self.children if child.process is process]
+            self.children = [child for child in self.children if child.process is not process]
+
+        for child in children:
+            self.stop(child)
+
+    def terminate(self, *names: str) -> None:
+        """Tears down the trees of the children with the given names, every child if no name is given."""
+        with self.lock:
+            children = [child for child in self.children if not names or child.name in names]
+            self.children = [child for child in self.children if child not in children]
+
+        for child in children:
+            LOG_SUPERVISOR.debug("terminating %s (pid %d)", child.name, child.process.pid)
+            self.stop(child)
+
+    def pids(self, name: str) -> set[int]:
+        """Pids of the running children with the given name and their descendants."""
+        with self.lock:
+            children = [child for child in self.children if child.name == name]
+
+        pids: set[int] = set()
+
+        for child in children:
+            if child.process.poll() is None:
+                pids.add(child.process.pid)
+
+            pids.update(process.pid for process in self.refresh(child))
+
+        return pids
@@ -0,0 +1,128 @@
+import json
+import struct
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+# LOGICAL_PROCESSOR_RELATIONSHIP values of SYSTEM_LOGICAL_PROCESSOR_INFORMATION_EX
+RELATION_PROCESSOR_CORE = 0
+RELATION_CACHE = 2
+
+
+@dataclass
+class Topology:
+    # logical processors of each physical core, more than one implies smt
+    cores: list[list[int]]
+    # logical processors sharing each last level cache (e.g. a ccx)
+    caches: list[list[int]]
+
+    def restrict(self, mask: int) -> "Topology":
+        """Topology with only the logical processors in the mask (e.g. custom_cpus)."""
+        cores = [cpus for core in self.cores if (cpus := [cpu for cpu in core if mask >> cpu & 1])]
+        caches = [cpus for cache in self.caches if (cpus := [cpu for cpu in cache if mask >> cpu & 1])]
+        return Topology(cores, caches)
+
+
+def cpus_to_mask(cpus: Iterable[int]) -> int:
+    mask = 0
+
+    for cpu in cpus:
+        mask |= 1 << cpu
+
+    return mask
+
+
+def mask_to_cpus(mask: int) -> list[int]:
+    return [cpu for cpu in range(mask.bit_length()) if mask >> cpu & 1]
+
+
+def mask_label(mask: int) -> str:
+    """Label used in file names and the results, a single cpu is labeled with its index e.g. "3" or "0,1"."""
+    return ",".join(str(cpu) for cpu in mask_to_cpus(mask))
+
+
+def load_topology(path: str) -> Topology:
+    """
+    Reads a topology from a json file, e.g. {"cores": [[0, 1], [2, 3]], "caches": [[0, 1, 2, 3]]} describes a
+    single ccx with two smt cores.
+    """
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+
+    topology = Topology(data["cores"], data.get("caches", []))
+
+    cpus = [cpu for core in topology.cores for cpu in core]
+
+    if len(cpus) != len(set(cpus)):
+        msg = f"logical processors are assigned to multiple cores in {path}"
+        raise ValueError(msg)
+
+    return topology
+
+
+def parse_processor_information(buffer: bytes) -> Topology:
+    """Parses the SYSTEM_LOGICAL_PROCESSOR_INFORMATION_EX records of GetLogicalProcessorInformationEx (group 0)."""
+    cores: list[list[int]] = []
+    caches: dict[int, list[list[int]]] = {}
+
+    offset = 0
+
+    while offset < len(buffer):
+        relationship, size = struct.unpack_from("<II", buffer, offset)
+
+        if relationship == RELATION_PROCESSOR_CORE:
+            # PROCESSOR_RELATIONSHIP, the first GROUP_AFFINITY is at offset 24
+            group_mask, group = struct.unpack_from("<QH", buffer, offset + 8 + 24)
+            if group == 0:
+                cores.append(mask_to_cpus(group_mask))
+        elif relationship == RELATION_CACHE:
+            # CACHE_RELATIONSHIP, the first GROUP_AFFINITY is at offset 32
+            level = struct.unpack_from("<B", buffer, offset + 8)[0]
+            group_mask, group = struct.unpack_from("<QH", buffer, offset + 8 + 32)
+            if group == 0:
+                cache = mask_to_cpus(group_mask)
+                # the data and instruction caches of a level share the same processors
+                if cache not in caches.setdefault(level, []):
+                    caches[level].append(cache)
+
+        offset += size
+
+    # only the last level cache is relevant, it is shared by a ccx or the entire package
+    return Topology(sorted(cores), sorted(caches[max(caches)]) if caches else [])
+
+
+def candidate_masks(topology: Topology, system_mask: int | None = None) -> list[int]:
+    """
+    Affinity masks worth benchmarking, built from the topology rather than every combination of cpus. Candidates that
+    are equivalent (e.g. a core pair without smt is the single core) are only benchmarked once. The system mask is
+    every logical processor of the system, the topology may be restricted to some of them (e.g. custom_cpus).
+    """
+    all_cpus = cpus_to_mask(cpu for core in topology.cores for cpu in core)
+
+    if system_mask is None:
+        system_mask = all_cpus
+    # the first logical processor of each core, excludes smt siblings
+    primary_cpus = [core[0] for core in topology.cores]
+
+    candidates: list[int] = []
+
+    # each physical core with its smt siblings
+    candidates.extend(cpus_to_mask(core) for core in topology.cores)
+
+    for cache in topology.caches:
+        cache_mask = cpus_to_mask(cache)
+        # every logical processor local to the cache and only the primary ones
+        candidates.append(cache_mask)
+        candidates.append(cpus_to_mask(cpu for cpu in primary_cpus if cache_mask >> cpu & 1))
+
+    # primary logical processors of the entire package
+    candidates.append(cpus_to_mask(primary_cpus))
+
+    pruned: list[int] = []
+
+    for mask in candidates:
+        # every processor of the system is equivalent to not assigning an affinity at all
+        if mask not in (0, system_mask) and mask not in pruned:
+            pruned.append(mask)
+
+    # e.g. a single core without smt
+    return pruned or [all_cpus]
@@ -0,0 +1,132 @@
+import contextlib
+import glob
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from collections.abc import Iterator
+
+LOG_TRACING = logging.getLogger("TRACING")
+
+TRACE_FILE = "trace.json"
+
+# categories of the events, only the phases of the benchmark loop itself are used to estimate sessions
+CATEGORY_BENCHMARK = "benchmark"
+CATEGORY_PHASE = "phase"
+CATEGORY_BACKGROUND = "background"
+
+# number of previous sessions that the estimate is based on
+HISTORY_SESSIONS = 10
+
+
+class Tracer:
+    """
+    Records the phases of a session as complete events in the trace event format, the trace file can be opened in
+    chrome://tracing or https://ui.perfetto.dev. A resumed session continues the trace of its directory.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.events: list[dict] = []
+        self.pid = os.getpid()
+        # threads that have been named in the trace
+        self.threads: set[int] = set()
+        # phases are also recorded by the background post-processing
+        self.lock = threading.Lock()
+
+        try:
+            with open(path, encoding="utf-8") as file:
+                self.events = json.load(file)["traceEvents"]
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError):
+            LOG_TRACING.warning("ignoring unreadable trace %s", path)
+
+    @contextlib.contextmanager
+    def phase(self, name: str, category: str = CATEGORY_PHASE, **args: str | float) -> Iterator[None]:
+        # wall clock timestamps so that the events of a resumed session line up with the previous ones
+        start = time.time_ns()
+
+        try:
+            yield
+        finally:
+            end = time.time_ns()
+            self.add(
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": start / 1000,
+                    "dur": (end - start) / 1000,
+                    "pid": self.pid,
+                    "tid": threading.get_native_id(),
+                    "args": args,
+                },
+            )
+
+    def add(self, event: dict) -> None:
+        with self.lock:
+            if (tid := event["tid"]) not in self.threads:
+                self.threads.add(tid)
+                # shows the name of the thread (e.g. the post-processing workers) instead of its id
+                self.events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": event["pid"],
+                        "tid": tid,
+                        "args": {"name": threading.current_thread().name},
+                    },
+                )
+
+            self.events.append(event)
+
+    def save(self) -> None:
+        if directory := os.path.dirname(self.path):
+            os.makedirs(directory, exist_ok=True)
+
+        with self.lock:
+            trace = {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+
+        temp_path = f"{self.path}.tmp"
+
+        try:
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump(trace, file)
+
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            LOG_TRACING.warning("unable to save trace %s: %s", self.path, e)
+
+
+def phase_history(captures_directory: str, sessions: int = HISTORY_SESSIONS) -> tuple[dict[str, float], int]:
+    """
+    Median duration in seconds of each phase of the benchmark loop across the traces of the most recent sessions and
+    the number of sessions that they were recorded in.
+    """
+    paths = sorted(glob.glob(os.path.join(captures_directory, "*", TRACE_FILE)), key=os.path.getmtime)[-sessions:]
+
+    durations: dict[str, list[float]] = {}
+    recorded_sessions = 0
+
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as file:
+                events = json.load(file)["traceEvents"]
+        except (OSError, ValueError, KeyError, TypeError):
+            continue
+
+        recorded_sessions += 1
+
+        for event in events:
+            if event.get("ph") == "X" and event.get("cat") == CATEGORY_PHASE:
+                durations.setdefault(event["name"], []).append(event["dur"] / 1e6)
+
+    return {name: statistics.median(values) for name, values in durations.items()}, recorded_sessions
+
+
+def estimate_overhead(history: dict[str, float], defaults: dict[str, float]) -> float:
+    """Time in seconds spent per benchmark excluding the capture, phases that have not been recorded use the default."""
+    return sum(history.get(phase, default) for phase, default in defaults.items())
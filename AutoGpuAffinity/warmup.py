@@ -0,0 +1,37 @@
+import numpy as np
+import numpy.typing as npt
+
+# frames averaged into each batch, batching smooths out single stutters (MSER-5)
+BATCH_SIZE = 5
+
+
+def detect_warmup(frametimes: npt.NDArray[np.floating], max_fraction: float = 0.5) -> int:
+    """
+    Number of frames at the start of a capture before the frametimes reach a steady state (e.g. while shaders are
+    compiled and caches are filled), 0 if there is no warm-up.
+
+    Uses the marginal standard error rule (MSER-5): the truncation point is the one that minimizes the standard error
+    of the mean of the remaining batch means, a warm-up prefix inflates it because it deviates from the steady state.
+    Only the first max_fraction of the capture is considered as the statistic is unreliable for short tails.
+    """
+    batch_count = len(frametimes) // BATCH_SIZE
+
+    if batch_count < 2:
+        return 0
+
+    batches = np.asarray(frametimes[: batch_count * BATCH_SIZE], dtype=np.float64).reshape(batch_count, BATCH_SIZE)
+    batch_means = batches.mean(axis=1)
+    # centered so that the sums of squares do not lose precision
+    batch_means -= batch_means.mean()
+
+    # sums over the batches from each truncation point to the end of the capture
+    remaining = np.arange(batch_count, 0, -1, dtype=np.float64)
+    suffix_sums = np.cumsum(batch_means[::-1])[::-1]
+    suffix_squares = np.cumsum(np.square(batch_means)[::-1])[::-1]
+
+    squared_deviations = np.maximum(suffix_squares - np.square(suffix_sums) / remaining, 0)
+    mser = squared_deviations / np.square(remaining)
+
+    last_candidate = max(0, min(batch_count - 2, int(batch_count * max_fraction)))
+
+    return int(np.argmin(mser[: last_candidate + 1])) * BATCH_SIZE
@@ -0,0 +1,327 @@
+import contextlib
+import ctypes
+import ctypes.wintypes
+import logging
+import os
+import subprocess
+import threading
+import time
+import winreg
+
+import cfgmgr32
+import psutil
+import readiness
+import setupapi
+import supervisor
+import topology
+import wmi
+from backend import Backend, CaptureProcess
+
+LOG_BACKEND = logging.getLogger("BACKEND")
+
+user32 = ctypes.windll.user32
+kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+
+RELATION_ALL = 0xFFFF
+
+kernel32.GetLogicalProcessorInformationEx.argtypes = [
+    ctypes.c_int,
+    ctypes.c_void_p,
+    ctypes.POINTER(ctypes.wintypes.DWORD),
+]
+kernel32.GetLogicalProcessorInformationEx.restype = ctypes.wintypes.BOOL
+
+THREAD_PRIORITY_LOWEST = -2
+THREAD_SET_INFORMATION = 0x0020
+THREAD_QUERY_INFORMATION = 0x0040
+
+kernel32.GetCurrentThread.restype = ctypes.wintypes.HANDLE
+kernel32.SetThreadPriority.argtypes = [ctypes.wintypes.HANDLE, ctypes.c_int]
+kernel32.SetThreadPriority.restype = ctypes.wintypes.BOOL
+kernel32.OpenThread.argtypes = [ctypes.wintypes.DWORD, ctypes.wintypes.BOOL, ctypes.wintypes.DWORD]
+kernel32.OpenThread.restype = ctypes.wintypes.HANDLE
+kernel32.SetThreadAffinityMask.argtypes = [ctypes.wintypes.HANDLE, ctypes.c_size_t]
+kernel32.SetThreadAffinityMask.restype = ctypes.c_size_t
+kernel32.CloseHandle.argtypes = [ctypes.wintypes.HANDLE]
+kernel32.CloseHandle.restype = ctypes.wintypes.BOOL
+
+WNDENUMPROC = ctypes.WINFUNCTYPE(ctypes.wintypes.BOOL, ctypes.wintypes.HWND, ctypes.wintypes.LPARAM)
+
+# seconds after which the watchdog terminates each tool
+AFTERBURNER_TIMEOUT = 5
+TERMINATE_PRESENTMON_TIMEOUT = 10
+# merging the trace and generating reports scales with the duration of the trace
+XPERF_TIMEOUT = 600
+
+
+class WindowsBackend(Backend):
+    def __init__(self) -> None:
+        self.supervisor = supervisor.Supervisor()
+        # post-processing threads and the cpus that they are restricted to, None while nothing is benchmarked
+        self.background_threads: list[tuple[threading.Thread, int]] = []
+        self.background_mask: int | None = None
+        self.lock = threading.Lock()
+
+    def is_admin(self) -> bool:
+        return ctypes.windll.shell32.IsUserAnAdmin()
+
+    def gpu_hwids(self) -> list[str]:
+        return [gpu.PnPDeviceID for gpu in wmi.WMI().Win32_VideoController()]
+
+    def cpu_topology(self) -> topology.Topology:
+        length = ctypes.wintypes.DWORD()
+
+        # the first call only retrieves the required buffer size
+        kernel32.GetLogicalProcessorInformationEx(RELATION_ALL, None, ctypes.byref(length))
+        buffer = ctypes.create_string_buffer(length.value)
+
+        if not kernel32.GetLogicalProcessorInformationEx(RELATION_ALL, buffer, ctypes.byref(length)):
+            raise ctypes.WinError(ctypes.get_last_error())
+
+        return topology.parse_processor_information(buffer.raw[: length.value])
+
+    def basic_display_start_type(self) -> int | None:
+        try:
+            with winreg.OpenKey(
+                winreg.HKEY_LOCAL_MACHINE,
+                "SYSTEM\\CurrentControlSet\\Services\\BasicDisplay",
+                0,
+                winreg.KEY_READ | winreg.KEY_WOW64_64KEY,
+            ) as key:
+                return winreg.QueryValueEx(key, "Start")[0]
+        except FileNotFoundError:
+            return None
+
+    def set_driver_state(self, hwid: str, state: int) -> int:
+        device_info_handle = setupapi.SetupDiGetClassDevsW(
+            None, ctypes.c_wchar_p(hwid), None, setupapi.DIGCF_ALLCLASSES | setupapi.DIGCF_DEVICEINTERFACE
+        )
+
+        if device_info_handle == -1:
+            LOG_BACKEND.error(f"SetupDiGetClassDevsW failed: {ctypes.GetLastError()}")
+            return 1
+
+        dev_info_data = setupapi.SP_DEVINFO_DATA()
+        dev_info_data.cbSize = ctypes.sizeof(setupapi.SP_DEVINFO_DATA)
+
+        if not setupapi.SetupDiEnumDeviceInfo(device_info_handle, 0, ctypes.byref(dev_info_data)):
+            LOG_BACKEND.error(f"SetupDiEnumDeviceInfo failed: {ctypes.GetLastError()}")
+            return 1
+
+        params = setupapi.SP_PROPCHANGE_PARAMS()
+
+        params.ClassInstallHeader.cbSize = ctypes.sizeof(params.ClassInstallHeader)
+        params.ClassInstallHeader.InstallFunction = setupapi.DIF_PROPERTYCHANGE
+        params.StateChange = state
+        params.Scope = setupapi.DICS_FLAG_GLOBAL
+        params.HwProfile = 0
+
+        if not setupapi.SetupDiSetClassInstallParamsA(
+            device_info_handle,
+            ctypes.byref(dev_info_data),
+            ctypes.byref(params.ClassInstallHeader),
+            ctypes.sizeof(params),
+        ):
+            LOG_BACKEND.error(f"SetupDiSetClassInstallParamsA failed: {ctypes.GetLastError()}")
+            return 1
+
+        if not setupapi.SetupDiCallClassInstaller(
+            setupapi.DIF_PROPERTYCHANGE, device_info_handle, ctypes.byref(dev_info_data)
+        ):
+            LOG_BACKEND.error(f"SetupDiCallClassInstaller failed: {ctypes.GetLastError()}")
+            return 1
+
+        return 0
+
+    def is_driver_started(self, hwid: str) -> bool:
+        dev_inst = ctypes.wintypes.DWORD()
+
+        if cfgmgr32.CM_Locate_DevNodeW(ctypes.byref(dev_inst), hwid, cfgmgr32.CM_LOCATE_DEVNODE_NORMAL) != 0:
+            return False
+
+        status = ctypes.wintypes.ULONG()
+        problem_number = ctypes.wintypes.ULONG()
+
+        if (
+            cfgmgr32.CM_Get_DevNode_Status(ctypes.byref(status), ctypes.byref(problem_number), dev_inst, 0)
+            != cfgmgr32.CR_SUCCESS
+        ):
+            return False
+
+        return bool(status.value & cfgmgr32.DN_STARTED)
+
+    @staticmethod
+    def policy_path(hwid: str) -> str:
+        return f"SYSTEM\\ControlSet001\\Enum\\{hwid}\\Device Parameters\\Interrupt Management\\Affinity Policy"
+
+    def read_affinity_policy(self, hwid: str) -> int | None:
+        try:
+            with winreg.OpenKey(
+                winreg.HKEY_LOCAL_MACHINE,
+                WindowsBackend.policy_path(hwid),
+                0,
+                winreg.KEY_READ | winreg.KEY_WOW64_64KEY,
+            ) as key:
+                device_policy, _ = winreg.QueryValueEx(key, "DevicePolicy")
+                assignment_set, _ = winreg.QueryValueEx(key, "AssignmentSetOverride")
+        except FileNotFoundError:
+            return None
+
+        # only IrqPolicySpecifiedProcessors uses AssignmentSetOverride
+        if device_policy != 4 or not isinstance(assignment_set, bytes):
+            return None
+
+        return int.from_bytes(assignment_set, "little")
+
+    def write_affinity_policy(self, hwid: str, mask: int) -> None:
+        le_hex = mask.to_bytes(8, "little").rstrip(b"\x00")
+
+        with winreg.CreateKey(winreg.HKEY_LOCAL_MACHINE, WindowsBackend.policy_path(hwid)) as key:
+            winreg.SetValueEx(key, "DevicePolicy", 0, winreg.REG_DWORD, 4)
+            winreg.SetValueEx(
+                key,
+                "AssignmentSetOverride",
+                0,
+                winreg.REG_BINARY,
+                le_hex,
+            )
+
+    def remove_affinity_policy(self, hwid: str) -> None:
+        try:
+            with winreg.OpenKey(
+                winreg.HKEY_LOCAL_MACHINE,
+                WindowsBackend.policy_path(hwid),
+                0,
+                winreg.KEY_SET_VALUE | winreg.KEY_WOW64_64KEY,
+            ) as key:
+                winreg.DeleteValue(key, "DevicePolicy")
+                winreg.DeleteValue(key, "AssignmentSetOverride")
+        except FileNotFoundError:
+            LOG_BACKEND.debug("affinity policy has already been removed for %s", hwid)
+
+    def start_afterburner(self, path: str, profile: int) -> int:
+        # /Q exits afterburner once the profile has been applied, the watchdog terminates it otherwise
+        process = self.supervisor.launch("afterburner", [path, f"/Profile{profile}", "/Q"], AFTERBURNER_TIMEOUT)
+        applied = readiness.wait_until(
+            lambda: process.poll() is not None,
+            AFTERBURNER_TIMEOUT,
+            "afterburner profile applied",
+        )
+        self.supervisor.release(process)
+
+        return 0 if applied else 1
+
+    def launch_subject(self, binpath: str, args: list[str], affinity: int | None) -> None:
+        # a console of its own like start, ctrl+c in the console of the session is not sent to the subject
+        self.supervisor.launch(
+            "subject",
+            [binpath, *args],
+            affinity=topology.mask_to_cpus(affinity) if affinity is not None else None,
+            # the subject may be a launcher that exits once it started the actual subject
+            track=True,
+            creationflags=subprocess.CREATE_NEW_CONSOLE,
+        )
+
+    def is_subject_presenting(self) -> bool:
+        pids = self.supervisor.pids("subject")
+
+        if not pids:
+            return False
+
+        found = False
+
+        def callback(hwnd: int, _: int) -> bool:
+            nonlocal found
+
+            pid = ctypes.wintypes.DWORD()
+            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+
+            if pid.value in pids and user32.IsWindowVisible(hwnd):
+                found = True
+                return False  # stop enumerating
+
+            return True
+
+        user32.EnumWindows(WNDENUMPROC(callback), 0)
+
+        return found
+
+    def start_presentmon(self, args: list[str], timeout: float | None = None) -> CaptureProcess:
+        return self.supervisor.launch(
+            "presentmon",
+            args,
+            timeout,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def stop_presentmon(self, presentmon_path: str) -> None:
+        # ends the realtime trace session so that the running instance flushes its csv log and exits
+        self.supervisor.run(
+            "presentmon terminate",
+            [presentmon_path, "-terminate_existing"],
+            TERMINATE_PRESENTMON_TIMEOUT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def xperf(self, location: str, args: list[str], quiet: bool = True, background: bool = False) -> None:
+        background_mask = self.background_mask if background else None
+
+        self.supervisor.run(
+            "xperf background" if background else "xperf",
+            [location, *args],
+            XPERF_TIMEOUT,
+            check=True,
+            affinity=topology.mask_to_cpus(background_mask) if background_mask is not None else None,
+            creationflags=subprocess.IDLE_PRIORITY_CLASS if background else 0,
+            stdout=subprocess.DEVNULL if quiet else None,
+            stderr=subprocess.DEVNULL if quiet else None,
+        )
+
+    def kill_processes(self, *targets: str) -> None:
+        targets_set = set(targets)
+
+        for process in psutil.process_iter(["name"]):
+            if (process.info["name"] or "").lower() in targets_set:
+                with contextlib.suppress(psutil.NoSuchProcess):
+                    process.kill()
+
+    def terminate_children(self) -> None:
+        self.supervisor.terminate("subject", "presentmon", "afterburner")
+
+    def background_thread(self) -> None:
+        thread = kernel32.GetCurrentThread()
+        kernel32.SetThreadPriority(thread, THREAD_PRIORITY_LOWEST)
+
+        with self.lock:
+            self.background_threads.append((threading.current_thread(), threading.get_native_id()))
+
+            if self.background_mask is not None:
+                kernel32.SetThreadAffinityMask(thread, self.background_mask)
+
+    def isolate_background(self, mask: int) -> None:
+        all_cpus = topology.cpus_to_mask(range(psutil.cpu_count()))
+        # the post-processing shares the cpus if every cpu is benchmarked at once
+        background_mask = all_cpus & ~mask or all_cpus
+
+        with self.lock:
+            self.background_mask = background_mask
+            # the ids of exited threads may have been reused
+            self.background_threads = [(thread, tid) for thread, tid in self.background_threads if thread.is_alive()]
+
+            for _, thread_id in self.background_threads:
+                if handle := kernel32.OpenThread(THREAD_SET_INFORMATION | THREAD_QUERY_INFORMATION, False, thread_id):
+                    kernel32.SetThreadAffinityMask(handle, background_mask)
+                    kernel32.CloseHandle(handle)
+
+        for pid in self.supervisor.pids("xperf background"):
+            with contextlib.suppress(psutil.Error):
+                psutil.Process(pid).cpu_affinity(topology.mask_to_cpus(background_mask))
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+    def remove_kernel_etl(self) -> None:
+        if os.path.exists("C:\\kernel.etl"):
+            os.remove("C:\\kernel.etl")
@@ -0,0 +1,356 @@
+"""
+Times the analysis hot path (framerate.Fps, capture loading and the multi-CPU analysis of display_results) on synthetic
+frametimes and the cold start of the command line, so that regressions can be measured between commits. Wall time is
+the best of --repeat runs and memory is the peak traced by tracemalloc during a separate run.
+
+python benchmarks/analysis_suite.py --sizes 1e3 1e5 1e7 --output results.json
+python benchmarks/analysis_suite.py --baseline results.json --max-regression 1.2
+
+Sizes of 1e8 frames require roughly 4 GB of memory.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+
+import numpy as np
+import numpy.typing as npt
+
+PROGRAM_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AutoGpuAffinity")
+
+sys.path.insert(0, PROGRAM_DIRECTORY)
+
+import analysis
+import framerate
+import framestore
+import metric_cache
+import presentmon
+import sketch
+
+# mean frametime of the generated distributions in milliseconds (144 fps)
+FRAMETIME = 1000 / 144
+
+# frames generated at a time so that large sizes do not hold float64 temporaries of the entire array
+CHUNK_SIZE = 10_000_000
+
+
+def steady(rng: np.random.Generator, size: int) -> npt.NDArray[np.float64]:
+    return rng.normal(FRAMETIME, 0.3, size)
+
+
+def stuttery(rng: np.random.Generator, size: int) -> npt.NDArray[np.float64]:
+    frametimes = steady(rng, size)
+    # 1% of frames take 3 to 10 times longer
+    stutters = rng.random(size) < 0.01
+    frametimes[stutters] *= rng.uniform(3, 10, np.count_nonzero(stutters))
+    return frametimes
+
+
+def bimodal(rng: np.random.Generator, size: int) -> npt.NDArray[np.float64]:
+    # e.g. alternating between a gpu and cpu bound scene
+    return np.where(rng.random(size) < 0.7, rng.normal(FRAMETIME, 0.3, size), rng.normal(FRAMETIME * 2.4, 0.5, size))
+
+
+def long_tail(rng: np.random.Generator, size: int) -> npt.NDArray[np.float64]:
+    return FRAMETIME * 0.8 + rng.pareto(2.5, size) * FRAMETIME * 0.3
+
+
+DISTRIBUTIONS: dict[str, Callable[[np.random.Generator, int], npt.NDArray[np.float64]]] = {
+    "steady": steady,
+    "stuttery": stuttery,
+    "bimodal": bimodal,
+    "long_tail": long_tail,
+}
+
+
+def generate(distribution: str, size: int, seed: int = 0) -> npt.NDArray[np.float32]:
+    rng = np.random.default_rng(seed)
+    frametimes = np.empty(size, dtype=np.float32)
+
+    for start in range(0, size, CHUNK_SIZE):
+        end = min(start + CHUNK_SIZE, size)
+        # presentmon never reports non-positive frametimes
+        frametimes[start:end] = np.clip(DISTRIBUTIONS[distribution](rng, end - start), 0.01, None)
+
+    return frametimes
+
+
+def write_csv(path: str, frametimes: npt.NDArray[np.floating]) -> None:
+    # surrounding columns so that the column projection of the loader is exercised
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("Application,ProcessID,SwapChainAddress,Runtime,msBetweenPresents,msInPresentAPI\n")
+
+        for start in range(0, len(frametimes), CHUNK_SIZE):
+            chunk = frametimes[start : start + CHUNK_SIZE]
+            file.writelines(
+                f"lava-triangle.exe,1234,0x000001,Vulkan,{frametime:.4f},0.0500\n" for frametime in chunk.tolist()
+            )
+
+
+def measure(fn: Callable[[], object], repeat: int, trace_memory: bool) -> dict[str, float | int | None]:
+    times: list[float] = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    peak_bytes = None
+
+    # numpy reports its allocations to tracemalloc, a separate run keeps the overhead of tracing out of the timings
+    if trace_memory:
+        tracemalloc.start()
+        fn()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {"seconds": min(times), "peak_bytes": peak_bytes}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        "--sizes",
+        type=float,
+        nargs="+",
+        default=[1e3, 1e4, 1e5, 1e6, 1e7],
+        help="number of frames of each capture, up to 1e8",
+    )
+    parser.add_argument(
+        "--distributions",
+        nargs="+",
+        choices=list(DISTRIBUTIONS),
+        default=list(DISTRIBUTIONS),
+        help="synthetic frametime distributions",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs of each operation, the fastest is reported")
+    parser.add_argument("--bootstrap-resamples", type=int, default=1000, help="0 skips the bootstrap")
+    parser.add_argument(
+        "--bootstrap-max-size",
+        type=float,
+        default=1e7,
+        help="largest capture the bootstrap is timed on",
+    )
+    parser.add_argument("--csv-max-size", type=float, default=1e6, help="largest capture csv loading is timed on")
+    parser.add_argument("--cpus", type=int, default=8, help="number of captures of the multi-cpu analysis")
+    parser.add_argument("--cpu-size", type=float, default=1e5, help="number of frames of each multi-cpu capture")
+    parser.add_argument("--workers", type=int, help="processes used by the multi-cpu analysis")
+    parser.add_argument("--no-memory", action="store_true", help="skip the memory measurements")
+    parser.add_argument("--output", metavar="<file>", type=str, help="write the report to a json file")
+    parser.add_argument("--baseline", metavar="<file>", type=str, help="report of a previous run to compare against")
+    parser.add_argument(
+        "--max-regression",
+        metavar="<ratio>",
+        type=float,
+        help="exit with an error if an operation is slower than the baseline by more than this ratio",
+    )
+
+    return parser.parse_args()
+
+
+def run_capture_benchmarks(args: argparse.Namespace, directory: str) -> list[dict]:
+    results: list[dict] = []
+    trace_memory = not args.no_memory
+
+    for size in (int(size) for size in args.sizes):
+        # large captures take long enough for a single run to be representative
+        repeat = args.repeat if size < 10_000_000 else 1
+
+        for distribution in args.distributions:
+            frametimes = generate(distribution, size)
+
+            def record(
+                name: str,
+                fn: Callable[[], object],
+                distribution: str = distribution,
+                size: int = size,
+                repeat: int = repeat,
+            ) -> None:
+                result = {"name": name, "distribution": distribution, "size": size}
+                result.update(measure(fn, repeat, trace_memory))
+                results.append(result)
+
+                print(f"{name:<24}{distribution:<12}{size:<12}{result['seconds']:.6f}s", file=sys.stderr)
+
+            record("fps.construct", lambda frametimes=frametimes: framerate.Fps(frametimes))
+
+            fps = framerate.Fps(frametimes)
+
+            record("fps.maximum", fps.maximum)
+            record("fps.average", fps.average)
+            record("fps.minimum", fps.minimum)
+            record("fps.stdev", fps.stdev)
+            record("fps.percentiles", lambda fps=fps: fps.percentiles(framerate.METRIC_VALUES))
+            record("fps.lows", lambda fps=fps: fps.lows_many(framerate.METRIC_VALUES))
+
+            if 0 < args.bootstrap_resamples and size <= args.bootstrap_max_size:
+                record("fps.bootstrap", lambda fps=fps: fps.bootstrap(args.bootstrap_resamples))
+
+            del fps
+
+            record("sketch.add", lambda frametimes=frametimes: sketch.FrametimeSketch().add(frametimes))
+
+            bin_path = os.path.join(directory, "capture.bin")
+            framestore.write_frametimes(bin_path, frametimes, framestore.Header("1.10.0", "lava-triangle", 0, size))
+
+            # the memory-mapped file is only read once it is accessed
+            record("load.bin", lambda bin_path=bin_path: np.sum(framestore.load_frametimes(bin_path)))
+
+            if size <= args.csv_max_size:
+                csv_path = os.path.join(directory, "capture.csv")
+                write_csv(csv_path, frametimes)
+                record("load.csv", lambda csv_path=csv_path: presentmon.read_frametimes(csv_path))
+                os.remove(csv_path)
+
+            record(
+                "analyze_capture",
+                lambda bin_path=bin_path: analysis.analyze_capture(bin_path, args.bootstrap_resamples),
+            )
+
+            os.remove(bin_path)
+
+    return results
+
+
+def run_multi_cpu_benchmarks(args: argparse.Namespace, directory: str) -> list[dict]:
+    csv_directory = os.path.join(directory, "CSVs")
+    os.mkdir(csv_directory)
+
+    size = int(args.cpu_size)
+
+    for cpu in range(args.cpus):
+        distribution = args.distributions[cpu % len(args.distributions)]
+        framestore.write_frametimes(
+            os.path.join(csv_directory, f"CPU-{cpu}.bin"),
+            generate(distribution, size, seed=cpu),
+            framestore.Header("1.10.0", "lava-triangle", 0, size),
+        )
+
+    cache_path = os.path.join(csv_directory, metric_cache.CACHE_FILE)
+
+    def cold() -> None:
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+
+        analysis.analyze_results(csv_directory, args.workers, args.bootstrap_resamples)
+
+    def warm() -> None:
+        analysis.analyze_results(csv_directory, args.workers, args.bootstrap_resamples)
+
+    results: list[dict] = []
+
+    # the process pool allocates in the workers which tracemalloc does not see, only wall time is meaningful
+    for name, fn in (("analyze_results.cold", cold), ("analyze_results.warm", warm)):
+        result = {"name": name, "distribution": "mixed", "size": size, "cpus": args.cpus}
+        result.update(measure(fn, args.repeat, not args.no_memory))
+        results.append(result)
+
+        print(f"{name:<24}{'mixed':<12}{size:<12}{result['seconds']:.6f}s", file=sys.stderr)
+
+    return results
+
+
+def run_startup_benchmarks(args: argparse.Namespace) -> list[dict]:
+    # a fresh interpreter importing the modules loaded before --analyze, --export and --query are dispatched
+    def startup() -> None:
+        subprocess.run([sys.executable, "-c", "import main"], cwd=PROGRAM_DIRECTORY, check=True)
+
+    # the import happens in the child process, only wall time is meaningful
+    result = {"name": "cli.startup", "distribution": "none", "size": 0}
+    result.update(measure(startup, args.repeat, trace_memory=False))
+
+    print(f"{'cli.startup':<24}{'none':<12}{0:<12}{result['seconds']:.6f}s", file=sys.stderr)
+
+    return [result]
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list[dict], baseline_path: str) -> dict[str, float]:
+    """Ratio of the wall time of each operation to the baseline, above 1 is slower."""
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = {
+            (result["name"], result["distribution"], result["size"]): result["seconds"]
+            for result in json.load(file)["results"]
+        }
+
+    ratios: dict[str, float] = {}
+
+    for result in results:
+        key = (result["name"], result["distribution"], result["size"])
+
+        if (baseline_seconds := baseline.get(key)) is not None and baseline_seconds > 0:
+            ratios["/".join(str(part) for part in key)] = result["seconds"] / baseline_seconds
+
+    return ratios
+
+
+def main() -> int:
+    args = parse_args()
+
+    # the multi-cpu analysis logs the metric cache
+    logging.basicConfig(format="[%(name)s] %(levelname)s: %(message)s", level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = run_capture_benchmarks(args, directory)
+
+        if args.cpus > 0:
+            results.extend(run_multi_cpu_benchmarks(args, directory))
+
+    results.extend(run_startup_benchmarks(args))
+
+    report: dict = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        # results are only comparable if they were measured with the same parameters
+        "parameters": {
+            key: value for key, value in vars(args).items() if key not in ("output", "baseline", "max_regression")
+        },
+        "results": results,
+    }
+
+    regressions: dict[str, float] = {}
+
+    if args.baseline is not None:
+        report["ratios"] = compare(results, args.baseline)
+
+        if args.max_regression is not None:
+            regressions = {key: ratio for key, ratio in report["ratios"].items() if ratio > args.max_regression}
+
+    print(json.dumps(report, indent=2))
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    for key, ratio in regressions.items():
+        print(f"{key} is {ratio:.2f}x slower than the baseline", file=sys.stderr)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
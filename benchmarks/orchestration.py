@@ -0,0 +1,159 @@
+"""
+Times the benchmark session pipeline against the simulated backend so that the per-CPU overhead of the orchestration
+can be measured and regression-tested without a GPU or Windows.
+
+python benchmarks/orchestration.py --cpus 8 --duration 30 --time-scale 0.01 --max-overhead 0.5
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AutoGpuAffinity"))
+
+import analysis
+import journal
+import scheduler
+import session
+from config import Config
+from simulated_backend import Latencies, SimulatedBackend, SimulatedSystem
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--cpus", type=int, default=8, help="number of cpus to benchmark")
+    parser.add_argument("--gpus", type=int, default=1, help="number of simulated graphics cards")
+    parser.add_argument("--duration", type=int, default=30, help="benchmark duration of each cpu in seconds")
+    parser.add_argument("--cache-duration", type=int, default=5, help="cache duration in seconds")
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=0.0,
+        help="fraction of the fixed waits and capture durations that is actually waited",
+    )
+    parser.add_argument("--driver-latency", type=float, default=0.0, help="seconds per driver state change")
+    parser.add_argument("--launch-latency", type=float, default=0.0, help="seconds to launch the subject")
+    parser.add_argument("--driver-start", type=float, default=0.0, help="seconds until a device starts after enabling")
+    parser.add_argument("--subject-ready", type=float, default=0.0, help="seconds until the subject presents")
+    parser.add_argument("--xperf-latency", type=float, default=0.0, help="seconds per xperf invocation")
+    parser.add_argument("--xperf", action="store_true", help="enable dpc/isr logging")
+    parser.add_argument("--verbose", action="store_true", help="log the progress of the session")
+    parser.add_argument("--output", metavar="<file>", type=str, help="write the report to a json file")
+    parser.add_argument(
+        "--max-overhead",
+        metavar="<seconds>",
+        type=float,
+        help="exit with an error if the mean per-cpu overhead exceeds this value",
+    )
+
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+
+    logging.basicConfig(
+        format="[%(name)s] %(levelname)s: %(message)s",
+        level=logging.INFO if args.verbose else logging.WARNING,
+    )
+
+    cfg = Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AutoGpuAffinity", "config.ini"))
+    cfg.settings.benchmark_duration = args.duration
+    cfg.settings.cache_duration = args.cache_duration
+    cfg.settings.live_stats_interval = 0
+    cfg.msi_afterburner.profile = 0
+    cfg.xperf.enabled = args.xperf
+
+    backend = SimulatedBackend(
+        SimulatedSystem(cpu_count=args.cpus, gpu_count=args.gpus),
+        Latencies(
+            set_driver_state=args.driver_latency,
+            launch_subject=args.launch_latency,
+            driver_start=args.driver_start,
+            subject_ready=args.subject_ready,
+            xperf=args.xperf_latency,
+            time_scale=args.time_scale,
+        ),
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        benchmark_session = session.BenchmarkSession(
+            backend,
+            cfg,
+            os.path.join(directory, "session"),
+            backend.gpu_hwids(),
+            "PresentMon.exe",
+            "1.10.0",
+            "lava-triangle.exe",
+            journal.Journal(os.path.join(directory, "session"), ""),
+        )
+
+        cpu_times: list[float] = []
+        benchmark = benchmark_session.benchmark
+
+        def timed_benchmark(mask: int, duration: int) -> int:
+            start = time.perf_counter()
+            result = benchmark(mask, duration)
+            cpu_times.append(time.perf_counter() - start)
+            return result
+
+        benchmark_session.benchmark = timed_benchmark
+
+        session_start = time.perf_counter()
+
+        if benchmark_session.run(scheduler.LinearScheduler(args.duration), [1 << cpu for cpu in range(args.cpus)]) != 0:
+            print("session failed", file=sys.stderr)
+            return 1
+
+        if benchmark_session.errors:
+            print(f"{len(benchmark_session.errors)} post-processing task(s) failed", file=sys.stderr)
+            return 1
+
+        session_time = time.perf_counter() - session_start
+
+        # time until the results are available after the last capture, the same way display_results obtains them
+        analysis_start = time.perf_counter()
+        cache = analysis.open_cache(benchmark_session.csv_directory, 1000)
+        for cpu in range(args.cpus):
+            bin_path = os.path.join(benchmark_session.csv_directory, f"CPU-{cpu}.bin")
+            if cache.lookup(f"CPU-{cpu}.bin", bin_path) is None:
+                analysis.analyze_capture(bin_path, 1000)
+        analysis_time = time.perf_counter() - analysis_start
+
+    capture_time = args.duration * args.time_scale
+    overhead = sum(cpu_times) / len(cpu_times) - capture_time
+
+    report = {
+        "cpus": args.cpus,
+        "gpus": args.gpus,
+        "duration": args.duration,
+        "time_scale": args.time_scale,
+        "session_seconds": session_time,
+        "per_cpu_seconds": sum(cpu_times) / len(cpu_times),
+        "per_cpu_overhead_seconds": overhead,
+        # fixed waits requested per cpu at full scale, these dominate the session time on real hardware
+        "per_cpu_requested_sleep_seconds": backend.requested_sleep / args.cpus,
+        "driver_restarts": backend.driver_restarts,
+        "analysis_seconds": analysis_time,
+    }
+
+    print(json.dumps(report, indent=2))
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if args.max_overhead is not None and overhead > args.max_overhead:
+        print(f"per-cpu overhead {overhead:.3f}s exceeds {args.max_overhead:.3f}s", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
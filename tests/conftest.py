@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the modules of the program are imported by their name like the program does
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AutoGpuAffinity"))
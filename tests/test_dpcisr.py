@@ -0,0 +1,67 @@
+import os
+
+import dpcisr
+import numpy as np
+import pytest
+import simulated_backend
+
+REPORT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "dpcisr_report.txt")
+
+
+@pytest.fixture
+def report() -> dpcisr.Report:
+    return dpcisr.read_report(REPORT_PATH)
+
+
+def test_parses_module_histograms(report: dpcisr.Report) -> None:
+    assert sorted(report.dpc) == ["dxgkrnl.sys", "ntoskrnl.exe", "nvlddmkm.sys"]
+    assert sorted(report.isr) == ["USBPORT.SYS", "dxgkrnl.sys"]
+
+    assert report.dpc["nvlddmkm.sys"].buckets == {8: 300, 16: 140, 32: 16, 64: 3, 128: 1}
+    assert report.isr["dxgkrnl.sys"].buckets == {1: 1500, 2: 280, 4: 20}
+
+
+def test_counts_match_module_totals(report: dpcisr.Report) -> None:
+    assert [histogram.count() for histogram in report.dpc.values()] == [1490, 2050, 460]
+    assert [histogram.count() for histogram in report.isr.values()] == [1800, 200]
+
+
+def test_ignores_per_cpu_sections(report: dpcisr.Report) -> None:
+    # ntoskrnl.exe is listed again for CPU 0, its executions are already included in the totals
+    assert report.dpc["ntoskrnl.exe"].count() == 1490
+    assert report.total("dpc").count() == 4000
+
+
+def test_ignores_interval_distributions(report: dpcisr.Report) -> None:
+    assert "ntoskrnl.exe" not in report.isr
+    assert report.total("isr").maximum() == 8
+
+
+def test_summarize(report: dpcisr.Report) -> None:
+    assert dpcisr.summarize(report) == {
+        "dpc_maximum": 128,
+        "dpc_percentile99": 16,
+        "isr_maximum": 8,
+        "isr_percentile99": 4,
+    }
+
+
+def test_summarize_empty_report() -> None:
+    assert dpcisr.summarize(dpcisr.parse_report([])) == dict.fromkeys(dpcisr.METRICS, 0)
+
+
+def test_histogram_percentile() -> None:
+    histogram = dpcisr.Histogram({1: 90, 2: 9, 4: 1})
+
+    assert histogram.percentile(50) == 1
+    assert histogram.percentile(99) == 2
+    assert histogram.percentile(100) == 4
+    assert dpcisr.Histogram().percentile(99) == 0
+
+
+def test_parses_simulated_report() -> None:
+    report = dpcisr.parse_report(simulated_backend.dpcisr_report(np.random.default_rng(0)).splitlines())
+
+    assert sorted(report.dpc) == sorted(simulated_backend.DPCISR_MODULES["DPC Info"])
+    assert sorted(report.isr) == sorted(simulated_backend.DPCISR_MODULES["ISR Info"])
+    assert all(value > 0 for value in dpcisr.summarize(report).values())
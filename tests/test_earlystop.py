@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from config import AdaptiveDuration
+from earlystop import ConvergenceMonitor
+
+# defaults of the adaptive duration section in the config
+DEFAULTS = AdaptiveDuration(True, 10, 0.05, ["average", "lows1"])
+
+
+def steady_frametimes(seconds: int, framerate: int = 500, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).lognormal(np.log(1000 / framerate), 0.3, size=seconds * framerate)
+
+
+def replay(monitor: ConvergenceMonitor, frametimes: np.ndarray) -> None:
+    # frames are polled once per second during a capture
+    for chunk in np.array_split(frametimes, max(1, int(frametimes.sum() / 1000))):
+        monitor.add(chunk)
+
+        if monitor.should_stop():
+            return
+
+
+def test_defaults_converge_on_steady_frametimes() -> None:
+    monitor = ConvergenceMonitor(DEFAULTS.metrics, DEFAULTS.tolerance, DEFAULTS.min_duration, 60)
+    replay(monitor, steady_frametimes(60))
+
+    assert DEFAULTS.min_duration <= monitor.elapsed < 30
+    assert not monitor.timed_out
+
+
+def test_warmup_is_excluded() -> None:
+    frametimes = steady_frametimes(60)
+    # slow frames at the start of the capture while shaders are compiled
+    frametimes[:1000] *= np.linspace(3, 1, 1000)
+
+    monitor = ConvergenceMonitor(DEFAULTS.metrics, DEFAULTS.tolerance, DEFAULTS.min_duration, 60, 0.5)
+    replay(monitor, frametimes)
+
+    assert not monitor.timed_out
+    assert monitor.steady_frametimes().size <= monitor.chunks[0].size - 800
+
+
+def test_timeout_is_not_convergence() -> None:
+    monitor = ConvergenceMonitor(["lows0.01"], 0.001, DEFAULTS.min_duration, 20)
+    replay(monitor, steady_frametimes(60))
+
+    assert monitor.timed_out
+    assert not monitor.converged()
+
+
+def test_metrics_without_intervals_are_rejected() -> None:
+    with pytest.raises(ValueError, match="invalid metric"):
+        ConvergenceMonitor(["lows2"], DEFAULTS.tolerance, DEFAULTS.min_duration, 60)
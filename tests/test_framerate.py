@@ -0,0 +1,67 @@
+import math
+
+import framerate
+import numpy as np
+import pytest
+
+
+class ReferenceFps:
+    """Pure python implementation that framerate.Fps replaced, the metrics must stay the same."""
+
+    def __init__(self, frametimes: list[float]) -> None:
+        self.sorted_frametimes = sorted(frametimes, reverse=True)
+
+        self.total = sum(frametimes)
+        self.length = len(frametimes)
+        self.mean = 1000 / (self.total / self.length)
+
+    def lows(self, value: float) -> float:
+        current_total = 0.0
+
+        for frametime in self.sorted_frametimes:
+            current_total += frametime
+            if current_total >= value / 100 * self.total:
+                return 1000 / frametime
+        return 0.0
+
+    def percentile(self, value: float) -> float:
+        return 1000 / self.sorted_frametimes[math.ceil(value / 100 * self.length) - 1]
+
+    def stdev(self) -> float:
+        squared_deviations = sum((1000 / framerate - self.mean) ** 2 for framerate in self.sorted_frametimes)
+        return math.sqrt(squared_deviations / (self.length - 1))  # bessel's correction
+
+    def maximum(self) -> float:
+        return 1000 / self.sorted_frametimes[-1]
+
+    def minimum(self) -> float:
+        return 1000 / self.sorted_frametimes[0]
+
+    def average(self) -> float:
+        return self.mean
+
+
+CAPTURES = {
+    "lognormal": np.random.default_rng(0).lognormal(np.log(4), 0.3, 20000).tolist(),
+    # few distinct frametimes so that the thresholds fall on ties
+    "ties": np.random.default_rng(1).choice([2.0, 4.0, 8.0, 16.0], 5000, p=[0.5, 0.3, 0.15, 0.05]).tolist(),
+    "constant": [5.0] * 100,
+    "two frames": [4.0, 12.0],
+    "three frames": [7.0, 3.0, 7.0],
+}
+
+
+@pytest.mark.parametrize("frametimes", CAPTURES.values(), ids=CAPTURES.keys())
+def test_metrics_match_the_reference(frametimes: list[float]) -> None:
+    fps, reference = framerate.Fps(frametimes), ReferenceFps(frametimes)
+
+    for metric in ("maximum", "average", "minimum", "stdev"):
+        assert getattr(fps, metric)() == pytest.approx(getattr(reference, metric)(), rel=1e-9, abs=1e-9)
+
+    for value in framerate.METRIC_VALUES:
+        assert fps.percentile(value) == pytest.approx(reference.percentile(value), rel=1e-9)
+        assert fps.lows(value) == pytest.approx(reference.lows(value), rel=1e-9)
+
+    # the batched variants resolve every threshold at once
+    assert fps.percentiles(framerate.METRIC_VALUES) == [fps.percentile(value) for value in framerate.METRIC_VALUES]
+    assert fps.lows_many(framerate.METRIC_VALUES) == [fps.lows(value) for value in framerate.METRIC_VALUES]
@@ -0,0 +1,36 @@
+import json
+import os
+
+import journal
+import pytest
+
+
+def test_entries_are_saved_and_loaded(tmp_path) -> None:
+    session_journal = journal.Journal(tmp_path, "hash", config={"settings": {"api": "LIBLAVA"}})
+    first = journal.Entry(1, 30, artifacts=[os.path.join("CSVs", "CPU-0.bin")])
+
+    session_journal.append(first)
+    session_journal.append(journal.Entry(2, 30))
+    session_journal.complete(first, 123.4)
+
+    loaded = journal.Journal.load(tmp_path)
+
+    assert loaded.session_hash == "hash"
+    assert loaded.config == {"settings": {"api": "LIBLAVA"}}
+    assert loaded.entries == [
+        journal.Entry(1, 30, 123.4, [os.path.join("CSVs", "CPU-0.bin")]),
+        journal.Entry(2, 30),
+    ]
+    # only the analyzed measurements at the start can be skipped
+    assert loaded.completed() == 1
+
+    loaded.truncate(1)
+    assert journal.Journal.load(tmp_path).entries == loaded.entries
+
+
+def test_journals_of_other_versions_are_rejected(tmp_path) -> None:
+    with open(os.path.join(tmp_path, journal.JOURNAL_FILE), "w", encoding="utf-8") as file:
+        json.dump({"version": journal.JOURNAL_VERSION + 1}, file)
+
+    with pytest.raises(ValueError, match="unsupported session journal"):
+        journal.Journal.load(tmp_path)
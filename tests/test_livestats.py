@@ -0,0 +1,47 @@
+import os
+
+import livestats
+from simulated_backend import PRESENTMON_HEADER
+
+
+def row(frametime: float) -> str:
+    return f"subject.exe,1000,0x0,DXGI,0,0,1,Hardware: Independent Flip,{frametime:.4f},0.0100\n"
+
+
+def append(csv_path: str, text: str) -> None:
+    with open(csv_path, "a", encoding="utf-8") as file:
+        file.write(text)
+
+
+def test_rows_are_read_as_the_log_grows(tmp_path) -> None:
+    csv_path = os.path.join(tmp_path, "CPU-0.csv")
+    tail = livestats.CsvTail(csv_path)
+
+    # presentmon has not created the log yet
+    assert tail.poll().tolist() == []
+
+    append(csv_path, PRESENTMON_HEADER[:20])
+    assert tail.poll().tolist() == []
+
+    append(csv_path, PRESENTMON_HEADER[20:] + row(2.0) + row(3.0)[:30])
+    assert tail.poll().tolist() == [2.0]
+
+    # the partially written row is completed by the next write
+    append(csv_path, row(3.0)[30:] + row(4.0))
+    assert tail.poll().tolist() == [3.0, 4.0]
+
+    assert tail.poll().tolist() == []
+
+
+def test_truncated_log_is_read_from_the_start(tmp_path) -> None:
+    csv_path = os.path.join(tmp_path, "CPU-0.csv")
+    tail = livestats.CsvTail(csv_path)
+
+    append(csv_path, PRESENTMON_HEADER + "".join(row(5.0) for _ in range(50)))
+    assert tail.poll().size == 50
+
+    # created again by a new instance of presentmon
+    with open(csv_path, "w", encoding="utf-8") as file:
+        file.write(PRESENTMON_HEADER + row(2.0))
+
+    assert tail.poll().tolist() == [2.0]
@@ -0,0 +1,77 @@
+import os
+
+import export
+import framestore
+import matrix
+import numpy as np
+import pytest
+from config import Api, Config
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "AutoGpuAffinity", "config.ini")
+
+MASKS = [1 << cpu for cpu in range(3)]
+
+
+@pytest.fixture
+def cfg() -> Config:
+    cfg = Config(CONFIG_PATH)
+    cfg.matrix.enabled = True
+    cfg.matrix.fps_cap = [0, 144]
+    cfg.matrix.api = [Api.LIBLAVA, Api.D3D9]
+    return cfg
+
+
+def test_expand_skips_combinations_without_effect(cfg) -> None:
+    variants = matrix.expand(cfg)
+
+    # the fps cap only applies to liblava, so there is a single d3d9 variant
+    assert [(variant.api, variant.fps_cap) for variant in variants] == [
+        (Api.LIBLAVA, 0),
+        (Api.LIBLAVA, 144),
+        (Api.D3D9, cfg.liblava.fps_cap),
+    ]
+    assert [matrix.variant_label(variant, variants) for variant in variants] == [
+        "api-liblava_fps_cap-0",
+        "api-liblava_fps_cap-144",
+        f"api-d3d9_fps_cap-{cfg.liblava.fps_cap}",
+    ]
+
+
+def test_plan_benchmarks_every_variant_of_a_cpu_in_a_row(cfg) -> None:
+    variants = matrix.expand(cfg)
+
+    assert matrix.plan(MASKS, variants) == [(mask, variant) for mask in MASKS for variant in variants]
+    assert matrix.plan(MASKS, variants, group_by_cpu=False) == [
+        (mask, variant) for variant in variants for mask in MASKS
+    ]
+
+
+def test_restart_counts(cfg) -> None:
+    variants = matrix.expand(cfg)
+
+    # one restart per cpu and one to reset the affinity
+    assert matrix.restart_count(matrix.plan(MASKS, variants)) == len(MASKS) + 1
+    assert matrix.restart_count(matrix.plan(MASKS, variants, group_by_cpu=False)) == len(variants) * len(MASKS) + 1
+    assert matrix.separate_sessions_restart_count(MASKS, variants) == len(variants) * (len(MASKS) + 1)
+    assert matrix.restart_count([]) == 0
+
+
+def test_variants_of_different_sessions_are_exported_separately(tmp_path) -> None:
+    export_directory = os.path.join(tmp_path, "export")
+    frames_directories: list[str] = []
+
+    for session_name in ("AutoGpuAffinity-010125120000", "AutoGpuAffinity-020125120000"):
+        csv_directory = os.path.join(tmp_path, "captures", session_name, "fps_cap-144", "CSVs")
+        os.makedirs(csv_directory)
+        framestore.write_frametimes(
+            os.path.join(csv_directory, "CPU-0.bin"),
+            np.full(100, 2.0),
+            framestore.Header("1.10.0", "lava-triangle", 10, 100),
+        )
+
+        frames_directories.append(export.export_session(csv_directory, export_directory))
+
+    assert frames_directories == [
+        os.path.join(export_directory, "AutoGpuAffinity-010125120000_fps_cap-144", export.FRAMES_DIRECTORY),
+        os.path.join(export_directory, "AutoGpuAffinity-020125120000_fps_cap-144", export.FRAMES_DIRECTORY),
+    ]
@@ -0,0 +1,79 @@
+import os
+
+import framestore
+import journal
+import numpy as np
+import pytest
+import resultsdb
+
+RESULTS = {"0": {"average": 500.0}, "1": {"average": 400.0}}
+
+
+def write_capture(csv_directory: str) -> None:
+    os.makedirs(csv_directory)
+    framestore.write_frametimes(
+        os.path.join(csv_directory, "CPU-0.bin"),
+        np.full(100, 2.0),
+        framestore.Header("1.10.0", "lava-triangle", 10, 0),
+    )
+
+
+def test_folders_analyzed_side_by_side_are_separate_sessions(tmp_path) -> None:
+    database_path = os.path.join(tmp_path, resultsdb.DATABASE_NAME)
+
+    for run in ("run1", "run2"):
+        write_capture(os.path.join(tmp_path, run))
+        resultsdb.index_session(database_path, os.path.join(tmp_path, run), RESULTS, ("average",))
+
+    assert resultsdb.rank_cpus(database_path, "average") == [
+        ("0", 2, 500.0, 500.0, 500.0),
+        ("1", 2, 400.0, 400.0, 400.0),
+    ]
+
+
+def test_sessions_with_a_journal_are_keyed_by_the_session_directory(tmp_path) -> None:
+    session_directory = os.path.join(tmp_path, "captures", "AutoGpuAffinity-010125120000")
+    csv_directory = os.path.join(session_directory, "CSVs")
+    write_capture(csv_directory)
+    journal.Journal(session_directory, "hash", config={"settings": {"api": "LIBLAVA"}}).save()
+
+    assert resultsdb.session_key(csv_directory) == (session_directory, {"settings": {"api": "LIBLAVA"}})
+    assert resultsdb.session_started_at(session_directory) == "2025-01-01 12:00:00"
+
+
+def test_database_is_next_to_the_analyzed_data(tmp_path) -> None:
+    captures_directory = os.path.join(tmp_path, "captures")
+    session_directory = os.path.join(captures_directory, "AutoGpuAffinity-010125120000")
+
+    # a copied folder, the csv directory of a session without a journal and a matrix variant
+    assert resultsdb.database_path(os.path.join(tmp_path, "data", "run1")) == os.path.join(
+        tmp_path, "data", resultsdb.DATABASE_NAME
+    )
+    assert resultsdb.database_path(os.path.join(session_directory, "CSVs")) == os.path.join(
+        captures_directory, resultsdb.DATABASE_NAME
+    )
+
+    variant_directory = os.path.join(session_directory, "api=LIBLAVA")
+    os.makedirs(variant_directory)
+    journal.Journal(variant_directory, "hash").save()
+
+    assert resultsdb.database_path(os.path.join(variant_directory, "CSVs")) == os.path.join(
+        captures_directory, resultsdb.DATABASE_NAME
+    )
+
+
+def test_aggregate_merges_the_frames_of_all_sessions(tmp_path) -> None:
+    database_path = os.path.join(tmp_path, resultsdb.DATABASE_NAME)
+
+    for run, frametime in (("run1", 2.0), ("run2", 4.0)):
+        csv_directory = os.path.join(tmp_path, run)
+        os.makedirs(csv_directory)
+        framestore.write_frametimes(
+            os.path.join(csv_directory, "CPU-0.bin"),
+            np.full(100, frametime),
+            framestore.Header("1.10.0", "lava-triangle", 10, 100),
+        )
+        resultsdb.index_session(database_path, csv_directory, RESULTS, ("average",))
+
+    # 200 frames that took 600 ms in total
+    assert resultsdb.aggregate_cpus(database_path, "average") == [("0", 2, 200, pytest.approx(1000 / 3))]
@@ -0,0 +1,43 @@
+import scheduler
+
+# score of each cpu, cpus 2 and 3 tie
+SCORES = {1 << cpu: score for cpu, score in enumerate((10.0, 80.0, 50.0, 50.0, 20.0, 90.0, 30.0, 40.0))}
+
+
+class FakeMeasure:
+    def __init__(self) -> None:
+        self.calls: list[tuple[int, int]] = []
+
+    def __call__(self, mask: int, duration: int) -> scheduler.Score:
+        self.calls.append((mask, duration))
+        return lambda: SCORES[mask]
+
+
+def test_linear_benchmarks_every_cpu_once() -> None:
+    measure = FakeMeasure()
+    rounds = scheduler.LinearScheduler(30).run(list(SCORES), measure)
+
+    assert measure.calls == [(mask, 30) for mask in SCORES]
+    assert [(current_round.cpus, current_round.duration) for current_round in rounds] == [(list(SCORES), 30)]
+    assert rounds[0].scores == SCORES
+
+
+def test_successive_halving_eliminates_the_worse_half() -> None:
+    measure = FakeMeasure()
+    rounds = scheduler.SuccessiveHalvingScheduler(30, 5, 2).run(list(SCORES), measure)
+
+    assert [(len(current_round.cpus), current_round.duration) for current_round in rounds] == [(8, 5), (4, 5), (2, 30)]
+    assert measure.calls == [(mask, current_round.duration) for current_round in rounds for mask in current_round.cpus]
+
+    # ordered by the score of the previous round, the tie keeps the original cpu order
+    assert rounds[1].cpus == [1 << 5, 1 << 1, 1 << 2, 1 << 3]
+    assert rounds[2].cpus == [1 << 5, 1 << 1]
+
+
+def test_successive_halving_keeps_the_finalists() -> None:
+    successive_halving = scheduler.SuccessiveHalvingScheduler(30, 5, 3)
+
+    assert successive_halving.plan(8) == [(8, 5), (4, 5), (3, 30)]
+    # too few cpus for an elimination round
+    assert successive_halving.plan(3) == [(3, 30)]
+    assert successive_halving.estimate(8, 10) == 8 * 15 + 4 * 15 + 3 * 40
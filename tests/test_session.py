@@ -0,0 +1,130 @@
+import os
+import subprocess
+
+import framestore
+import journal
+import pytest
+import readiness
+import scheduler
+import session
+from config import Config
+from simulated_backend import Latencies, SimulatedBackend, SimulatedSystem
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "AutoGpuAffinity", "config.ini")
+
+
+@pytest.fixture
+def cfg() -> Config:
+    cfg = Config(CONFIG_PATH)
+    cfg.settings.live_stats_interval = 0
+    cfg.msi_afterburner.profile = 0
+    cfg.xperf.enabled = False
+    return cfg
+
+
+def benchmark_session(
+    cfg: Config,
+    backend: SimulatedBackend,
+    directory: str,
+    session_journal: journal.Journal | None = None,
+) -> session.BenchmarkSession:
+    return session.BenchmarkSession(
+        backend,
+        cfg,
+        directory,
+        backend.gpu_hwids(),
+        "PresentMon.exe",
+        "1.10.0",
+        "lava-triangle.exe",
+        session_journal or journal.Journal(directory, ""),
+        bootstrap_resamples=0,
+    )
+
+
+def test_elimination_rounds_are_not_compared_with_the_finalists(cfg, tmp_path) -> None:
+    backend = SimulatedBackend(SimulatedSystem(cpu_count=4), Latencies())
+    directory = os.path.join(tmp_path, "session")
+    successive_halving = scheduler.SuccessiveHalvingScheduler(cfg.settings.benchmark_duration, 5, 1)
+
+    assert benchmark_session(cfg, backend, directory).run(successive_halving, [1 << cpu for cpu in range(4)]) == 0
+
+    csv_directory = os.path.join(directory, "CSVs")
+
+    # only the finalist was captured for the full duration
+    assert len(framestore.find_captures(csv_directory)) == 1
+    assert len(framestore.find_captures(os.path.join(csv_directory, "rounds", "round-1"))) == 4
+    assert len(framestore.find_captures(os.path.join(csv_directory, "rounds", "round-2"))) == 2
+
+
+def test_resumed_session_only_benchmarks_the_remaining_cpus(cfg, tmp_path) -> None:
+    backend = SimulatedBackend(SimulatedSystem(cpu_count=4), Latencies())
+    directory = os.path.join(tmp_path, "session")
+    masks = [1 << cpu for cpu in range(4)]
+    linear = scheduler.LinearScheduler(cfg.settings.benchmark_duration)
+
+    assert benchmark_session(cfg, backend, directory).run(linear, masks) == 0
+
+    # cpu 2 was not analyzed before the session was interrupted
+    interrupted_journal = journal.Journal.load(directory)
+    interrupted_journal.entries[2].score = None
+    interrupted_journal.save()
+
+    resumed = benchmark_session(cfg, backend, directory, journal.Journal.load(directory))
+    benchmarked: list[int] = []
+    benchmark = resumed.benchmark
+    resumed.benchmark = lambda mask, duration: benchmarked.append(mask) or benchmark(mask, duration)
+
+    assert resumed.run(linear, masks) == 0
+    assert benchmarked == masks[2:]
+    assert journal.Journal.load(directory).completed() == len(masks)
+
+
+def test_affinity_is_reset_when_the_session_fails_unexpectedly(cfg, tmp_path, monkeypatch) -> None:
+    backend = SimulatedBackend(SimulatedSystem(cpu_count=2), Latencies())
+
+    cfg.xperf.enabled = True
+    xperf = backend.xperf
+
+    def start_xperf_failing(location: str, args: list[str], quiet: bool = True, background: bool = False) -> None:
+        if args[0] == "-on":
+            raise subprocess.CalledProcessError(1, args)
+
+        xperf(location, args, quiet, background)
+
+    # raised by the backend rather than reported as a failed benchmark
+    monkeypatch.setattr(backend, "xperf", start_xperf_failing)
+
+    with pytest.raises(subprocess.CalledProcessError):
+        benchmark_session(cfg, backend, os.path.join(tmp_path, "session")).run(
+            scheduler.LinearScheduler(cfg.settings.benchmark_duration), [0b01, 0b10]
+        )
+
+    assert backend.policies == {}
+
+
+@pytest.mark.parametrize("kill_stray_processes", [False, True])
+def test_processes_are_only_killed_by_name_if_enabled(cfg, tmp_path, monkeypatch, kill_stray_processes) -> None:
+    backend = SimulatedBackend(SimulatedSystem(cpu_count=1), Latencies())
+    killed: list[str] = []
+    monkeypatch.setattr(backend, "kill_processes", lambda *targets: killed.extend(targets))
+    cfg.settings.kill_stray_processes = kill_stray_processes
+
+    benchmark_session(cfg, backend, os.path.join(tmp_path, "session")).prepare()
+
+    assert killed == (["xperf.exe", "lava-triangle.exe", "presentmon.exe"] if kill_stray_processes else [])
+
+
+@pytest.mark.parametrize(
+    "latencies",
+    [Latencies(driver_start=60), Latencies(subject_ready=60)],
+    ids=["driver not started", "subject not presenting"],
+)
+def test_nothing_is_captured_if_a_probe_times_out(cfg, tmp_path, monkeypatch, latencies) -> None:
+    backend = SimulatedBackend(SimulatedSystem(cpu_count=2), latencies)
+    directory = os.path.join(tmp_path, "session")
+    # every probe times out immediately
+    monkeypatch.setattr(readiness, "wait_until", lambda condition, *args, **kwargs: condition())
+
+    assert benchmark_session(cfg, backend, directory).run(scheduler.LinearScheduler(30), [0b01, 0b10]) == 1
+    assert backend.captures == []
+    assert not os.path.exists(directory)
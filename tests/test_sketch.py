@@ -0,0 +1,97 @@
+import math
+import os
+
+import analysis
+import framerate
+import framestore
+import numpy as np
+import pytest
+import sketch
+
+
+def frametimes(seed: int, size: int = 20000) -> np.ndarray:
+    return np.random.default_rng(seed).lognormal(np.log(4), 0.3, size)
+
+
+def test_metrics_are_within_the_relative_accuracy() -> None:
+    frames = frametimes(0)
+    frametime_sketch = sketch.FrametimeSketch()
+    frametime_sketch.add(frames)
+
+    expected = framerate.Fps(frames)
+
+    for metric in ("maximum", "average", "minimum", "stdev"):
+        assert getattr(frametime_sketch, metric)() == pytest.approx(getattr(expected, metric)())
+
+    for value in framerate.METRIC_VALUES:
+        assert frametime_sketch.percentile(value) == pytest.approx(expected.percentile(value), rel=0.01)
+        assert frametime_sketch.lows(value) == pytest.approx(expected.lows(value), rel=0.01)
+
+
+def test_merged_sketches_match_a_sketch_of_all_frames() -> None:
+    first, second = frametimes(1), frametimes(2)
+
+    merged = sketch.FrametimeSketch()
+
+    for frames in (first, second):
+        frames_sketch = sketch.FrametimeSketch()
+        frames_sketch.add(frames)
+        merged.merge(frames_sketch)
+
+    combined = sketch.FrametimeSketch()
+    combined.add(np.concatenate((first, second)))
+
+    assert merged.counts == combined.counts
+    assert merged.results() == pytest.approx(combined.results())
+
+
+def test_zero_frametimes_are_finite() -> None:
+    frametime_sketch = sketch.FrametimeSketch()
+    frametime_sketch.add([4.0, 0.0, 4.0, 5.0])
+
+    assert all(math.isfinite(value) for value in frametime_sketch.results().values())
+    assert frametime_sketch.maximum() == 1000 / sketch.MIN_FRAMETIME
+
+
+def test_capture_sketch_is_saved_and_excludes_the_warmup(tmp_path, monkeypatch) -> None:
+    capture_path = os.path.join(tmp_path, "CPU-0.bin")
+    frames = np.concatenate((np.full(100, 50.0), frametimes(3)))
+    framestore.write_frametimes(
+        capture_path, frames, framestore.Header("1.10.0", "lava-triangle", 10, frames.size, 100)
+    )
+
+    capture_sketch = sketch.capture_sketch(capture_path)
+
+    assert capture_sketch.length == frames.size - 100
+    assert os.path.exists(os.path.join(tmp_path, "CPU-0.sketch.json"))
+
+    # the saved sketch is loaded instead of reading the capture again
+    monkeypatch.setattr(framestore, "load_frametimes", None)
+    assert sketch.capture_sketch(capture_path).results() == capture_sketch.results()
+
+
+def test_unsaved_sketch_is_not_an_error(tmp_path, monkeypatch) -> None:
+    capture_path = os.path.join(tmp_path, "CPU-0.bin")
+    frames = frametimes(4)
+    framestore.write_frametimes(capture_path, frames, framestore.Header("1.10.0", "lava-triangle", 10, frames.size))
+
+    # e.g. an archived folder that is read-only
+    monkeypatch.setattr(sketch, "sketch_path", lambda _: os.path.join(tmp_path, "missing", "CPU-0.sketch.json"))
+
+    assert sketch.save_capture_sketch(capture_path, frames).length == frames.size
+
+
+def test_analysis_loads_the_capture_once(tmp_path, monkeypatch) -> None:
+    capture_path = os.path.join(tmp_path, "CPU-0.bin")
+    frames = frametimes(5)
+    framestore.write_frametimes(capture_path, frames, framestore.Header("1.10.0", "lava-triangle", 10, frames.size))
+
+    loads: list[str] = []
+    load_capture = framestore.load_capture
+    monkeypatch.setattr(framestore, "load_capture", lambda path: loads.append(path) or load_capture(path))
+
+    _, results = analysis.analyze_capture_uncached(capture_path)
+
+    assert loads == [capture_path]
+    assert sketch.capture_sketch(capture_path).length == frames.size
+    assert results["average"] == pytest.approx(framerate.Fps(frames).average(), abs=0.01)
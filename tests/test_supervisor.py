@@ -0,0 +1,103 @@
+import subprocess
+import sys
+import time
+
+import psutil
+import pytest
+import supervisor
+
+# dummy children are python processes so that the supervisor is tested the same way on every platform
+SLEEP = "import time; time.sleep(60)"
+
+
+def spawn(code: str) -> str:
+    """Code that starts a sleeping grandchild and prints its pid."""
+    return f"import subprocess, sys; print(subprocess.Popen([sys.executable, '-c', {SLEEP!r}]).pid, flush=True); {code}"
+
+
+def is_alive(pid: int) -> bool:
+    try:
+        # an orphan is not reaped immediately on every system
+        return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+    except psutil.NoSuchProcess:
+        return False
+
+
+def wait_until(predicate, timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+
+        time.sleep(0.05)
+
+    return predicate()
+
+
+@pytest.fixture
+def child_supervisor():
+    child_supervisor = supervisor.Supervisor(grace=1, track_interval=0.05)
+    yield child_supervisor
+    child_supervisor.terminate()
+
+
+def test_terminates_process_tree(child_supervisor: supervisor.Supervisor) -> None:
+    process = child_supervisor.launch("subject", [sys.executable, "-c", spawn(SLEEP)], stdout=subprocess.PIPE)
+    grandchild = int(process.stdout.readline())
+
+    assert child_supervisor.pids("subject") == {process.pid, grandchild}
+
+    child_supervisor.terminate("subject")
+
+    assert process.returncode is not None
+    assert wait_until(lambda: not is_alive(grandchild))
+    assert child_supervisor.pids("subject") == set()
+
+
+def test_tracks_descendants_of_exited_launcher(child_supervisor: supervisor.Supervisor) -> None:
+    # the launcher exits shortly after it started the subject
+    launcher = child_supervisor.launch(
+        "subject",
+        [sys.executable, "-c", spawn("import time; time.sleep(0.5)")],
+        track=True,
+        stdout=subprocess.PIPE,
+    )
+    grandchild = int(launcher.stdout.readline())
+    launcher.wait()
+
+    assert child_supervisor.pids("subject") == {grandchild}
+
+    child_supervisor.terminate("subject")
+
+    assert wait_until(lambda: not is_alive(grandchild))
+
+
+def test_leaves_other_children_running(child_supervisor: supervisor.Supervisor) -> None:
+    subject = child_supervisor.launch("subject", [sys.executable, "-c", SLEEP])
+    presentmon = child_supervisor.launch("presentmon", [sys.executable, "-c", SLEEP])
+
+    child_supervisor.terminate("presentmon")
+
+    assert presentmon.returncode is not None
+    assert subject.poll() is None
+
+
+def test_watchdog_terminates_hung_child(child_supervisor: supervisor.Supervisor) -> None:
+    start = time.monotonic()
+    returncode = child_supervisor.run("presentmon", [sys.executable, "-c", SLEEP], timeout=0.5)
+
+    assert returncode != 0
+    assert time.monotonic() - start < 5
+    assert child_supervisor.children == []
+
+
+def test_run_raises_if_check_fails(child_supervisor: supervisor.Supervisor) -> None:
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        child_supervisor.run("xperf", [sys.executable, "-c", "raise SystemExit(3)"], timeout=5, check=True)
+
+    assert error.value.returncode == 3
+
+
+def test_run_returns_after_child_exits(child_supervisor: supervisor.Supervisor) -> None:
+    assert child_supervisor.run("xperf", [sys.executable, "-c", "pass"], timeout=5, check=True) == 0
@@ -0,0 +1,47 @@
+import json
+import os
+
+import pytest
+import topology
+
+# four cores without smt that are split across two ccxs
+TWO_CCX = topology.Topology([[0], [1], [2], [3]], [[0, 1], [2, 3]])
+
+
+def test_smt_cores_and_their_primary_processors() -> None:
+    smt = topology.Topology([[0, 1], [2, 3]], [[0, 1, 2, 3]])
+
+    # every logical processor of the cache is equivalent to no affinity
+    assert topology.candidate_masks(smt) == [0b0011, 0b1100, 0b0101]
+
+
+def test_cores_without_smt() -> None:
+    single_ccx = topology.Topology([[0], [1], [2], [3]], [[0, 1, 2, 3]])
+
+    assert topology.candidate_masks(single_ccx) == [0b0001, 0b0010, 0b0100, 0b1000]
+
+
+def test_each_last_level_cache_is_a_candidate() -> None:
+    assert topology.candidate_masks(TWO_CCX) == [0b0001, 0b0010, 0b0100, 0b1000, 0b0011, 0b1100]
+
+
+def test_ccx_of_a_restricted_topology_is_kept() -> None:
+    restricted = TWO_CCX.restrict(0b0011)
+
+    assert restricted == topology.Topology([[0], [1]], [[0, 1]])
+    # the ccx differs from the default affinity of the system although it is every cpu of the restricted topology
+    assert topology.candidate_masks(restricted, 0b1111) == [0b0001, 0b0010, 0b0011]
+
+
+def test_single_core_is_benchmarked_as_is() -> None:
+    assert topology.candidate_masks(topology.Topology([[0]], [[0]])) == [0b0001]
+
+
+def test_topology_with_shared_processors_is_rejected(tmp_path) -> None:
+    path = os.path.join(tmp_path, "topology.json")
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"cores": [[0, 1], [1, 2]]}, file)
+
+    with pytest.raises(ValueError, match="multiple cores"):
+        topology.load_topology(path)
@@ -0,0 +1,33 @@
+import numpy as np
+import warmup
+
+
+def steady_frametimes(size: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).lognormal(np.log(4), 0.1, size)
+
+
+def test_decaying_ramp_is_cut_near_its_end() -> None:
+    frametimes = steady_frametimes(10000)
+    # frametimes decay from 3x to the steady state over the first 1000 frames
+    frametimes[:1000] *= np.linspace(3, 1, 1000)
+
+    warmup_frames = warmup.detect_warmup(frametimes)
+
+    assert 800 <= warmup_frames <= 1200
+    assert warmup_frames % warmup.BATCH_SIZE == 0
+
+
+def test_flat_capture_has_no_warmup() -> None:
+    assert warmup.detect_warmup(np.full(10000, 4.0)) == 0
+
+
+def test_warmup_is_limited_to_the_max_fraction() -> None:
+    frametimes = steady_frametimes(1000)
+    frametimes[:800] *= np.linspace(3, 1, 800)
+
+    assert warmup.detect_warmup(frametimes, 0.25) <= 250
+
+
+def test_short_captures_have_no_warmup() -> None:
+    for size in (0, 1, warmup.BATCH_SIZE, 2 * warmup.BATCH_SIZE - 1):
+        assert warmup.detect_warmup(np.linspace(12, 4, size)) == 0